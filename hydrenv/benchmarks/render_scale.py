@@ -0,0 +1,253 @@
+"""Rendering benchmark for hydrenv at production scale.
+
+Builds synthetic environments with many ``AZURE_OPENAI_*`` backends and
+``GATEWAY_CLIENT_*`` consumers, then times each phase of a gateway render
+(context building, grouping, template compilation, rendering and the atomic
+write) against the real ``templates/config/gateway/apisix.yaml.j2``. Peak
+memory is measured with tracemalloc in a separate pass so it does not skew the
+timings. The JSON report is stable across runs and meant to be diffed between
+commits.
+
+Usage:
+    python hydrenv/benchmarks/render_scale.py [--backends 1,50,500]
+        [--consumers 10,1000,10000] [--repeat N] [--output report.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+HYDRENV_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT = HYDRENV_ROOT.parent
+sys.path.insert(0, str(HYDRENV_ROOT))
+
+from hydrenv.core.models import RenderConfig, RenderTask  # noqa: E402
+from hydrenv.environment.grouping import apply_grouping_strategy  # noqa: E402
+from hydrenv.environment.processor import build_context  # noqa: E402
+from hydrenv.rendering import engine  # noqa: E402
+
+TEMPLATE = REPO_ROOT / "templates" / "config" / "gateway" / "apisix.yaml.j2"
+DEFAULT_BACKENDS = (1, 50, 500)
+DEFAULT_CONSUMERS = (10, 1_000, 10_000)
+
+# Same grouping configuration as render-templates.sh.
+GROUPS: tuple[dict[str, Any], ...] = (
+    {
+        "strategy_name": "indexed",
+        "prefix": "AZURE_OPENAI_",
+        "required_keys": ["ENDPOINT"],
+        "optional_keys": [
+            "KEY",
+            "PRIORITY",
+            "WEIGHT",
+            "NAME",
+            "AUTH_MODE",
+            "TOKEN_RESOURCE",
+            "MSI_CLIENT_ID",
+        ],
+    },
+    {
+        "strategy_name": "sequential",
+        "prefix": "GATEWAY_CLIENT_",
+        "required_keys": ["NAME", "KEY"],
+        "require_when_env": "GATEWAY_REQUIRE_AUTH",
+    },
+)
+
+BASE_ENV = {
+    "GATEWAY_LOG_MODE": "prod",
+    "GATEWAY_REQUIRE_AUTH": "true",
+    "GATEWAY_CPU_LIMIT": "0.5",
+    "GATEWAY_MEMORY_LIMIT": "1Gi",
+    "OTEL_COLLECTOR_ENDPOINT": "localhost:4318",
+    "PATH": "/usr/local/bin:/usr/bin:/bin",
+    "HOSTNAME": "gateway-benchmark",
+}
+
+
+def synthetic_environ(backends: int, consumers: int) -> dict[str, str]:
+    """Return an environment with ``backends`` upstreams and ``consumers`` clients."""
+    environ = dict(BASE_ENV)
+    for index in range(backends):
+        region = f"region{index % 12:02d}"
+        environ[f"AZURE_OPENAI_ENDPOINT_{index}"] = (
+            f"https://aoai-{region}-{index:04d}.openai.azure.com"
+        )
+        environ[f"AZURE_OPENAI_KEY_{index}"] = f"{index:04d}" + "k" * 28
+        environ[f"AZURE_OPENAI_NAME_{index}"] = f"aoai-{region}-{index:04d}"
+        environ[f"AZURE_OPENAI_PRIORITY_{index}"] = str(index % 3)
+        environ[f"AZURE_OPENAI_WEIGHT_{index}"] = str(1 + index % 5)
+    for index in range(consumers):
+        environ[f"GATEWAY_CLIENT_NAME_{index}"] = f"client-{index:05d}"
+        environ[f"GATEWAY_CLIENT_KEY_{index}"] = f"{index:05d}" + "c" * 27
+    return environ
+
+
+def _context(environ: dict[str, str]) -> dict[str, Any]:
+    context = build_context(environ)
+    _group(context, environ)
+    return context
+
+
+def _group(context: dict[str, Any], environ: dict[str, str]) -> None:
+    for group in GROUPS:
+        apply_grouping_strategy(context, **group, environ=environ)
+
+
+def _compile() -> None:
+    """Compile the entry template and every template it can include."""
+    engine._template_environment.cache_clear()
+    environment = engine.load_template(TEMPLATE).environment
+    for name in environment.list_templates(extensions=["j2"]):
+        environment.get_template(name)
+
+
+def _cold_render(config: RenderConfig, environ: dict[str, str]) -> list[Path]:
+    """Mirror a replica start: fresh template cache, context, grouping, write."""
+    engine._template_environment.cache_clear()
+    return engine.render_all(config, _context(environ))
+
+
+def _timed(func: Callable[[], Any], repeat: int) -> tuple[dict[str, float], Any]:
+    samples: list[float] = []
+    result: Any = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }, result
+
+
+def _peak_memory(environ: dict[str, str], dest_root: Path) -> int:
+    """Peak traced allocation (bytes) for one cold end-to-end render."""
+    config = RenderConfig(
+        tasks=[RenderTask(TEMPLATE, Path("apisix.yaml"))], dest_root=dest_root
+    )
+    tracemalloc.start()
+    try:
+        _cold_render(config, environ)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_scenario(backends: int, consumers: int, repeat: int) -> dict[str, Any]:
+    """Benchmark one (backends, consumers) combination."""
+    environ = synthetic_environ(backends, consumers)
+
+    context_timing, context = _timed(lambda: build_context(environ), repeat)
+    grouping_timing, _ = _timed(lambda: _group(dict(context), environ), repeat)
+    _group(context, environ)
+    compile_timing, _ = _timed(_compile, repeat)
+    template = engine.load_template(TEMPLATE)
+    render_timing, rendered = _timed(lambda: template.render(**context), repeat)
+
+    with tempfile.TemporaryDirectory(prefix="hydrenv-bench-") as tmp:
+        dest_root = Path(tmp)
+        config = RenderConfig(
+            tasks=[RenderTask(TEMPLATE, Path("apisix.yaml"))], dest_root=dest_root
+        )
+        write_timing, _ = _timed(lambda: engine.render_all(config, context), repeat)
+        total_timing, _ = _timed(lambda: _cold_render(config, environ), repeat)
+        peak_bytes = _peak_memory(environ, dest_root)
+
+    return {
+        "backends": backends,
+        "consumers": consumers,
+        "env_vars": len(environ),
+        "output_bytes": len(rendered.encode("utf-8")),
+        "phases": {
+            "build_context": context_timing,
+            "grouping": grouping_timing,
+            "compile": compile_timing,
+            "render": render_timing,
+            "render_and_write": write_timing,
+            "end_to_end": total_timing,
+        },
+        "peak_memory_bytes": peak_bytes,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _int_list(value: str) -> list[int]:
+    try:
+        items = [int(item) for item in value.split(",") if item.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            f"Expected comma-separated integers: {value}"
+        ) from exc
+    if not items or any(item < 0 for item in items):
+        raise argparse.ArgumentTypeError(f"Expected non-negative integers: {value}")
+    return items
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", type=_int_list, default=list(DEFAULT_BACKENDS))
+    parser.add_argument("--consumers", type=_int_list, default=list(DEFAULT_CONSUMERS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--output", type=Path, help="Write the JSON report here instead of stdout"
+    )
+    args = parser.parse_args(argv)
+
+    scenarios = []
+    for backends in args.backends:
+        for consumers in args.consumers:
+            result = run_scenario(backends, consumers, max(1, args.repeat))
+            scenarios.append(result)
+            print(
+                f"backends={backends:>4} consumers={consumers:>6}: "
+                f"end-to-end {result['phases']['end_to_end']['median_ms']:.1f} ms, "
+                f"peak {result['peak_memory_bytes'] / (1024 * 1024):.1f} MiB",
+                file=sys.stderr,
+            )
+
+    report = {
+        "benchmark": "hydrenv.render_scale",
+        "template": str(TEMPLATE.relative_to(REPO_ROOT)),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": max(1, args.repeat),
+        "scenarios": scenarios,
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""Startup import-time benchmark for the hydrenv CLI.
+
+Runs ``python -X importtime -c "import hydrenv.cli.app"`` several times, subtracts
+modules the interpreter loads on its own, and fails when the median import cost
+exceeds the budget or when a module that must stay lazy shows up.
+
+Usage:
+    python hydrenv/benchmarks/startup_importtime.py [--runs N] [--budget-ms MS] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+HYDRENV_ROOT = Path(__file__).resolve().parents[1]
+TARGET_MODULE = "hydrenv.cli.app"
+# Medians measured at 130-170 ms (down from ~320 ms before the lazy imports);
+# typer and jinja2 account for most of it and are needed by every render.
+DEFAULT_BUDGET_MS = float(os.environ.get("HYDRENV_IMPORT_BUDGET_MS", "200"))
+
+# Modules that must not be imported by a plain render invocation.
+LAZY_MODULES = (
+    "hydrenv.environment.keyvault",
+    "pydantic",
+    "rich",
+    "asyncio",
+)
+
+
+def _importtime(statement: str) -> list[tuple[str, int, int]]:
+    """Return (raw module column, self_us, cumulative_us) rows; indentation encodes nesting."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(HYDRENV_ROOT), env.get("PYTHONPATH", "")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    rows: list[tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = int(head.split(":", 1)[1])
+        rows.append((name.rstrip(), self_us, int(cumulative_us)))
+    return rows
+
+
+def _measure(baseline: set[str]) -> tuple[float, list[tuple[str, int]], set[str]]:
+    rows = _importtime(f"import {TARGET_MODULE}")
+    total_us = 0
+    imported: set[str] = set()
+    self_times: list[tuple[str, int]] = []
+    for raw_name, self_us, cumulative_us in rows:
+        name = raw_name.strip()
+        imported.add(name)
+        if name in baseline:
+            continue
+        self_times.append((name, self_us))
+        # Top-level rows are indented by exactly one space after the separator.
+        if len(raw_name) - len(raw_name.lstrip()) == 1:
+            total_us += cumulative_us
+    return total_us / 1000.0, self_times, imported
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Emit a JSON report")
+    args = parser.parse_args(argv)
+
+    baseline = {name.strip() for name, _, _ in _importtime("pass")}
+
+    # Warm-up run populates __pycache__ so every measured run is comparable.
+    _measure(baseline)
+
+    totals: list[float] = []
+    heaviest: dict[str, int] = {}
+    imported: set[str] = set()
+    for _ in range(max(1, args.runs)):
+        total_ms, self_times, run_imported = _measure(baseline)
+        totals.append(total_ms)
+        imported |= run_imported
+        for name, self_us in self_times:
+            heaviest[name] = min(self_us, heaviest.get(name, self_us))
+
+    median_ms = statistics.median(totals)
+    eager = sorted(
+        module
+        for module in LAZY_MODULES
+        if module in imported or any(name.startswith(f"{module}.") for name in imported)
+    )
+    top = sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[: args.top]
+    ok = median_ms <= args.budget_ms and not eager
+
+    report = {
+        "module": TARGET_MODULE,
+        "python": sys.version.split()[0],
+        "runs": len(totals),
+        "median_ms": round(median_ms, 2),
+        "min_ms": round(min(totals), 2),
+        "max_ms": round(max(totals), 2),
+        "budget_ms": args.budget_ms,
+        "eager_lazy_modules": eager,
+        "top_self_us": dict(top),
+        "ok": ok,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"{TARGET_MODULE}: median {median_ms:.1f} ms "
+            f"(min {min(totals):.1f}, max {max(totals):.1f}) over {len(totals)} run(s); "
+            f"budget {args.budget_ms:.0f} ms"
+        )
+        for name, self_us in top:
+            print(f"  {self_us / 1000.0:8.2f} ms  {name}")
+        if eager:
+            print(
+                f"FAIL: modules expected to load lazily were imported: {', '.join(eager)}"
+            )
+        if median_ms > args.budget_ms:
+            print(
+                f"FAIL: import time {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms"
+            )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,25 @@
 """Hydrenv - Environment-driven template renderer.
 
-A functional, Pydantic-based template renderer following Python best practices.
+A functional template renderer following Python best practices.
 """
 
+from __future__ import annotations
+
 __version__ = "0.1.0"
 
 # Configure logging for library use
 import logging
+from typing import Any
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 
-# Re-export main CLI entry point
-from .cli import main
-
 __all__ = ["main"]
+
+
+def __getattr__(name: str) -> Any:
+    # Re-export the CLI entry point lazily so `import hydrenv` stays cheap.
+    if name == "main":
+        from .cli.app import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
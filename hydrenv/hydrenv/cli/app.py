@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
+from typing import Any, Mapping
 
 import typer
 from typing_extensions import Annotated
@@ -12,7 +13,12 @@ from ..core.models import RenderConfig, RenderTask
 from ..environment import processor, grouping
 from ..environment.grouping import GroupingValidationError
 from ..rendering import engine
-from .parsers import parse_file_mode, parse_group_config, parse_render
+from .parsers import (
+    parse_batch_manifest,
+    parse_file_mode,
+    parse_group_config,
+    parse_render,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +31,13 @@ app = typer.Typer(
 @app.command()
 def render(
     renders: Annotated[
-        list[str],
+        list[str] | None,
         typer.Option(
             "--render",
             help="Render TEMPLATE to OUTPUT (format: TEMPLATE=OUTPUT). Repeatable.",
             metavar="TEMPLATE=OUTPUT",
         ),
-    ],
+    ] = None,
     dest_root: Annotated[
         str,
         typer.Option(
@@ -49,21 +55,21 @@ def render(
         ),
     ] = "0644",
     indexed_groups: Annotated[
-        list[str],
+        list[str] | None,
         typer.Option(
             "--indexed",
             help='Indexed grouping: collects PREFIX_KEY_N variables (gaps allowed). JSON format: {"prefix":"PREFIX_","required_keys":[...],"optional_keys":[...]}. Repeatable.',
             metavar="JSON",
         ),
-    ] = [],
+    ] = None,
     sequential_groups: Annotated[
-        list[str],
+        list[str] | None,
         typer.Option(
             "--sequential",
             help='Sequential grouping: collects PREFIX_KEY_0, PREFIX_KEY_1... until required key missing (no gaps). JSON format: {"prefix":"PREFIX_","required_keys":[...],"optional_keys":[...]}. Repeatable.',
             metavar="JSON",
         ),
-    ] = [],
+    ] = None,
     enable_key_vault: Annotated[
         bool,
         typer.Option(
@@ -71,6 +77,54 @@ def render(
             help="Enable Key Vault context variables for template rendering.",
         ),
     ] = False,
+    key_vault_secrets: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--key-vault-secret",
+            help="Resolve a Key Vault secret by name into key_vault_secrets (requires --enable-key-vault). Repeatable.",
+            metavar="NAME",
+        ),
+    ] = None,
+    secret_cache: Annotated[
+        str,
+        typer.Option(
+            "--secret-cache",
+            help="Cache file for resolved secrets, written with mode 0600 (default: no cache).",
+            metavar="PATH",
+        ),
+    ] = "",
+    secret_cache_ttl: Annotated[
+        int,
+        typer.Option(
+            "--secret-cache-ttl",
+            help="Maximum age of cached secrets in seconds (default: 3600).",
+            metavar="SECONDS",
+        ),
+    ] = 3600,
+    secret_concurrency: Annotated[
+        int,
+        typer.Option(
+            "--secret-concurrency",
+            help="Maximum concurrent Key Vault secret requests (default: 8).",
+            metavar="N",
+        ),
+    ] = 8,
+    batch_manifest: Annotated[
+        str,
+        typer.Option(
+            "--batch",
+            help="Render every target in a JSON manifest (per-target env overlay and dest root) in one process.",
+            metavar="MANIFEST",
+        ),
+    ] = "",
+    batch_workers: Annotated[
+        int,
+        typer.Option(
+            "--batch-workers",
+            help="Maximum batch targets rendered in parallel (default: 1).",
+            metavar="N",
+        ),
+    ] = 1,
     verbose: Annotated[
         bool,
         typer.Option(
@@ -89,21 +143,27 @@ def render(
 
     logger.debug("Starting hydrenv")
 
+    renders = renders or []
+    indexed_groups = indexed_groups or []
+    sequential_groups = sequential_groups or []
+    key_vault_secrets = key_vault_secrets or []
+
     # Parse configuration
+    if not renders and not batch_manifest:
+        raise typer.BadParameter("Provide at least one --render (or --batch MANIFEST)")
     render_tasks = [
         RenderTask(template_path=Path(tpl), output_path=out)
         for tpl, out in map(parse_render, renders)
     ]
     mode = parse_file_mode(file_mode)
     dest_path = Path(dest_root) if dest_root else Path.cwd()
-
-    config = RenderConfig(
-        tasks=render_tasks,
-        dest_root=dest_path,
-        file_mode=mode,
-    )
-
-    logger.debug(f"Config: {len(config.tasks)} task(s)")
+    group_configs = [
+        ("indexed", parse_group_config(group_config_json, "indexed"))
+        for group_config_json in indexed_groups
+    ] + [
+        ("sequential", parse_group_config(group_config_json, "sequential"))
+        for group_config_json in sequential_groups
+    ]
 
     # Build context
     context = processor.build_context()
@@ -114,46 +174,82 @@ def render(
 
         context = keyvault.enhance_context_with_key_vault(context)
         logger.debug("Key Vault context enhancement enabled")
+
+        if key_vault_secrets:
+            try:
+                context = keyvault.resolve_key_vault_secrets(
+                    context,
+                    key_vault_secrets,
+                    cache_path=Path(secret_cache) if secret_cache else None,
+                    cache_ttl_seconds=secret_cache_ttl,
+                    max_concurrency=secret_concurrency,
+                )
+            except keyvault.KeyVaultSecretError as exc:
+                logger.error(str(exc))
+                raise typer.Exit(code=1) from exc
     else:
+        if key_vault_secrets:
+            raise typer.BadParameter("--key-vault-secret requires --enable-key-vault")
         logger.debug("Key Vault context enhancement disabled")
 
-    # Apply indexed grouping strategies
-    for group_config_json in indexed_groups:
-        group_config = parse_group_config(group_config_json, "indexed")
-        try:
-            grouping.apply_grouping_strategy(
-                context,
-                "indexed",
-                group_config["prefix"],
-                group_config["required_keys"],
-                group_config.get("optional_keys"),
-                group_config.get("require_when_env"),
+    if batch_manifest:
+        # Batch mode: the base context is built once and each target only
+        # normalizes its overlay; compiled templates are shared across targets.
+        targets = parse_batch_manifest(Path(batch_manifest), render_tasks, mode)
+        jobs = []
+        for target in targets:
+            target_context = processor.overlay_context(context, target.env)
+            _apply_groups(
+                target_context, group_configs, target_context["env"], target.name
             )
-        except GroupingValidationError as exc:
-            logger.error(str(exc))
-            raise typer.Exit(code=1) from exc
+            jobs.append((target, target_context))
+
+        results = engine.render_batch(jobs, max_workers=batch_workers)
+        logger.debug(
+            f"Completed: {sum(map(len, results.values()))} file(s) rendered "
+            f"for {len(results)} target(s)"
+        )
+        return
 
-    # Apply sequential grouping strategies
-    for group_config_json in sequential_groups:
-        group_config = parse_group_config(group_config_json, "sequential")
+    config = RenderConfig(
+        tasks=render_tasks,
+        dest_root=dest_path,
+        file_mode=mode,
+    )
+
+    logger.debug(f"Config: {len(config.tasks)} task(s)")
+
+    _apply_groups(context, group_configs)
+
+    # Render templates
+    outputs = engine.render_all(config, context)
+
+    logger.debug(f"Completed: {len(outputs)} file(s) rendered")
+
+
+def _apply_groups(
+    context: dict[str, Any],
+    group_configs: list[tuple[str, dict]],
+    environ: Mapping[str, str] | None = None,
+    target_name: str | None = None,
+) -> None:
+    """Apply indexed/sequential grouping strategies, exiting on validation errors."""
+    for strategy_name, group_config in group_configs:
         try:
             grouping.apply_grouping_strategy(
                 context,
-                "sequential",
+                strategy_name,
                 group_config["prefix"],
                 group_config["required_keys"],
                 group_config.get("optional_keys"),
                 group_config.get("require_when_env"),
+                environ,
             )
         except GroupingValidationError as exc:
-            logger.error(str(exc))
+            prefix = f"[{target_name}] " if target_name else ""
+            logger.error(f"{prefix}{exc}")
             raise typer.Exit(code=1) from exc
 
-    # Render templates
-    outputs = engine.render_all(config, context)
-
-    logger.debug(f"Completed: {len(outputs)} file(s) rendered")
-
 
 def main() -> None:
     """Entry point for the CLI."""
@@ -7,6 +7,8 @@ from pathlib import Path
 
 import typer
 
+from ..core.models import RenderConfig, RenderTarget, RenderTask
+
 
 def parse_render(value: str) -> tuple[str, Path]:
     """Parse a render argument in format TEMPLATE=OUTPUT."""
@@ -42,3 +44,87 @@ def parse_group_config(value: str, strategy_name: str) -> dict:
             raise typer.BadParameter(f"Missing required field: {field}")
 
     return data
+
+
+def parse_batch_manifest(
+    path: Path, shared_tasks: list[RenderTask], file_mode: int
+) -> list[RenderTarget]:
+    """Parse a JSON batch manifest into render targets.
+
+    Manifest format::
+
+        {
+          "renders": ["TEMPLATE=OUTPUT", ...],          # optional, shared
+          "targets": [
+            {"name": "eus-tenant-a", "dest_root": "/out/eus-a",
+             "env": {"AZURE_OPENAI_ENDPOINT_0": "..."},  # optional overlay
+             "renders": ["TEMPLATE=OUTPUT", ...]}        # optional, extra
+          ]
+        }
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except OSError as e:
+        raise typer.BadParameter(f"Cannot read batch manifest {path}: {e}") from e
+    except json.JSONDecodeError as e:
+        raise typer.BadParameter(f"Invalid JSON in batch manifest {path}: {e}") from e
+
+    entries = data.get("targets") if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise typer.BadParameter(
+            "Batch manifest must define a non-empty 'targets' list"
+        )
+
+    shared = shared_tasks + _parse_manifest_renders(data.get("renders", []), "manifest")
+
+    targets: list[RenderTarget] = []
+    seen: set[str] = set()
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise typer.BadParameter(f"Batch target #{position} must be an object")
+
+        name = entry.get("name")
+        if not isinstance(name, str) or not name:
+            raise typer.BadParameter(f"Batch target #{position} is missing 'name'")
+        if name in seen:
+            raise typer.BadParameter(f"Duplicate batch target name: {name!r}")
+        seen.add(name)
+
+        dest_root = entry.get("dest_root")
+        if not isinstance(dest_root, str) or not dest_root:
+            raise typer.BadParameter(f"Batch target {name!r} is missing 'dest_root'")
+
+        env = entry.get("env", {})
+        if not isinstance(env, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in env.items()
+        ):
+            raise typer.BadParameter(
+                f"Batch target {name!r}: 'env' must map names to string values"
+            )
+
+        tasks = shared + _parse_manifest_renders(entry.get("renders", []), name)
+        if not tasks:
+            raise typer.BadParameter(
+                f"Batch target {name!r} has nothing to render; add --render or 'renders'"
+            )
+
+        targets.append(
+            RenderTarget(
+                name=name,
+                config=RenderConfig(
+                    tasks=tasks, dest_root=Path(dest_root), file_mode=file_mode
+                ),
+                env=env,
+            )
+        )
+
+    return targets
+
+
+def _parse_manifest_renders(values: object, owner: str) -> list[RenderTask]:
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise typer.BadParameter(f"'renders' for {owner} must be a list of strings")
+    return [
+        RenderTask(template_path=Path(tpl), output_path=out)
+        for tpl, out in map(parse_render, values)
+    ]
@@ -1,5 +1,5 @@
 """Core domain models and configuration."""
 
-from .models import RenderConfig, RenderTask
+from .models import RenderConfig, RenderTarget, RenderTask
 
-__all__ = ["RenderConfig", "RenderTask"]
+__all__ = ["RenderConfig", "RenderTarget", "RenderTask"]
@@ -1,24 +1,45 @@
-"""Domain models for template rendering configuration and context."""
+"""Domain models for template rendering configuration and context.
+
+Plain dataclasses keep pydantic off the CLI import path; the validation the
+renderer relies on (path coercion, at least one task) lives in ``__post_init__``.
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from pydantic import BaseModel, Field
-
 
-class RenderTask(BaseModel):
+@dataclass(frozen=True)
+class RenderTask:
     """A single template rendering task."""
 
-    template_path: Path = Field(..., description="Template file path")
-    output_path: Path = Field(..., description="Output file path")
+    template_path: Path
+    output_path: Path
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "template_path", Path(self.template_path))
+        object.__setattr__(self, "output_path", Path(self.output_path))
 
-class RenderConfig(BaseModel):
+
+@dataclass(frozen=True)
+class RenderConfig:
     """Configuration for the rendering process."""
 
-    tasks: list[RenderTask] = Field(..., min_length=1, description="Render tasks")
-    dest_root: Path = Field(
-        default_factory=Path.cwd, description="Base output directory"
-    )
-    file_mode: int = Field(default=0o644, description="File permissions (octal)")
+    tasks: list[RenderTask]
+    dest_root: Path = field(default_factory=Path.cwd)
+    file_mode: int = 0o644
+
+    def __post_init__(self) -> None:
+        if len(self.tasks) < 1:
+            raise ValueError("RenderConfig requires at least one render task")
+        object.__setattr__(self, "dest_root", Path(self.dest_root))
+
+
+@dataclass(frozen=True)
+class RenderTarget:
+    """One batch target: an environment overlay rendered into its own root."""
+
+    name: str
+    config: RenderConfig
+    env: dict[str, str] = field(default_factory=dict)
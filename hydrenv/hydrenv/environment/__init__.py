@@ -1,5 +1,16 @@
 """Environment variable processing package."""
 
-from . import grouping, processor
+from __future__ import annotations
 
-__all__ = ["grouping", "processor"]
+import importlib
+from typing import Any
+
+__all__ = ["grouping", "keyvault", "processor", "resources"]
+
+
+def __getattr__(name: str) -> Any:
+    # Submodules load on first access; keyvault in particular pulls in
+    # asyncio/urllib and is only needed with --enable-key-vault.
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
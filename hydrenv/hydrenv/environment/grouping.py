@@ -5,7 +5,7 @@ from __future__ import annotations
 import logging
 import os
 import re
-from typing import Any, Iterable
+from typing import Any, Iterable, Mapping
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +14,15 @@ class GroupingValidationError(ValueError):
     """Raised when grouped environment variables fail validation."""
 
 
-def _collect_index_map(prefix: str, keys: Iterable[str]) -> dict[int, set[str]]:
+def _collect_index_map(
+    prefix: str, keys: Iterable[str], environ: Mapping[str, str] | None = None
+) -> dict[int, set[str]]:
     """Collect indices that have any of the provided keys.
 
     Args:
         prefix: Variable prefix (e.g., "AZURE_OPENAI_")
         keys: Allowed key names for the grouping
+        environ: Environment mapping (default: os.environ)
 
     Returns:
         Mapping of index to set of key names present for that index.
@@ -28,7 +31,7 @@ def _collect_index_map(prefix: str, keys: Iterable[str]) -> dict[int, set[str]]:
     pattern = re.compile(rf"^{re.escape(prefix)}({key_pattern})_(\d+)$")
 
     indices: dict[int, set[str]] = {}
-    for env_key in os.environ:
+    for env_key in os.environ if environ is None else environ:
         match = pattern.match(env_key)
         if not match:
             continue
@@ -39,10 +42,10 @@ def _collect_index_map(prefix: str, keys: Iterable[str]) -> dict[int, set[str]]:
     return dict(sorted(indices.items()))
 
 
-def _is_truthy_env_var(env_var: str) -> bool:
+def _is_truthy_env_var(env_var: str, environ: Mapping[str, str] | None = None) -> bool:
     """Return True when the environment variable value is truthy."""
 
-    value = os.environ.get(env_var)
+    value = (os.environ if environ is None else environ).get(env_var)
     if value is None:
         return False
     value_lower = value.strip().lower()
@@ -50,7 +53,10 @@ def _is_truthy_env_var(env_var: str) -> bool:
 
 
 def collect_indexed_groups(
-    prefix: str, required_keys: list[str], optional_keys: list[str] | None = None
+    prefix: str,
+    required_keys: list[str],
+    optional_keys: list[str] | None = None,
+    environ: Mapping[str, str] | None = None,
 ) -> dict[int, dict[str, str]]:
     """Collect environment variables grouped by numeric suffix.
 
@@ -60,6 +66,7 @@ def collect_indexed_groups(
         prefix: Variable prefix (e.g., "AZURE_OPENAI_")
         required_keys: Keys that must be present in each group
         optional_keys: Keys collected if present
+        environ: Environment mapping (default: os.environ)
 
     Returns:
         Dictionary mapping index to variable groups
@@ -69,7 +76,7 @@ def collect_indexed_groups(
     key_pattern = "|".join(map(re.escape, allowed_keys))
     pattern = re.compile(rf"^{re.escape(prefix)}({key_pattern})_(\d+)$")
 
-    for env_key, env_value in os.environ.items():
+    for env_key, env_value in (os.environ if environ is None else environ).items():
         match = pattern.match(env_key)
         if not match:
             continue
@@ -81,7 +88,10 @@ def collect_indexed_groups(
 
 
 def collect_sequential_groups(
-    prefix: str, required_keys: list[str], optional_keys: list[str] | None = None
+    prefix: str,
+    required_keys: list[str],
+    optional_keys: list[str] | None = None,
+    environ: Mapping[str, str] | None = None,
 ) -> dict[int, dict[str, str]]:
     """Collect environment variables sequentially until required keys are missing.
 
@@ -89,10 +99,12 @@ def collect_sequential_groups(
         prefix: Variable prefix (e.g., "GATEWAY_CLIENT_")
         required_keys: Keys that must be present to continue
         optional_keys: Keys to collect if present (optional)
+        environ: Environment mapping (default: os.environ)
 
     Returns:
         Dictionary mapping index to variable groups
     """
+    source = os.environ if environ is None else environ
     groups: dict[int, dict[str, str]] = {}
     index = 0
     all_keys = required_keys + (optional_keys or [])
@@ -102,7 +114,7 @@ def collect_sequential_groups(
 
         for key in all_keys:
             env_var = f"{prefix}{key}_{index}"
-            value = os.environ.get(env_var)
+            value = source.get(env_var)
 
             if value is not None:
                 group[key] = value
@@ -135,12 +147,15 @@ def _validate_indexed_groups(
 
 
 def _validate_sequential_groups(
-    prefix: str, required_keys: list[str], optional_keys: list[str] | None = None
+    prefix: str,
+    required_keys: list[str],
+    optional_keys: list[str] | None = None,
+    environ: Mapping[str, str] | None = None,
 ) -> None:
     """Validate contiguity and required keys for sequential groups."""
 
     all_keys = required_keys + (optional_keys or [])
-    index_map = _collect_index_map(prefix, all_keys) if all_keys else {}
+    index_map = _collect_index_map(prefix, all_keys, environ) if all_keys else {}
 
     if not index_map:
         return
@@ -170,14 +185,17 @@ def _validate_sequential_groups(
 
 
 def _enforce_required_groups(
-    groups: dict[int, dict[str, str]], prefix: str, require_when_env: str | None
+    groups: dict[int, dict[str, str]],
+    prefix: str,
+    require_when_env: str | None,
+    environ: Mapping[str, str] | None = None,
 ) -> None:
     """Optionally require at least one group when a controlling env var is truthy."""
 
     if not require_when_env:
         return
 
-    if _is_truthy_env_var(require_when_env) and not groups:
+    if _is_truthy_env_var(require_when_env, environ) and not groups:
         raise GroupingValidationError(
             f"Group '{prefix}' requires at least one entry because {require_when_env}=true. "
             f"Set {prefix}* variables or unset {require_when_env}."
@@ -191,6 +209,7 @@ def apply_grouping_strategy(
     required_keys: list[str],
     optional_keys: list[str] | None = None,
     require_when_env: str | None = None,
+    environ: Mapping[str, str] | None = None,
 ) -> None:
     """Apply a custom grouping strategy and add results to context.
 
@@ -201,19 +220,22 @@ def apply_grouping_strategy(
         required_keys: Required keys in each group
         optional_keys: Optional keys to collect if present
         require_when_env: Env var name that, when truthy, requires at least one group
+        environ: Environment mapping (default: os.environ)
     """
     logger.debug(f"Applying {strategy_name} strategy for prefix: {prefix}")
 
     if strategy_name == "indexed":
-        groups = collect_indexed_groups(prefix, required_keys, optional_keys)
+        groups = collect_indexed_groups(prefix, required_keys, optional_keys, environ)
         _validate_indexed_groups(groups, prefix, required_keys)
     elif strategy_name == "sequential":
-        _validate_sequential_groups(prefix, required_keys, optional_keys)
-        groups = collect_sequential_groups(prefix, required_keys, optional_keys)
+        _validate_sequential_groups(prefix, required_keys, optional_keys, environ)
+        groups = collect_sequential_groups(
+            prefix, required_keys, optional_keys, environ
+        )
     else:
         raise ValueError(f"Unknown strategy: {strategy_name}")
 
-    _enforce_required_groups(groups, prefix, require_when_env)
+    _enforce_required_groups(groups, prefix, require_when_env, environ)
 
     # Always add the key to context, even if empty
     key = f"{prefix.lower().rstrip('_')}_groups"
@@ -2,12 +2,182 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import os
-from typing import Any
+import re
+import stat
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Iterable, Protocol
+
+from ..rendering.io import atomic_write_text
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SECRET_CACHE_TTL_SECONDS = 3600
+DEFAULT_SECRET_CONCURRENCY = 8
+
+_KEY_VAULT_RESOURCE = "https://vault.azure.net"
+_KEY_VAULT_API_VERSION = "7.4"
+_DEFAULT_MSI_ENDPOINT = "http://169.254.169.254/metadata/identity/oauth2/token"
+_SECRET_NAME_PATTERN = re.compile(r"^[0-9A-Za-z-]{1,127}$")
+
+
+class KeyVaultSecretError(RuntimeError):
+    """Raised when Key Vault secrets cannot be resolved."""
+
+
+class SecretClient(Protocol):
+    """Minimal interface for fetching a single secret value by name."""
+
+    def get_secret(self, name: str) -> str: ...
+
+
+class ManagedIdentitySecretClient:
+    """Fetch secrets from the Key Vault REST API with a managed identity token.
+
+    Uses the Container Apps identity endpoint (IDENTITY_ENDPOINT/IDENTITY_HEADER)
+    when present and falls back to IMDS, mirroring the gateway's Lua MSI helper.
+    """
+
+    def __init__(
+        self, vault_uri: str, *, client_id: str | None = None, timeout: float = 5.0
+    ) -> None:
+        self.vault_uri = vault_uri.rstrip("/")
+        self.client_id = client_id
+        self.timeout = timeout
+        self._token: str | None = None
+        self._token_exp = 0.0
+        self._lock = threading.Lock()
+
+    def _access_token(self) -> str:
+        with self._lock:
+            if self._token and self._token_exp - time.time() > 60:
+                return self._token
+
+            endpoint = os.environ.get("IDENTITY_ENDPOINT")
+            identity_header = os.environ.get("IDENTITY_HEADER")
+            if endpoint and identity_header:
+                query = {"resource": _KEY_VAULT_RESOURCE, "api-version": "2019-08-01"}
+                headers = {"X-IDENTITY-HEADER": identity_header}
+            else:
+                endpoint = _DEFAULT_MSI_ENDPOINT
+                query = {"resource": _KEY_VAULT_RESOURCE, "api-version": "2018-02-01"}
+                headers = {"Metadata": "true"}
+            if self.client_id:
+                query["client_id"] = self.client_id
+
+            request = urllib.request.Request(
+                f"{endpoint}?{urllib.parse.urlencode(query)}", headers=headers
+            )
+            body = self._read_json(request, "managed identity token")
+            token = body.get("access_token")
+            if not isinstance(token, str) or token == "":
+                raise KeyVaultSecretError(
+                    "Managed identity response has no access_token"
+                )
+
+            now = time.time()
+            expires_on = body.get("expires_on")
+            expires_in = body.get("expires_in")
+            if expires_on is not None and str(expires_on).isdigit():
+                self._token_exp = float(expires_on)
+            elif expires_in is not None and str(expires_in).isdigit():
+                self._token_exp = now + float(expires_in)
+            else:
+                self._token_exp = now + 600
+            self._token = token
+            return token
+
+    def get_secret(self, name: str) -> str:
+        url = (
+            f"{self.vault_uri}/secrets/{urllib.parse.quote(name)}"
+            f"?api-version={_KEY_VAULT_API_VERSION}"
+        )
+        request = urllib.request.Request(
+            url, headers={"Authorization": f"Bearer {self._access_token()}"}
+        )
+        body = self._read_json(request, f"secret '{name}'")
+        value = body.get("value")
+        if not isinstance(value, str):
+            raise KeyVaultSecretError(f"Key Vault response for '{name}' has no value")
+        return value
+
+    def _read_json(self, request: urllib.request.Request, what: str) -> dict[str, Any]:
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            raise KeyVaultSecretError(
+                f"Failed to fetch {what}: HTTP {exc.code}"
+            ) from exc
+        except (urllib.error.URLError, TimeoutError, ValueError) as exc:
+            raise KeyVaultSecretError(f"Failed to fetch {what}: {exc}") from exc
+
+
+class SecretCache:
+    """TTL-bounded on-disk secret cache readable only by the owning user."""
+
+    def __init__(self, path: Path, *, vault_uri: str, ttl_seconds: int) -> None:
+        self.path = path
+        self.vault_uri = vault_uri
+        self.ttl_seconds = ttl_seconds
+
+    def load(self) -> dict[str, str]:
+        """Return unexpired cached secrets (empty when missing, stale or unsafe)."""
+        if self.ttl_seconds <= 0 or not self.path.exists():
+            return {}
+
+        mode = stat.S_IMODE(self.path.stat().st_mode)
+        if mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logger.warning(
+                f"Ignoring secret cache {self.path}: permissions {oct(mode)} are too open"
+            )
+            return {}
+
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("vault_uri") != self.vault_uri:
+                return {}
+            cutoff = time.time() - self.ttl_seconds
+            return {
+                name: entry["value"]
+                for name, entry in (data.get("secrets") or {}).items()
+                if isinstance(entry, dict)
+                and isinstance(entry.get("value"), str)
+                and float(entry.get("fetched_at", 0)) >= cutoff
+            }
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            logger.warning(f"Ignoring unreadable secret cache {self.path}: {exc}")
+            return {}
+
+    def store(self, fetched: dict[str, str]) -> None:
+        """Merge freshly fetched secrets into the cache file (mode 0600)."""
+        if self.ttl_seconds <= 0 or not fetched:
+            return
+
+        entries: dict[str, Any] = {}
+        if self.path.exists():
+            try:
+                existing = json.loads(self.path.read_text(encoding="utf-8"))
+                if existing.get("vault_uri") == self.vault_uri:
+                    entries = dict(existing.get("secrets") or {})
+            except (OSError, ValueError, TypeError, AttributeError):
+                entries = {}
+
+        now = time.time()
+        for name, value in fetched.items():
+            entries[name] = {"value": value, "fetched_at": now}
+
+        payload = {"vault_uri": self.vault_uri, "secrets": entries}
+        atomic_write_text(self.path, json.dumps(payload), mode=0o600)
+
 
 def enhance_context_with_key_vault(context: dict[str, Any]) -> dict[str, Any]:
     """Enhance rendering context with Key Vault-related variables.
@@ -42,3 +212,109 @@ def enhance_context_with_key_vault(context: dict[str, Any]) -> dict[str, Any]:
     )
 
     return context
+
+
+def _vault_uri_from_context(context: dict[str, Any]) -> str:
+    vault_uri = str(context.get("key_vault_uri") or "").strip()
+    if vault_uri:
+        return vault_uri.rstrip("/")
+    vault_name = str(context.get("key_vault_name") or "").strip()
+    if vault_name:
+        return f"https://{vault_name}.vault.azure.net"
+    raise KeyVaultSecretError(
+        "Key Vault secret resolution requires KEY_VAULT_URI or KEY_VAULT_NAME"
+    )
+
+
+async def _fetch_secrets(
+    client: SecretClient, names: list[str], max_concurrency: int
+) -> dict[str, str]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _fetch(name: str) -> str:
+        async with semaphore:
+            return await asyncio.to_thread(client.get_secret, name)
+
+    results = await asyncio.gather(
+        *(_fetch(name) for name in names), return_exceptions=True
+    )
+
+    fetched: dict[str, str] = {}
+    failures: list[str] = []
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            failures.append(f"{name} ({result})")
+        else:
+            fetched[name] = result
+
+    if failures:
+        raise KeyVaultSecretError(
+            f"Failed to resolve {len(failures)} Key Vault secret(s): "
+            + "; ".join(failures)
+        )
+    return fetched
+
+
+def resolve_key_vault_secrets(
+    context: dict[str, Any],
+    names: Iterable[str],
+    *,
+    client: SecretClient | None = None,
+    cache_path: Path | None = None,
+    cache_ttl_seconds: int = DEFAULT_SECRET_CACHE_TTL_SECONDS,
+    max_concurrency: int = DEFAULT_SECRET_CONCURRENCY,
+) -> dict[str, Any]:
+    """Resolve named Key Vault secrets into ``context["key_vault_secrets"]``.
+
+    Secrets are fetched concurrently (bounded by ``max_concurrency``) and, when
+    ``cache_path`` is set, persisted to a 0600 cache file reused until the TTL
+    expires so restarts skip the round trips.
+
+    Args:
+        context: Rendering context (already enhanced with Key Vault variables)
+        names: Secret names to resolve (Key Vault naming, e.g. "gateway-client-key-0")
+        client: Secret client; defaults to a managed identity REST client
+        cache_path: Optional cache file location
+        cache_ttl_seconds: Maximum age of cached entries (0 disables the cache)
+        max_concurrency: Maximum number of in-flight secret requests
+
+    Returns:
+        Context with the resolved secrets mapping added
+    """
+    secret_names = list(dict.fromkeys(names))
+    invalid = [name for name in secret_names if not _SECRET_NAME_PATTERN.match(name)]
+    if invalid:
+        raise KeyVaultSecretError(f"Invalid Key Vault secret name(s): {invalid}")
+    if max_concurrency < 1:
+        raise KeyVaultSecretError("max_concurrency must be at least 1")
+
+    vault_uri = _vault_uri_from_context(context)
+    cache = (
+        SecretCache(cache_path, vault_uri=vault_uri, ttl_seconds=cache_ttl_seconds)
+        if cache_path is not None
+        else None
+    )
+
+    cached = cache.load() if cache else {}
+    resolved = {name: cached[name] for name in secret_names if name in cached}
+    missing = [name for name in secret_names if name not in resolved]
+
+    if missing:
+        secret_client = client or ManagedIdentitySecretClient(
+            vault_uri,
+            client_id=context.get("aca_managed_identity_client_id")
+            or context.get("azure_client_id"),
+        )
+        fetched = asyncio.run(_fetch_secrets(secret_client, missing, max_concurrency))
+        resolved.update(fetched)
+        if cache:
+            cache.store(fetched)
+
+    context["key_vault_secrets"] = {name: resolved[name] for name in secret_names}
+
+    logger.debug(
+        f"Resolved {len(secret_names)} Key Vault secret(s) "
+        f"({len(secret_names) - len(missing)} from cache, {len(missing)} fetched)"
+    )
+
+    return context
@@ -5,7 +5,9 @@ from __future__ import annotations
 import logging
 import os
 import re
-from typing import Any
+from typing import Any, Mapping
+
+from .resources import gateway_tuning_context
 
 logger = logging.getLogger(__name__)
 
@@ -51,53 +53,94 @@ def coerce_value(value: str) -> bool | int | float | str:
     return value
 
 
-def normalize_env() -> dict[str, Any]:
+def _derived_values(environ: Mapping[str, str]) -> dict[str, Any]:
+    """Compute context values derived from specific environment variables."""
+    log_mode_raw = environ.get("GATEWAY_LOG_MODE", "prod")
+    log_mode = log_mode_raw.strip().lower()
+    return {
+        "ip_whitelist_parsed": parse_csv_list("IP_WHITELIST", environ),
+        "ip_blacklist_parsed": parse_csv_list("IP_BLACKLIST", environ),
+        "gateway_e2e_test_mode": _parse_bool(
+            environ.get("GATEWAY_E2E_TEST_MODE", "false")
+        ),
+        "gateway_log_mode": log_mode or "prod",
+        # Worker/connection sizing derived from the container's CPU and memory
+        **gateway_tuning_context(environ),
+    }
+
+
+def normalize_env(environ: Mapping[str, str] | None = None) -> dict[str, Any]:
     """Normalize environment variables with lowercase keys and type coercion.
 
+    Args:
+        environ: Environment mapping (default: os.environ)
+
     Returns:
         Dictionary with normalized keys and coerced values
     """
-    normalized: dict[str, Any] = {
-        k.lower(): coerce_value(v) for k, v in os.environ.items()
-    }
+    source = os.environ if environ is None else environ
+    normalized: dict[str, Any] = {k.lower(): coerce_value(v) for k, v in source.items()}
 
     # Add parsed list values
-    normalized["ip_whitelist_parsed"] = parse_csv_list("IP_WHITELIST")
-    normalized["ip_blacklist_parsed"] = parse_csv_list("IP_BLACKLIST")
-    normalized["gateway_e2e_test_mode"] = _parse_bool(
-        os.environ.get("GATEWAY_E2E_TEST_MODE", "false")
-    )
-    log_mode_raw = os.environ.get("GATEWAY_LOG_MODE", "prod")
-    log_mode = log_mode_raw.strip().lower()
-    normalized["gateway_log_mode"] = log_mode or "prod"
+    normalized.update(_derived_values(source))
 
     return normalized
 
 
-def parse_csv_list(env_var_name: str) -> list[str]:
+def parse_csv_list(
+    env_var_name: str, environ: Mapping[str, str] | None = None
+) -> list[str]:
     """Parse a comma-separated list from an environment variable.
 
     Args:
         env_var_name: Name of the environment variable
+        environ: Environment mapping (default: os.environ)
 
     Returns:
         List of stripped items
     """
-    raw = os.environ.get(env_var_name, "")
+    raw = (os.environ if environ is None else environ).get(env_var_name, "")
     if not raw.strip():
         return []
     return [item.strip() for item in raw.split(",") if item.strip()]
 
 
-def build_context() -> dict[str, Any]:
+def build_context(environ: Mapping[str, str] | None = None) -> dict[str, Any]:
     """Build the base rendering context from environment variables.
 
+    Args:
+        environ: Environment mapping (default: os.environ)
+
     Returns:
         Context dictionary for template rendering (env vars only)
     """
     logger.debug("Building base rendering context from environment")
 
-    context: dict[str, Any] = {"env": dict(os.environ)}
-    context.update(normalize_env())
+    source = os.environ if environ is None else environ
+    context: dict[str, Any] = {"env": dict(source)}
+    context.update(normalize_env(source))
+
+    return context
+
+
+def overlay_context(
+    base_context: dict[str, Any], overlay: Mapping[str, str]
+) -> dict[str, Any]:
+    """Derive a target context from a shared base context and an env overlay.
 
+    Only the overlay variables are normalized again, so building N batch
+    targets costs one full environment pass plus N small overlays.
+
+    Args:
+        base_context: Context returned by build_context (left untouched)
+        overlay: Environment variables that override/extend the base env
+
+    Returns:
+        New context dictionary whose ``env`` is the merged environment
+    """
+    merged_env = {**base_context["env"], **overlay}
+    context = dict(base_context)
+    context["env"] = merged_env
+    context.update({k.lower(): coerce_value(v) for k, v in overlay.items()})
+    context.update(_derived_values(merged_env))
     return context
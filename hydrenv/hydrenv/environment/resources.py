@@ -0,0 +1,232 @@
+"""Container resource detection and gateway worker sizing."""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Mapping
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# APISIX defaults (conf/config-default.yaml) used as bounds and base sizes.
+APISIX_DEFAULT_WORKER_CONNECTIONS = 10620
+APISIX_DEFAULT_UPSTREAM_KEEPALIVE = 320
+APISIX_DEFAULT_RLIMIT_NOFILE = 20480
+MIN_WORKER_CONNECTIONS = 1024
+MIN_UPSTREAM_KEEPALIVE = 30
+# Rough per-connection budget (client + upstream sockets and proxy buffers).
+CONNECTIONS_PER_MIB = 32
+
+# Shared dicts sized relative to memory; sizes in MiB at 1 GiB of memory.
+SHARED_DICT_BASE_MIB: dict[str, int] = {
+    "prometheus-metrics": 15,
+    "plugin-limit-req": 10,
+    "plugin-limit-count": 10,
+    "plugin-ai-rate-limiting": 10,
+    "upstream-healthcheck": 10,
+}
+
+_MEMORY_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]i?|[kmgt]i?)?[Bb]?\s*$")
+_MEMORY_UNITS = {
+    "": 1,
+    "k": 1000,
+    "m": 1000**2,
+    "g": 1000**3,
+    "t": 1000**4,
+    "ki": 1024,
+    "mi": 1024**2,
+    "gi": 1024**3,
+    "ti": 1024**4,
+}
+
+
+@dataclass(frozen=True)
+class ContainerResources:
+    """CPU and memory available to the container."""
+
+    cpu_limit: float
+    memory_limit_bytes: int | None
+    source: str
+
+
+def parse_memory(value: str) -> int | None:
+    """Parse a memory quantity ("1Gi", "512Mi", "1073741824") into bytes."""
+    match = _MEMORY_PATTERN.match(value)
+    if not match:
+        return None
+    number, unit = match.groups()
+    return int(float(number) * _MEMORY_UNITS[(unit or "").lower()])
+
+
+def _read_cgroup_file(name: str) -> str | None:
+    try:
+        return (CGROUP_ROOT / name).read_text().strip()
+    except OSError:
+        return None
+
+
+def _host_cpu_count() -> float:
+    try:
+        return float(len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return float(os.cpu_count() or 1)
+
+
+@lru_cache(maxsize=1)
+def detect_container_resources() -> ContainerResources:
+    """Detect CPU quota and memory limit from cgroup v2, falling back to the host.
+
+    Returns:
+        Detected resources; ``memory_limit_bytes`` is None when unlimited
+    """
+    cpu_limit = _host_cpu_count()
+    memory_limit: int | None = None
+    source = "host"
+
+    cpu_max = _read_cgroup_file("cpu.max")
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and quota.isdigit() and period.isdigit() and int(period):
+            cpu_limit = min(cpu_limit, int(quota) / int(period))
+            source = "cgroup"
+
+    memory_max = _read_cgroup_file("memory.max")
+    if memory_max and memory_max.isdigit():
+        memory_limit = int(memory_max)
+        source = "cgroup"
+
+    return ContainerResources(
+        cpu_limit=cpu_limit, memory_limit_bytes=memory_limit, source=source
+    )
+
+
+def _resolve_resources(environ: Mapping[str, str]) -> ContainerResources:
+    """Apply GATEWAY_CPU_LIMIT / GATEWAY_MEMORY_LIMIT overrides to detection.
+
+    hydrenv runs as an init container with its own (smaller) cgroup, so the
+    deployment passes the gateway container's allocation explicitly.
+    """
+    detected = detect_container_resources()
+    cpu_limit = detected.cpu_limit
+    memory_limit = detected.memory_limit_bytes
+    source = detected.source
+
+    cpu_raw = environ.get("GATEWAY_CPU_LIMIT", "").strip()
+    if cpu_raw:
+        try:
+            cpu_limit = float(cpu_raw)
+            source = "env"
+        except ValueError:
+            logger.warning(f"Ignoring invalid GATEWAY_CPU_LIMIT={cpu_raw!r}")
+
+    memory_raw = environ.get("GATEWAY_MEMORY_LIMIT", "").strip()
+    if memory_raw:
+        parsed = parse_memory(memory_raw)
+        if parsed:
+            memory_limit = parsed
+            source = "env"
+        else:
+            logger.warning(f"Ignoring invalid GATEWAY_MEMORY_LIMIT={memory_raw!r}")
+
+    return ContainerResources(
+        cpu_limit=cpu_limit, memory_limit_bytes=memory_limit, source=source
+    )
+
+
+def _int_override(environ: Mapping[str, str], name: str, default: int) -> int:
+    raw = environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={raw!r}; using {default}")
+        return default
+    return max(1, value)
+
+
+def _clamp(value: int, lower: int, upper: int) -> int:
+    return max(lower, min(upper, value))
+
+
+def gateway_tuning_context(environ: Mapping[str, str] | None = None) -> dict[str, Any]:
+    """Compute resource-aware gateway tuning values for templates.
+
+    Computed defaults can be overridden with GATEWAY_WORKER_PROCESSES,
+    GATEWAY_WORKER_CONNECTIONS, GATEWAY_UPSTREAM_KEEPALIVE,
+    GATEWAY_WORKER_RLIMIT_NOFILE and GATEWAY_LUA_SHARED_DICT_<NAME> (e.g.
+    GATEWAY_LUA_SHARED_DICT_PROMETHEUS_METRICS=32m).
+
+    Args:
+        environ: Environment mapping (default: os.environ)
+
+    Returns:
+        Context values describing the container and derived nginx settings
+    """
+    source = os.environ if environ is None else environ
+    resources = _resolve_resources(source)
+
+    worker_processes = _int_override(
+        source, "GATEWAY_WORKER_PROCESSES", max(1, math.ceil(resources.cpu_limit))
+    )
+
+    if resources.memory_limit_bytes:
+        memory_mib = resources.memory_limit_bytes // (1024 * 1024)
+        per_worker_mib = memory_mib // worker_processes
+        default_connections = _clamp(
+            per_worker_mib * CONNECTIONS_PER_MIB,
+            MIN_WORKER_CONNECTIONS,
+            APISIX_DEFAULT_WORKER_CONNECTIONS,
+        )
+        dict_scale = min(4.0, max(0.5, memory_mib / 1024))
+    else:
+        default_connections = APISIX_DEFAULT_WORKER_CONNECTIONS
+        dict_scale = 1.0
+    worker_connections = _int_override(
+        source, "GATEWAY_WORKER_CONNECTIONS", default_connections
+    )
+
+    upstream_keepalive = _int_override(
+        source,
+        "GATEWAY_UPSTREAM_KEEPALIVE",
+        _clamp(
+            worker_connections // 32,
+            MIN_UPSTREAM_KEEPALIVE,
+            APISIX_DEFAULT_UPSTREAM_KEEPALIVE,
+        ),
+    )
+    rlimit_nofile = _int_override(
+        source,
+        "GATEWAY_WORKER_RLIMIT_NOFILE",
+        max(APISIX_DEFAULT_RLIMIT_NOFILE, worker_connections * 2),
+    )
+
+    shared_dicts: dict[str, str] = {}
+    for name, base_mib in SHARED_DICT_BASE_MIB.items():
+        override_key = "GATEWAY_LUA_SHARED_DICT_" + name.upper().replace("-", "_")
+        override = source.get(override_key, "").strip()
+        shared_dicts[name] = override or f"{max(1, round(base_mib * dict_scale))}m"
+
+    logger.debug(
+        f"Gateway tuning ({resources.source}): cpu={resources.cpu_limit} "
+        f"memory={resources.memory_limit_bytes} workers={worker_processes} "
+        f"connections={worker_connections} keepalive={upstream_keepalive}"
+    )
+
+    return {
+        "container_cpu_limit": resources.cpu_limit,
+        "container_memory_limit_bytes": resources.memory_limit_bytes,
+        "container_resources_source": resources.source,
+        "gateway_worker_processes": worker_processes,
+        "gateway_worker_connections": worker_connections,
+        "gateway_worker_rlimit_nofile": rlimit_nofile,
+        "gateway_upstream_keepalive": upstream_keepalive,
+        "gateway_lua_shared_dict": shared_dicts,
+    }
@@ -1,5 +1,14 @@
 """Template rendering package."""
 
-from . import engine, io
+from __future__ import annotations
+
+import importlib
+from typing import Any
 
 __all__ = ["engine", "io"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -217,6 +217,18 @@ resource "azurerm_container_app" "gateway" {
         value = local.otel_collector_endpoint
       }
 
+      # hydrenv sizes APISIX workers for the gateway container, not for this
+      # init container's own cgroup, so pass the gateway allocation through.
+      env {
+        name  = "GATEWAY_CPU_LIMIT"
+        value = tostring(var.gateway_cpu)
+      }
+
+      env {
+        name  = "GATEWAY_MEMORY_LIMIT"
+        value = var.gateway_memory
+      }
+
       dynamic "env" {
         for_each = toset(local.all_kv_secrets)
         content {
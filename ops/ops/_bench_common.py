@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+from ._utils import repo_root, run_logged
+
+logger = logging.getLogger(__name__)
+
+SIMULATOR_START_TIMEOUT_SECONDS = 15.0
+
+
+def results_dir() -> Path:
+    override = os.environ.get("OPS_BENCH_DIR")
+    return Path(override) if override else repo_root() / ".ops-bench"
+
+
+def write_result(
+    name: str, payload: dict[str, Any], output: Path | None = None
+) -> Path:
+    if output is None:
+        stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = results_dir() / f"{name}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return output
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _wait_for_port(process: subprocess.Popen[bytes], port: int) -> None:
+    deadline = time.monotonic() + SIMULATOR_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"Simulator on port {port} exited with code {process.returncode}"
+            )
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Simulator on port {port} did not start listening")
+
+
+@contextmanager
+def simulator_process(
+    *,
+    port: int | None = None,
+    region: str = "local",
+    host: str = "127.0.0.1",
+    extra_args: Sequence[str] = (),
+) -> Iterator[str]:
+    """
+    Run `run-aoai-simulator` in its own process (so it does not compete with
+    the load generator's event loop) and yield its base URL.
+    """
+    port = port or free_port()
+    cmd = [
+        sys.executable,
+        "-m",
+        "ops.aoai_simulator",
+        "--host",
+        host,
+        "--port",
+        str(port),
+        "--region",
+        region,
+        *extra_args,
+    ]
+    process = subprocess.Popen(
+        cmd, cwd=Path(__file__).resolve().parents[1], stdout=subprocess.DEVNULL
+    )
+    try:
+        _wait_for_port(process, port)
+        url = f"http://{'127.0.0.1' if host in ('0.0.0.0', '::') else host}:{port}"
+        logger.info("Started simulator '%s' at %s", region, url)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def container_cpu_seconds(container: str) -> float | None:
+    """
+    Total CPU time consumed by a running docker container, read from its
+    cgroup (v2 cpu.stat, falling back to v1 cpuacct.usage).
+    """
+    result = run_logged(
+        [
+            "docker",
+            "exec",
+            container,
+            "sh",
+            "-c",
+            "cat /sys/fs/cgroup/cpu.stat 2>/dev/null || cat /sys/fs/cgroup/cpuacct/cpuacct.usage",
+        ],
+        capture_output=True,
+        check=False,
+        echo="never",
+    )
+    if result.returncode != 0:
+        logger.warning("Unable to read CPU usage of container %s", container)
+        return None
+    output = result.stdout.strip()
+    for line in output.splitlines():
+        name, _, value = line.partition(" ")
+        if name == "usage_usec":
+            return int(value) / 1e6
+    try:
+        return int(output) / 1e9
+    except ValueError:
+        logger.warning("Unrecognized cgroup CPU stats for container %s", container)
+        return None
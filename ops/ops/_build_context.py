@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+from typing import IO, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+ACR_TEMPLATE_NAME = "acr-build.yaml"
+# Interpreter/tool caches never affect the image but change on every local run;
+# keep them out of the build context so the content digest stays stable.
+VOLATILE_PATTERNS = (
+    "__pycache__",
+    "*.pyc",
+    "*.pyo",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+    ".venv",
+    ".DS_Store",
+)
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)): copy-on-write clone on btrfs/XFS/overlay.
+_FICLONE = 0x40049409
+
+
+@dataclass(frozen=True)
+class ContextPlan:
+    """Files that make up a build context, before anything is copied."""
+
+    target: str
+    # (path inside the staged context, source file) pairs sorted by staged path.
+    entries: tuple[tuple[str, Path], ...]
+    dockerfile: Path
+    build_context: Path
+
+
+def _is_volatile(name: str) -> bool:
+    return any(fnmatchcase(name, pattern) for pattern in VOLATILE_PATTERNS)
+
+
+def _walk_files(source: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(source, followlinks=True):
+        dirnames[:] = sorted(name for name in dirnames if not _is_volatile(name))
+        for name in sorted(filenames):
+            if not _is_volatile(name):
+                yield Path(dirpath) / name
+
+
+def plan_context(
+    root: Path,
+    template: Path,
+    include_paths: Iterable[Path],
+    build_context: Path,
+    dockerfile: Path,
+    target: str,
+) -> ContextPlan:
+    entries: dict[str, Path] = {ACR_TEMPLATE_NAME: template}
+    for rel_path in include_paths:
+        source = root / rel_path
+        if not source.exists():
+            raise FileNotFoundError(f"Context path not found for build: {source}")
+        if source.is_dir():
+            for path in _walk_files(source):
+                staged = rel_path / path.relative_to(source)
+                entries[staged.as_posix()] = path
+        else:
+            entries[rel_path.as_posix()] = source
+
+    prefix = build_context.as_posix().strip("/")
+    if prefix not in ("", ".") and not any(
+        name.startswith(f"{prefix}/") for name in entries
+    ):
+        raise FileNotFoundError(
+            f"Build context not found for {target}: {build_context}"
+        )
+
+    return ContextPlan(
+        target=target,
+        entries=tuple(sorted(entries.items())),
+        dockerfile=dockerfile,
+        build_context=build_context,
+    )
+
+
+def context_digest(plan: ContextPlan, *, platform: str) -> str:
+    """
+    SHA-256 over a build context: every file's staged path, executable bit and
+    content in sorted order, together with the build parameters, so identical
+    inputs always yield the same tag.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        plan.target,
+        platform,
+        plan.dockerfile.as_posix(),
+        plan.build_context.as_posix(),
+    ):
+        digest.update(part.encode("utf-8") + b"\0")
+
+    for rel, source in plan.entries:
+        executable = "x" if os.access(source, os.X_OK) else "-"
+        digest.update(f"F {rel} {executable}\0".encode("utf-8"))
+        with source.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, destination: Path) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink is only attempted on Linux")
+    import fcntl
+
+    with source.open("rb") as src, destination.open("wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            destination.unlink(missing_ok=True)
+            raise
+    shutil.copymode(source, destination)
+
+
+def _link_or_copy(source: Path, destination: Path) -> str:
+    """Materialize source at destination as cheaply as the filesystem allows."""
+    try:
+        _reflink(source, destination)
+        return "reflink"
+    except OSError:
+        pass
+    try:
+        os.link(source, destination)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(source, destination)
+        return "copy"
+
+
+def _staging_parent(root: Path) -> Path | None:
+    # Hardlinks and reflinks only work within one filesystem, so stage next to
+    # the sources by default instead of in the system temp dir.
+    override = os.environ.get("OPS_STAGING_DIR")
+    parent = Path(override) if override else root / ".ops-staging"
+    try:
+        parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return parent
+
+
+@contextmanager
+def staged_context(root: Path, plan: ContextPlan) -> Iterator[Path]:
+    """Materialize a plan in a temporary directory using reflinks/hardlinks."""
+    with tempfile.TemporaryDirectory(
+        prefix=f"{plan.target}-ctx-", dir=_staging_parent(root)
+    ) as tmpdir:
+        context_root = Path(tmpdir)
+        methods: Counter[str] = Counter()
+        for rel, source in plan.entries:
+            destination = context_root / rel
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            methods[_link_or_copy(source, destination)] += 1
+        logger.info(
+            "Staged %d file(s) for %s (%s)",
+            len(plan.entries),
+            plan.target,
+            ", ".join(f"{count} {method}" for method, count in sorted(methods.items())),
+        )
+        yield context_root
+
+
+class DockerIgnore:
+    """Matcher for .dockerignore patterns (last match wins, ! re-includes)."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._rules: list[tuple[re.Pattern[str], bool]] = []
+        for raw in patterns:
+            line = raw.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:].strip()
+            line = PurePosixPath("/" + line).as_posix().lstrip("/").rstrip("/")
+            if line:
+                self._rules.append((self._compile(line), negate))
+
+    @classmethod
+    def from_file(cls, path: Path) -> DockerIgnore:
+        if not path.is_file():
+            return cls([])
+        return cls(path.read_text(encoding="utf-8").splitlines())
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern[str]:
+        parts: list[str] = []
+        index = 0
+        while index < len(pattern):
+            char = pattern[index]
+            if pattern.startswith("**", index):
+                parts.append(".*")
+                index += 2
+                if pattern.startswith("/", index):
+                    parts[-1] = "(?:.*/)?"
+                    index += 1
+                continue
+            if char == "*":
+                parts.append("[^/]*")
+            elif char == "?":
+                parts.append("[^/]")
+            else:
+                parts.append(re.escape(char))
+            index += 1
+        # A pattern matching a directory excludes everything beneath it.
+        return re.compile("".join(parts) + "(?:/.*)?")
+
+    def ignored(self, rel_path: str) -> bool:
+        excluded = False
+        for regex, negate in self._rules:
+            if regex.fullmatch(rel_path):
+                excluded = not negate
+        return excluded
+
+
+def _context_prefix(plan: ContextPlan) -> str:
+    prefix = plan.build_context.as_posix().strip("/")
+    return "" if prefix == "." else prefix
+
+
+def context_dockerfile(plan: ContextPlan) -> str:
+    """Dockerfile path relative to the build context (required for streaming)."""
+    prefix = _context_prefix(plan)
+    dockerfile = plan.dockerfile.as_posix()
+    if not prefix:
+        return dockerfile
+    if not dockerfile.startswith(f"{prefix}/"):
+        raise ValueError(
+            f"Dockerfile {dockerfile} is outside build context {prefix}; "
+            "it cannot be streamed"
+        )
+    return dockerfile[len(prefix) + 1 :]
+
+
+def _tar_members(plan: ContextPlan) -> list[tuple[str, Path]]:
+    """Entries inside the build context, relative to it, after .dockerignore."""
+    prefix = _context_prefix(plan)
+    members: list[tuple[str, Path]] = []
+    for rel, source in plan.entries:
+        if prefix and not rel.startswith(f"{prefix}/"):
+            continue
+        members.append((rel[len(prefix) + 1 :] if prefix else rel, source))
+    dockerfile = context_dockerfile(plan)
+
+    # Docker applies the .dockerignore at the root of the context it receives.
+    ignore = next(
+        (
+            DockerIgnore.from_file(source)
+            for name, source in members
+            if name == ".dockerignore"
+        ),
+        DockerIgnore([]),
+    )
+    kept = [
+        (name, source)
+        for name, source in members
+        # The Dockerfile is always sent, even when .dockerignore lists it.
+        if name == dockerfile or not ignore.ignored(name)
+    ]
+    return kept
+
+
+def write_context_tar(plan: ContextPlan, stream: IO[bytes]) -> None:
+    """
+    Write the build context as a reproducible tar (sorted entries, zeroed
+    mtime/ownership) to stream.
+    """
+    members = _tar_members(plan)
+    with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for name, source in members:
+            info = tarfile.TarInfo(name)
+            info.size = source.stat().st_size
+            info.mode = 0o755 if os.access(source, os.X_OK) else 0o644
+            info.mtime = 0
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            with source.open("rb") as handle:
+                tar.addfile(info, handle)
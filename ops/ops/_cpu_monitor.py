@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PROC = Path("/proc")
+DEFAULT_INTERVAL_SECONDS = 5.0
+DEFAULT_THRESHOLD_PCT = 90.0
+# Consecutive saturated samples before warning while the run is still going.
+SUSTAINED_SAMPLES = 3
+
+
+def _matching_pids(marker: bytes) -> list[int]:
+    pids: list[int] = []
+    own = str(os.getpid())
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit() or entry.name == own:
+            continue
+        try:
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        # Whole arguments only: one scenario's --csv prefix can be a prefix of
+        # another's (round-robin-simple vs round-robin-simple-v2).
+        if marker in cmdline.split(b"\0"):
+            pids.append(int(entry.name))
+    return pids
+
+
+def _cpu_seconds(pid: int, ticks: int) -> float | None:
+    try:
+        stat = (PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # Fields after the parenthesised command name; utime and stime are the
+    # 14th and 15th fields of the whole line.
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / ticks
+
+
+class CpuSaturationMonitor:
+    """
+    Sample the CPU usage of every process with `marker` as one of its
+    arguments (a Locust master and its forked workers) from a background
+    thread. A single Python process cannot use more than one core, so any
+    process pinned near 100% means the load generator, not the system under
+    test, limits the offered load. Linux only; elsewhere it records nothing.
+    """
+
+    def __init__(
+        self,
+        marker: str,
+        *,
+        label: str,
+        interval_s: float = DEFAULT_INTERVAL_SECONDS,
+        threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    ) -> None:
+        self.marker = marker.encode()
+        self.label = label
+        self.interval_s = interval_s
+        self.threshold_pct = threshold_pct
+        self.samples = 0
+        self.saturated_samples = 0
+        self.peak_cpu_pct = 0.0
+        self.max_processes = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def available(self) -> bool:
+        return (PROC / "self" / "stat").exists()
+
+    def __enter__(self) -> CpuSaturationMonitor:
+        if self.available:
+            # Run in a copy of the caller's context so warnings keep its
+            # output_context prefix and log file.
+            context = contextvars.copy_context()
+            self._thread = threading.Thread(
+                target=context.run,
+                args=(self._run,),
+                name=f"cpu-monitor-{self.label}",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        ticks = os.sysconf("SC_CLK_TCK")
+        previous: dict[int, float] = {}
+        previous_at = time.monotonic()
+        consecutive = 0
+        warned = False
+        while not self._stop.wait(self.interval_s):
+            now = time.monotonic()
+            current: dict[int, float] = {}
+            for pid in _matching_pids(self.marker):
+                seconds = _cpu_seconds(pid, ticks)
+                if seconds is not None:
+                    current[pid] = seconds
+            elapsed = now - previous_at
+            usage = [
+                (current[pid] - previous[pid]) / elapsed * 100
+                for pid in current.keys() & previous.keys()
+            ]
+            previous, previous_at = current, now
+            if not usage:
+                continue
+            self.samples += 1
+            self.max_processes = max(self.max_processes, len(usage))
+            hottest = max(usage)
+            self.peak_cpu_pct = max(self.peak_cpu_pct, hottest)
+            if hottest < self.threshold_pct:
+                consecutive = 0
+                continue
+            self.saturated_samples += 1
+            consecutive += 1
+            if consecutive >= SUSTAINED_SAMPLES and not warned:
+                warned = True
+                logger.warning(
+                    "Locust process for '%s' is at %.0f%% CPU; the load generator "
+                    "is limiting throughput (raise LOCUST_PROCESSES)",
+                    self.label,
+                    hottest,
+                )
+
+    @property
+    def saturated(self) -> bool:
+        # A fifth of the run at the ceiling skews latency and RPS noticeably.
+        return self.samples > 0 and self.saturated_samples / self.samples >= 0.2
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "processes": self.max_processes,
+            "peak_cpu_pct": round(self.peak_cpu_pct, 1),
+            "saturated_samples": self.saturated_samples,
+            "saturated": self.saturated,
+        }
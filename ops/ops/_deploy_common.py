@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
+import re
 import subprocess
 import tempfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Sequence
 
 import hcl2  # type: ignore[import-not-found]
 from tenacity import (  # type: ignore[import-not-found]
@@ -18,10 +20,18 @@ from tenacity import (  # type: ignore[import-not-found]
     wait_exponential,
 )
 
+from . import _state_cache
+from ._telemetry import span
 from ._utils import repo_root, run_logged
 
 logger = logging.getLogger(__name__)
 
+# Terraform sources that can change a plan: local module blocks and files read
+# through path.module/path.root (e.g. the simulator deployment config).
+_LOCAL_MODULE_SOURCE = re.compile(r'^\s*source\s*=\s*"(\.{1,2}/[^"]+)"', re.MULTILINE)
+_PATH_FILE_REFERENCE = re.compile(r'\$\{path\.(?:module|root)\}/([^"}]+)"')
+_PLAN_EXCLUDED_DIRS = {".terraform", ".state"}
+
 
 @dataclass(frozen=True)
 class AzureContext:
@@ -179,7 +189,9 @@ def _break_state_lease(stack_dir: Path) -> None:
     state_sa = config.get("storage_account_name")
     state_container = config.get("container_name")
     state_key = config.get("key")
-    if not all(isinstance(v, str) and v for v in (state_sa, state_container, state_key)):
+    if not all(
+        isinstance(v, str) and v for v in (state_sa, state_container, state_key)
+    ):
         raise KeyError(f"Missing azurerm backend config in {tfstate_path}")
 
     run_logged(
@@ -398,18 +410,19 @@ def ensure_tfvars(
     return target
 
 
-def azure_context() -> AzureContext:
-    subscription_id = run_logged(
-        ["az", "account", "show", "--query", "id", "-o", "tsv"],
+def _az_account_show() -> dict[str, str]:
+    raw = run_logged(
+        ["az", "account", "show", "--query", "{id:id,tenantId:tenantId}", "-o", "json"],
         capture_output=True,
         echo="on_error",
-    ).stdout.strip()
-    tenant_id = run_logged(
-        ["az", "account", "show", "--query", "tenantId", "-o", "tsv"],
-        capture_output=True,
-        echo="on_error",
-    ).stdout.strip()
-    return AzureContext(subscription_id=subscription_id, tenant_id=tenant_id)
+    ).stdout
+    data = json.loads(raw)
+    return {"id": str(data["id"]), "tenantId": str(data["tenantId"])}
+
+
+def azure_context() -> AzureContext:
+    account = _state_cache.azure_account(_az_account_show)
+    return AzureContext(subscription_id=account["id"], tenant_id=account["tenantId"])
 
 
 def export_core_tf_env(env: str, ctx: AzureContext) -> None:
@@ -540,8 +553,95 @@ def terraform_init_remote(
     wait=wait_exponential(multiplier=1, min=5, max=60),
     before_sleep=_log_apply_retry,
 )
-def terraform_apply(stack_dir: Path, tfvars_file: Path) -> None:
+def terraform_apply(
+    stack_dir: Path, tfvars_file: Path, *, extra_args: Sequence[str] = ()
+) -> None:
+    try:
+        # One span per attempt, so retried conflicts show up in the report.
+        with span("terraform_apply", stack=stack_dir.name):
+            _run_terraform_apply(stack_dir, tfvars_file, extra_args)
+    finally:
+        # Even a failed apply may have written new state.
+        _state_cache.invalidate_stack(stack_dir)
+
+
+def plan_fast_path_enabled() -> bool:
+    return os.environ.get("OPS_TF_FAST_PATH", "off").strip().lower() in {
+        "1",
+        "on",
+        "true",
+        "yes",
+    }
+
+
+def _module_dirs(stack_dir: Path) -> list[Path]:
+    """The stack directory plus every local module it (transitively) calls."""
+    pending = [stack_dir.resolve()]
+    seen: list[Path] = []
+    while pending:
+        directory = pending.pop()
+        if directory in seen or not directory.is_dir():
+            continue
+        seen.append(directory)
+        for tf_file in sorted(directory.glob("*.tf")):
+            for source in _LOCAL_MODULE_SOURCE.findall(tf_file.read_text()):
+                pending.append((directory / source).resolve())
+    return sorted(seen)
+
+
+def plan_inputs_digest(
+    stack_dir: Path, tfvars_file: Path, extra_args: Sequence[str] = ()
+) -> str:
+    """
+    Hash of everything a plan depends on apart from the state itself: the
+    tfvars file, the stack and local module sources (including files they
+    read via path.module), TF_VAR_/ARM_ variables and the CLI arguments.
+    """
+    digest = hashlib.sha256()
+
+    def _add_file(path: Path) -> None:
+        digest.update(f"F {path}\0".encode("utf-8"))
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+
+    _add_file(tfvars_file.resolve())
+    referenced: set[Path] = set()
+    for directory in _module_dirs(stack_dir):
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(
+                name for name in dirnames if name not in _PLAN_EXCLUDED_DIRS
+            )
+            for name in sorted(filenames):
+                path = Path(dirpath) / name
+                if ".tfstate" in name or name.endswith(".tfplan"):
+                    continue
+                _add_file(path)
+                if name.endswith(".tf"):
+                    referenced.update(
+                        (directory / rel).resolve()
+                        for rel in _PATH_FILE_REFERENCE.findall(path.read_text())
+                    )
+    for path in sorted(referenced):
+        _add_file(path)
+
+    for name in sorted(os.environ):
+        if name.startswith(("TF_VAR_", "ARM_", "TF_CLI_ARGS")):
+            digest.update(f"E {name}={os.environ[name]}\0".encode("utf-8"))
+    for arg in extra_args:
+        digest.update(f"A {arg}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _run_terraform_apply(
+    stack_dir: Path, tfvars_file: Path, extra_args: Sequence[str]
+) -> None:
     try:
+        if plan_fast_path_enabled():
+            _plan_then_apply(stack_dir, tfvars_file, extra_args)
+            return
         run_logged(
             [
                 "terraform",
@@ -549,6 +649,7 @@ def terraform_apply(stack_dir: Path, tfvars_file: Path) -> None:
                 "apply",
                 "-auto-approve",
                 f"-var-file={tfvars_file.name}",
+                *extra_args,
             ],
             capture_output=True,
             echo="always",
@@ -572,6 +673,78 @@ def terraform_apply(stack_dir: Path, tfvars_file: Path) -> None:
         raise
 
 
+def _plan_then_apply(
+    stack_dir: Path, tfvars_file: Path, extra_args: Sequence[str]
+) -> None:
+    """
+    Plan once with -detailed-exitcode; apply the saved plan only when it has
+    changes. No-op plans are cached against the inputs digest and state
+    version so an unchanged stack is not even planned again.
+    """
+    inputs_digest = plan_inputs_digest(stack_dir, tfvars_file, extra_args)
+    if _state_cache.noop_plan_cached(stack_dir, inputs_digest):
+        logger.info(
+            "Terraform: %s inputs and state unchanged since the last no-op plan; "
+            "skipping plan and apply",
+            stack_dir.name,
+        )
+        return
+
+    plan_path = (stack_dir / ".terraform" / f"ops-{tfvars_file.stem}.tfplan").resolve()
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    plan_cmd = [
+        "terraform",
+        f"-chdir={stack_dir}",
+        "plan",
+        "-input=false",
+        "-detailed-exitcode",
+        f"-var-file={tfvars_file.name}",
+        f"-out={plan_path}",
+        *extra_args,
+    ]
+    try:
+        planned = run_logged(
+            plan_cmd,
+            capture_output=True,
+            check=False,
+            echo="always",
+            env=_terraform_env(),
+        )
+        if planned.returncode == 0:
+            logger.info("Terraform: no changes for %s; skipping apply", stack_dir.name)
+            _state_cache.record_noop_plan(
+                stack_dir,
+                inputs_digest,
+                {"stack": stack_dir.name, "tfvars": tfvars_file.name, "changes": False},
+            )
+            return
+        if planned.returncode != 2:
+            raise subprocess.CalledProcessError(
+                planned.returncode,
+                plan_cmd,
+                output=planned.stdout,
+                stderr=planned.stderr,
+            )
+        # Variables are baked into the saved plan; -var-file is rejected here.
+        run_logged(
+            [
+                "terraform",
+                f"-chdir={stack_dir}",
+                "apply",
+                "-input=false",
+                "-auto-approve",
+                *extra_args,
+                str(plan_path),
+            ],
+            capture_output=True,
+            echo="always",
+            env=_terraform_env(),
+        )
+    finally:
+        # Saved plans contain sensitive values in clear text.
+        plan_path.unlink(missing_ok=True)
+
+
 def terraform_output(stack_dir: Path) -> dict[str, Any]:
     @retry(
         reraise=True,
@@ -593,7 +766,8 @@ def terraform_output(stack_dir: Path) -> dict[str, Any]:
             raise
         return json.loads(output)
 
-    return _inner()
+    with span("terraform_output", stack=stack_dir.name):
+        return _state_cache.terraform_outputs(stack_dir, _inner)
 
 
 def remote_state_outputs(
@@ -604,7 +778,24 @@ def remote_state_outputs(
 
     This avoids `terraform init`/`terraform output` for stacks whose sole purpose
     is to fetch outputs, which can hang on transient backend/network issues.
+    Results are cached on disk and revalidated against the blob ETag.
     """
+    with span("remote_state_outputs", state_key=state_key):
+        return _state_cache.remote_state_outputs(
+            state_storage_account,
+            state_container,
+            state_key,
+            lambda: _download_state_outputs(
+                state_storage_account=state_storage_account,
+                state_container=state_container,
+                state_key=state_key,
+            ),
+        )
+
+
+def _download_state_outputs(
+    *, state_storage_account: str, state_container: str, state_key: str
+) -> dict[str, Any]:
     with tempfile.TemporaryDirectory(prefix="tfstate-") as temp_dir:
         state_path = Path(temp_dir) / "state.tfstate"
         run_logged(
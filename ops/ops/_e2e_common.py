@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import datetime as dt
 import json
 import logging
+import math
 import os
+import subprocess
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 from typing import Any
 
+from . import _locust_stats, _state_cache
+from ._cpu_monitor import CpuSaturationMonitor
+from ._telemetry import span, traced
 from ._utils import ensure, repo_root, run_logged
 
 logger = logging.getLogger(__name__)
@@ -20,20 +28,36 @@ CLIENT_KEY_NAMES = (
     "GATEWAY_CLIENT_KEY_1",
     "GATEWAY_CLIENT_KEY_2",
 )
+# Each `az` call spends seconds in CLI startup, so discovery lookups run in a
+# bounded pool. Override with E2E_DISCOVERY_CONCURRENCY.
+DISCOVERY_MAX_WORKERS = 8
+# One Locust process saturates a core at roughly this many users of the
+# toolkit scenarios; larger runs fork one worker per share. Override with
+# LOCUST_PROCESSES.
+USERS_PER_LOCUST_PROCESS = 50
+
+
+class EnvironmentDiscoveryError(RuntimeError):
+    """Raised when one or more E2E environment lookups fail."""
 
 
 def _run_command(command: list[str]) -> str:
-    result = run_logged(command, capture_output=True)
+    # Lookups run concurrently; only replay output for the failing command.
+    result = run_logged(command, capture_output=True, echo="on_error")
     return result.stdout.strip()
 
 
 def _terraform_outputs() -> dict[str, Any]:
     ensure(["terraform"])
-    raw = _run_command(["terraform", f"-chdir={STACK_DIR}", "output", "-json"])
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Unable to parse terraform outputs: {exc}") from exc
+
+    def _load() -> dict[str, Any]:
+        raw = _run_command(["terraform", f"-chdir={STACK_DIR}", "output", "-json"])
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise RuntimeError(f"Unable to parse terraform outputs: {exc}") from exc
+
+    return _state_cache.terraform_outputs(STACK_DIR, _load)
 
 
 def _output_value(outputs: dict[str, Any], key: str) -> Any:
@@ -114,15 +138,12 @@ def _secret_from_key_vault(vault_name: str, key: str) -> str | None:
                 "tsv",
             ]
         )
-    except RuntimeError:
+    except (RuntimeError, subprocess.CalledProcessError):
         return None
     return value if value != "" else None
 
 
-def _load_client_keys(
-    vault_name: str,
-    secret_names: list[str],
-) -> list[str]:
+def _client_key_names(secret_names: list[str]) -> list[str]:
     # derive env-style keys from secret names (gateway-client-key-N)
     env_keys: list[str] = []
     for name in secret_names:
@@ -130,31 +151,92 @@ def _load_client_keys(
             suffix = name.rsplit("-", 1)[-1]
             if suffix.isdigit():
                 env_keys.append(f"GATEWAY_CLIENT_KEY_{suffix}")
-    if not env_keys:
-        env_keys = list(CLIENT_KEY_NAMES)
-
-    keys: list[str] = []
-    for key in env_keys:
-        value = _secret_from_key_vault(vault_name, key)
-        if value is None:
-            value = os.getenv(key)
-        if value is None:
-            raise RuntimeError(
-                f"Client key '{key}' not found in Key Vault '{vault_name}' or environment."
-            )
-        keys.append(value)
-    return keys
+    return env_keys or list(CLIENT_KEY_NAMES)
+
+
+def _client_key(vault_name: str, key: str) -> str:
+    value = _secret_from_key_vault(vault_name, key)
+    if value is None:
+        value = os.getenv(key)
+    if value is None:
+        raise RuntimeError(
+            f"Client key '{key}' not found in Key Vault '{vault_name}' or environment."
+        )
+    return value
+
+
+def _discovery_workers() -> int:
+    raw = os.getenv("E2E_DISCOVERY_CONCURRENCY", "")
+    try:
+        return max(1, int(raw)) if raw else DISCOVERY_MAX_WORKERS
+    except ValueError:
+        logger.warning("Ignoring invalid E2E_DISCOVERY_CONCURRENCY=%r", raw)
+        return DISCOVERY_MAX_WORKERS
+
+
+def _gather(pending: list[tuple[str, Future[Any]]]) -> tuple[list[Any], list[str]]:
+    """Wait for every lookup; failures are reported in submission order."""
+    results: list[Any] = []
+    failures: list[str] = []
+    for label, future in pending:
+        try:
+            results.append(future.result())
+        except Exception as exc:  # noqa: BLE001
+            results.append(None)
+            failures.append(f"{label}: {exc}")
+    return results, failures
+
+
+def _raise_discovery_failures(failures: list[str]) -> None:
+    if failures:
+        raise EnvironmentDiscoveryError(
+            "E2E environment discovery failed:\n  - " + "\n  - ".join(failures)
+        )
 
 
+@traced("build_test_environment")
 def build_test_environment() -> dict[str, str]:
-    outputs = _terraform_outputs()
+    # Check tools up front: ensure() exits, which must not happen in a worker.
+    ensure(["terraform", "az"])
+    with ThreadPoolExecutor(
+        max_workers=_discovery_workers(), thread_name_prefix="e2e-discovery"
+    ) as pool:
+        # `az account show` does not depend on the stack outputs; start it
+        # alongside `terraform output` and fold both into one error report.
+        account_future = pool.submit(_account_context)
+        (outputs,), failures = _gather(
+            [("terraform output", pool.submit(_terraform_outputs))]
+        )
+        if failures:
+            _, account_failures = _gather([("az account show", account_future)])
+            _raise_discovery_failures(failures + account_failures)
+
+        gateway_url = str(_output_value(outputs, "gateway_url")).rstrip("/")
+        gateway_app_name = str(_output_value(outputs, "gateway_app_name"))
+        resource_group_name = str(_output_value(outputs, "resource_group_name"))
+        workspace_resource_id = str(
+            _output_value(outputs, "log_analytics_workspace_id")
+        )
+        vault_name = str(_output_value(outputs, "key_vault_name"))
+        secret_names = outputs.get("secret_names", {}).get("value") or []
+        client_key_names = _client_key_names(secret_names)
+
+        pending: list[tuple[str, Future[Any]]] = [
+            ("az account show", account_future),
+            (
+                "log analytics workspace",
+                pool.submit(_workspace_info, workspace_resource_id),
+            ),
+        ]
+        pending.extend(
+            (f"client key {key}", pool.submit(_client_key, vault_name, key))
+            for key in client_key_names
+        )
+        results, failures = _gather(pending)
+        _raise_discovery_failures(failures)
 
-    gateway_url = str(_output_value(outputs, "gateway_url")).rstrip("/")
-    gateway_app_name = str(_output_value(outputs, "gateway_app_name"))
-    resource_group_name = str(_output_value(outputs, "resource_group_name"))
-    workspace_resource_id = str(_output_value(outputs, "log_analytics_workspace_id"))
-    workspace_id, workspace_name = _workspace_info(workspace_resource_id)
-    subscription_id, tenant_id = _account_context()
+    (subscription_id, tenant_id), (workspace_id, workspace_name) = results[:2]
+    client_keys: list[str] = results[2:]
 
     simulator_api_key = str(_output_value(outputs, "simulator_api_key"))
     simulator_ptu1 = str(_output_value(outputs, "simulator_ptu1_fqdn"))
@@ -167,10 +249,6 @@ def build_test_environment() -> dict[str, str]:
         else ""
     )
 
-    vault_name = str(_output_value(outputs, "key_vault_name"))
-    secret_names = outputs.get("secret_names", {}).get("value") or []
-    client_keys = _load_client_keys(vault_name, secret_names)
-
     env = {
         "APIM_SUBSCRIPTION_ONE_KEY": client_keys[0],
         "APIM_SUBSCRIPTION_TWO_KEY": client_keys[1],
@@ -197,6 +275,64 @@ def build_test_environment() -> dict[str, str]:
     return env
 
 
+def e2e_run_dir() -> Path:
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return REPO_ROOT / ".ops-e2e" / stamp
+
+
+def _env_value(env: dict[str, str], name: str) -> str | None:
+    return env.get(name) or os.environ.get(name)
+
+
+def e2e_results_dir(env: dict[str, str]) -> Path:
+    """Where Locust stats and reports go: E2E_RESULTS_DIR or a fresh run dir."""
+    path = Path(_env_value(env, "E2E_RESULTS_DIR") or e2e_run_dir())
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _record_results(
+    scenario: str,
+    csv_prefix: Path,
+    **metadata: Any,
+) -> dict[str, Any] | None:
+    try:
+        summary = _locust_stats.summarize_csv(csv_prefix, scenario=scenario, **metadata)
+    except (OSError, ValueError) as exc:
+        logger.warning("No Locust stats for '%s': %s", scenario, exc)
+        return None
+    path = csv_prefix.parent / f"{scenario}{_locust_stats.SUMMARY_SUFFIX}"
+    _locust_stats.write_summary(path, summary)
+    latency = summary["latency_ms"]
+    logger.info(
+        "Scenario '%s': %s requests, %.2f%% failed, %.1f rps, p95=%sms p99=%sms (%s)",
+        scenario,
+        summary["requests"],
+        summary["error_rate"] * 100,
+        summary["throughput_rps"],
+        latency["p95"],
+        latency["p99"],
+        path,
+    )
+    return summary
+
+
+def locust_processes(user_count: int, env: dict[str, str]) -> int:
+    raw = _env_value(env, "LOCUST_PROCESSES")
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            logger.warning("Ignoring invalid LOCUST_PROCESSES=%r", raw)
+    # Custom load shapes decide the user count at runtime, and --processes
+    # relies on fork.
+    if user_count <= 0 or not hasattr(os, "fork"):
+        return 1
+    # Leave a core for the master, which aggregates stats and serves the UI.
+    cores = max(1, (os.cpu_count() or 1) - 1)
+    return max(1, min(cores, math.ceil(user_count / USERS_PER_LOCUST_PROCESS)))
+
+
 def _locust_host(base_endpoint: str, endpoint_path: str) -> str:
     base = base_endpoint.rstrip("/")
     path = endpoint_path.strip("/")
@@ -212,6 +348,8 @@ def run_scenario(
     spawn_rate: float | None = None,
     extra_env: dict[str, str] | None = None,
     base_env: dict[str, str] | None = None,
+    scenario: str | None = None,
+    processes: int | None = None,
 ) -> None:
     env = base_env or build_test_environment()
     run_locust(
@@ -222,6 +360,8 @@ def run_scenario(
         spawn_rate=spawn_rate,
         extra_env=extra_env,
         base_env=env,
+        scenario=scenario,
+        processes=processes,
     )
 
 
@@ -234,8 +374,18 @@ def run_locust(
     spawn_rate: float | None = None,
     extra_env: dict[str, str] | None = None,
     base_env: dict[str, str] | None = None,
+    scenario: str | None = None,
+    processes: int | None = None,
 ) -> None:
+    """
+    Run a Locust scenario, write its stats (CSV plus a normalized
+    `<scenario>.summary.json`) to E2E_RESULTS_DIR and, when E2E_BASELINE_DIR
+    holds a summary for the scenario, fail if it regressed past tolerance.
+    Large runs fork `processes` workers (default: from user count and cores)
+    whose stats Locust aggregates in the master.
+    """
     env = dict(base_env or build_test_environment())
+    scenario = scenario or endpoint_path
     env["ENDPOINT_PATH"] = endpoint_path
     if extra_env:
         env.update({k: v for k, v in extra_env.items() if v is not None})
@@ -263,15 +413,67 @@ def run_locust(
         if spawn_rate is not None:
             cmd.extend(["--spawn-rate", str(spawn_rate)])
 
+    processes = processes or locust_processes(user_count, env)
+    if processes > 1:
+        cmd.extend(["--processes", str(processes)])
+
+    csv_prefix = e2e_results_dir(env) / scenario
+    cmd.extend(["--csv", str(csv_prefix)])
+
     logger.info(
-        "Running locust scenario '%s' (users=%s, run_time=%s)",
+        "Running locust scenario '%s' (users=%s, run_time=%s, processes=%s)",
         endpoint_path,
         user_count,
         run_time,
+        processes,
     )
-    run_logged(
-        cmd, capture_output=False, env={**os.environ, **env}, cwd=TOOLKIT_TEST_ROOT
-    )
+    # Parse tolerances before the run so a bad E2E_TOLERANCE_* value is
+    # reported up front rather than after the load test.
+    baseline_dir = _env_value(env, "E2E_BASELINE_DIR")
+    tolerances = _locust_stats.Tolerances.from_env(env) if baseline_dir else None
+    monitor = CpuSaturationMonitor(str(csv_prefix), label=scenario)
+    with span(
+        "run_locust", scenario=endpoint_path, users=user_count, processes=processes
+    ):
+        try:
+            with monitor:
+                run_logged(
+                    cmd,
+                    capture_output=False,
+                    env={**os.environ, **env},
+                    cwd=TOOLKIT_TEST_ROOT,
+                )
+        finally:
+            # Record stats for failed runs too; they are what explains the failure.
+            summary = _record_results(
+                scenario,
+                csv_prefix,
+                endpoint_path=endpoint_path,
+                users=user_count,
+                run_time=run_time,
+                processes=processes,
+                loadgen_cpu=monitor.report(),
+            )
+    if monitor.saturated:
+        logger.warning(
+            "Load generator CPU was saturated for %s/%s samples of '%s' (peak %.0f%%); "
+            "its latency and RPS reflect Locust's limits, not the gateway's. "
+            "Set LOCUST_PROCESSES higher or run on a larger machine.",
+            monitor.saturated_samples,
+            monitor.samples,
+            scenario,
+            monitor.peak_cpu_pct,
+        )
+
+    if summary is not None and baseline_dir and tolerances is not None:
+        _locust_stats.check_baseline(scenario, summary, Path(baseline_dir), tolerances)
 
 
-__all__ = ["build_test_environment", "run_locust"]
+__all__ = [
+    "EnvironmentDiscoveryError",
+    "build_test_environment",
+    "e2e_results_dir",
+    "e2e_run_dir",
+    "locust_processes",
+    "run_locust",
+]
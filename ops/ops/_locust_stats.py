@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SUFFIX = ".summary.json"
+AGGREGATED = "Aggregated"
+_PERCENTILES = {"p50": "50%", "p90": "90%", "p95": "95%", "p99": "99%"}
+
+
+class PerformanceRegressionError(RuntimeError):
+    """Raised when a scenario's Locust stats regress past the baseline tolerances."""
+
+
+@dataclass(frozen=True)
+class Tolerances:
+    # Relative increase allowed over the baseline percentile.
+    p95: float = 0.25
+    p99: float = 0.35
+    # Absolute increase allowed in the failure ratio.
+    error_rate: float = 0.01
+    # Relative drop allowed below the baseline requests/s.
+    throughput: float = 0.15
+    # Latency increases smaller than this never count (run-to-run noise on
+    # fast routes is larger than any relative tolerance).
+    latency_floor_ms: float = 25.0
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> Tolerances:
+        def _value(name: str, default: float) -> float:
+            raw = env.get(name) or os.environ.get(name)
+            try:
+                return max(0.0, float(raw)) if raw else default
+            except ValueError:
+                logger.warning("Ignoring invalid %s=%r", name, raw)
+                return default
+
+        defaults = cls()
+        return cls(
+            p95=_value("E2E_TOLERANCE_P95", defaults.p95),
+            p99=_value("E2E_TOLERANCE_P99", defaults.p99),
+            error_rate=_value("E2E_TOLERANCE_ERROR_RATE", defaults.error_rate),
+            throughput=_value("E2E_TOLERANCE_THROUGHPUT", defaults.throughput),
+            latency_floor_ms=_value(
+                "E2E_TOLERANCE_LATENCY_FLOOR_MS", defaults.latency_floor_ms
+            ),
+        )
+
+
+def _number(value: str | None) -> float | None:
+    if value is None or value in ("", "N/A"):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _row_summary(row: Mapping[str, str]) -> dict[str, Any]:
+    requests = int(_number(row.get("Request Count")) or 0)
+    failures = int(_number(row.get("Failure Count")) or 0)
+    latency = {name: _number(row.get(column)) for name, column in _PERCENTILES.items()}
+    latency["avg"] = _number(row.get("Average Response Time"))
+    latency["max"] = _number(row.get("Max Response Time"))
+    return {
+        "requests": requests,
+        "failures": failures,
+        "error_rate": round(failures / requests, 6) if requests else 0.0,
+        "throughput_rps": round(_number(row.get("Requests/s")) or 0.0, 3),
+        "latency_ms": latency,
+    }
+
+
+def summarize_csv(csv_prefix: Path, **metadata: Any) -> dict[str, Any]:
+    """
+    Normalize the files written by `locust --csv <prefix>` into one summary:
+    the Aggregated row, one entry per request name and the failure reasons.
+    """
+    stats_path = Path(f"{csv_prefix}_stats.csv")
+    with stats_path.open(encoding="utf-8", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    overall: dict[str, Any] | None = None
+    endpoints: dict[str, Any] = {}
+    for row in rows:
+        if row.get("Name") == AGGREGATED:
+            overall = _row_summary(row)
+        else:
+            key = " ".join(part for part in (row.get("Type"), row.get("Name")) if part)
+            endpoints[key] = _row_summary(row)
+    if overall is None:
+        raise ValueError(f"No '{AGGREGATED}' row in {stats_path}")
+
+    failure_reasons: list[dict[str, Any]] = []
+    failures_path = Path(f"{csv_prefix}_failures.csv")
+    if failures_path.exists():
+        with failures_path.open(encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                failure_reasons.append(
+                    {
+                        "method": row.get("Method"),
+                        "name": row.get("Name"),
+                        "error": row.get("Error"),
+                        "occurrences": int(_number(row.get("Occurrences")) or 0),
+                    }
+                )
+    return {
+        **metadata,
+        **overall,
+        "endpoints": endpoints,
+        "failures_by_reason": failure_reasons,
+    }
+
+
+def history(csv_prefix: Path) -> list[dict[str, Any]]:
+    """
+    The Aggregated rows of `<prefix>_stats_history.csv`: one point every few
+    seconds with the user count, current requests/s and the percentiles of
+    the most recent window.
+    """
+    path = Path(f"{csv_prefix}_stats_history.csv")
+    if not path.exists():
+        return []
+    points: list[dict[str, Any]] = []
+    with path.open(encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            if row.get("Name") != AGGREGATED:
+                continue
+            timestamp = _number(row.get("Timestamp"))
+            if timestamp is None:
+                continue
+            points.append(
+                {
+                    "timestamp": timestamp,
+                    "users": int(_number(row.get("User Count")) or 0),
+                    "rps": _number(row.get("Requests/s")) or 0.0,
+                    "failures_per_s": _number(row.get("Failures/s")) or 0.0,
+                    "p50_ms": _number(row.get("50%")),
+                    "p95_ms": _number(row.get("95%")),
+                    "p99_ms": _number(row.get("99%")),
+                }
+            )
+    return points
+
+
+def write_summary(path: Path, summary: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+
+
+def load_summary(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(
+    current: Mapping[str, Any], baseline: Mapping[str, Any], tolerances: Tolerances
+) -> list[str]:
+    """Human-readable regressions of `current` against `baseline` (empty if none)."""
+    regressions: list[str] = []
+    for name, tolerance in (("p95", tolerances.p95), ("p99", tolerances.p99)):
+        before = baseline["latency_ms"].get(name)
+        after = current["latency_ms"].get(name)
+        if before is None or after is None:
+            continue
+        limit = max(before * (1 + tolerance), before + tolerances.latency_floor_ms)
+        if after > limit:
+            regressions.append(
+                f"{name} latency {after:.0f}ms > {limit:.0f}ms (baseline {before:.0f}ms)"
+            )
+
+    limit = baseline["error_rate"] + tolerances.error_rate
+    if current["error_rate"] > limit:
+        regressions.append(
+            f"error rate {current['error_rate']:.2%} > {limit:.2%} "
+            f"(baseline {baseline['error_rate']:.2%})"
+        )
+
+    before = baseline["throughput_rps"]
+    limit = before * (1 - tolerances.throughput)
+    if before > 0 and current["throughput_rps"] < limit:
+        regressions.append(
+            f"throughput {current['throughput_rps']:.1f} rps < {limit:.1f} rps "
+            f"(baseline {before:.1f} rps)"
+        )
+    return regressions
+
+
+def check_baseline(
+    scenario: str,
+    summary: Mapping[str, Any],
+    baseline_dir: Path,
+    tolerances: Tolerances,
+) -> None:
+    baseline_path = baseline_dir / f"{scenario}{SUMMARY_SUFFIX}"
+    if not baseline_path.exists():
+        logger.info(
+            "No baseline for '%s' in %s; skipping regression check",
+            scenario,
+            baseline_dir,
+        )
+        return
+    regressions = compare(summary, load_summary(baseline_path), tolerances)
+    if regressions:
+        raise PerformanceRegressionError(
+            f"Scenario '{scenario}' regressed against {baseline_path}:\n  - "
+            + "\n  - ".join(regressions)
+        )
+    logger.info("Scenario '%s' is within tolerance of %s", scenario, baseline_path)
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import hmac
 import json
 import logging
+import os
 import subprocess
-from typing import Iterable, Mapping
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Mapping, Sequence, TypeVar
 
 from tenacity import (  # type: ignore[import-not-found]
     before_sleep_log,
@@ -23,10 +28,18 @@ from ._deploy_common import (
     resolve_paths,
     state_key,
 )
+from ._telemetry import traced
 from ._utils import run_logged
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Key Vault writes are independent; run this many az processes at once.
+# Override with OPS_SECRET_CONCURRENCY.
+SECRET_MAX_WORKERS = 8
+
 PLACEHOLDER_VALUE = "pending-foundry"
 PLACEHOLDER_TAGS: dict[str, str] = {"source": "pending", "provenance": "workload"}
 FOUNDATION_TAGS: dict[str, str] = {"source": "foundry"}
@@ -53,16 +66,22 @@ def _is_forbidden_by_rbac(exc: subprocess.CalledProcessError) -> bool:
 def _is_forbidden_by_connection(exc: subprocess.CalledProcessError) -> bool:
     msg = (exc.stderr or "") + (exc.stdout or "")
     lowered = msg.lower()
-    return "forbiddenbyconnection" in lowered or "public network access is disabled" in lowered
+    return (
+        "forbiddenbyconnection" in lowered
+        or "public network access is disabled" in lowered
+    )
 
 
-@retry(
+_retry_rbac_propagation = retry(
     reraise=True,
     retry=retry_if_exception_type(RbacPropagationError),
     stop=stop_after_attempt(8),
     wait=wait_exponential(multiplier=1, min=2, max=30),
     before_sleep=before_sleep_log(logger, logging.WARNING),
 )
+
+
+@_retry_rbac_propagation
 def set_secret_with_retry(
     vault_name: str,
     secret_name: str,
@@ -87,8 +106,11 @@ def set_secret_with_retry(
                 "--value",
                 value,
                 *tag_args,
+                "-o",
+                "none",
             ],
             capture_output=True,
+            echo="on_error",
         )
     except subprocess.CalledProcessError as exc:
         if _is_forbidden_by_rbac(exc):
@@ -98,6 +120,7 @@ def set_secret_with_retry(
         raise
 
 
+@_retry_rbac_propagation
 def _read_existing_secret(
     vault_name: str, secret_name: str
 ) -> tuple[str | None, dict[str, str]]:
@@ -118,6 +141,8 @@ def _read_existing_secret(
                 "json",
             ],
             capture_output=True,
+            # The response carries the secret value; never echo it.
+            echo="never",
         )
     except subprocess.CalledProcessError as exc:
         msg = (exc.stderr or "") + (exc.stdout or "")
@@ -133,6 +158,96 @@ def _read_existing_secret(
     return parsed.get("value"), parsed.get("tags") or {}
 
 
+def _secret_digest(value: str) -> bytes:
+    return hashlib.sha256(value.encode("utf-8")).digest()
+
+
+def _same_value(existing: str | None, desired: str) -> bool:
+    """Compare secret values by digest so plaintext is never compared directly."""
+    if existing is None:
+        return False
+    return hmac.compare_digest(_secret_digest(existing), _secret_digest(desired))
+
+
+def _secret_workers() -> int:
+    raw = os.getenv("OPS_SECRET_CONCURRENCY", "")
+    try:
+        return max(1, int(raw)) if raw else SECRET_MAX_WORKERS
+    except ValueError:
+        logger.warning("Ignoring invalid OPS_SECRET_CONCURRENCY=%r", raw)
+        return SECRET_MAX_WORKERS
+
+
+def _map_bounded(func: Callable[[T], R], items: Sequence[T]) -> list[R]:
+    """
+    Apply func to every item on a bounded pool, returning results in order.
+
+    The first item runs on its own: while a fresh role assignment is still
+    propagating, it waits that out through the RBAC retry once instead of
+    every worker backing off in parallel. The first failure cancels the
+    items that have not started and is re-raised.
+    """
+    if not items:
+        return []
+    results = [func(items[0])]
+    rest = items[1:]
+    if not rest:
+        return results
+
+    workers = min(_secret_workers(), len(rest))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="keyvault")
+    try:
+        futures: list[Future[R]] = [
+            # copy_context keeps the caller's output prefix/log file on workers.
+            pool.submit(contextvars.copy_context().run, func, item)
+            for item in rest
+        ]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            if future in done and future.exception() is not None:
+                raise future.exception()  # type: ignore[misc]
+        results.extend(future.result() for future in futures)
+        return results
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@traced("sync_secrets")
+def sync_secrets(
+    vault_name: str,
+    secrets: Mapping[str, str],
+    *,
+    tags: Mapping[str, str] | None = None,
+) -> dict[str, list[str]]:
+    """
+    Write secrets to Key Vault concurrently, skipping those whose current value
+    (compared by SHA-256) and tags already match.
+
+    Returns a summary dict with keys: written, unchanged.
+    """
+
+    def _sync(item: tuple[str, str]) -> tuple[str, bool]:
+        name, value = item
+        existing_value, existing_tags = _read_existing_secret(vault_name, name)
+        if _same_value(existing_value, value) and all(
+            existing_tags.get(key) == val for key, val in (tags or {}).items()
+        ):
+            return name, False
+        set_secret_with_retry(vault_name, name, value, tags=tags)
+        return name, True
+
+    summary: dict[str, list[str]] = {"written": [], "unchanged": []}
+    for name, written in _map_bounded(_sync, list(secrets.items())):
+        summary["written" if written else "unchanged"].append(name)
+    logger.info(
+        "Key Vault %s: wrote %d secret(s), %d unchanged",
+        vault_name,
+        len(summary["written"]),
+        len(summary["unchanged"]),
+    )
+    return summary
+
+
 def _load_foundry_outputs(
     _env: str,
     *,
@@ -172,6 +287,7 @@ def _dedupe_preserve_order(items: Iterable[str]) -> list[str]:
     return ordered
 
 
+@traced("seed_openai_secrets")
 def seed_openai_secrets(
     env: str,
     vault_name: str,
@@ -226,7 +342,8 @@ def seed_openai_secrets(
         "skipped": [],
     }
 
-    for idx, name in enumerate(candidate_names):
+    def _sync(item: tuple[int, str]) -> tuple[str, str]:
+        idx, name = item
         desired_value = (
             provisioned_values[idx] if has_real_values else placeholder_value
         )
@@ -236,23 +353,20 @@ def seed_openai_secrets(
         if (
             has_real_values
             and existing_source == "foundry"
-            and existing_value == desired_value
+            and _same_value(existing_value, desired_value)
         ):
-            summary["unchanged"].append(name)
-            continue
+            return name, "unchanged"
 
         if not has_real_values and existing_source == "foundry":
             # Do not downgrade a real key with a placeholder.
-            summary["skipped"].append(name)
-            continue
+            return name, "skipped"
 
         if (
             not has_real_values
             and existing_source == "pending"
-            and existing_value == desired_value
+            and _same_value(existing_value, desired_value)
         ):
-            summary["unchanged"].append(name)
-            continue
+            return name, "unchanged"
 
         set_secret_with_retry(
             vault_name,
@@ -260,7 +374,9 @@ def seed_openai_secrets(
             desired_value,
             tags=desired_source_tags,
         )
-        bucket = "seeded" if has_real_values else "placeholders"
+        return name, "seeded" if has_real_values else "placeholders"
+
+    for name, bucket in _map_bounded(_sync, list(enumerate(candidate_names))):
         summary[bucket].append(name)
 
     if has_real_values:
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import re
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Collection, Iterable, Iterator, Mapping, NamedTuple
+
+DEFAULT_TIMEOUT_SECONDS = 5.0
+RECORDING_FORMAT = "ops-prometheus-v1"
+
+# APISIX's exporter names these counters without a `_total` suffix. The OTel
+# collector adds it on the way to Azure Monitor, so the Grafana dashboard
+# queries the suffixed names.
+APISIX_HTTP_STATUS = "apisix_http_status"
+APISIX_LLM_PROMPT_TOKENS = "apisix_llm_prompt_tokens"
+APISIX_LLM_COMPLETION_TOKENS = "apisix_llm_completion_tokens"
+DASHBOARD_NAMES = {
+    APISIX_HTTP_STATUS: "apisix_http_status_total",
+    APISIX_LLM_PROMPT_TOKENS: "apisix_llm_prompt_tokens_total",
+    APISIX_LLM_COMPLETION_TOKENS: "apisix_llm_completion_tokens_total",
+}
+_NATIVE_NAMES = {dashboard: native for native, dashboard in DASHBOARD_NAMES.items()}
+
+_SAMPLE = re.compile(
+    r"^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>.*)\})?\s+(?P<value>\S+)(?:\s+\S+)?$"
+)
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+_ESCAPES = {"\\\\": "\\", '\\"': '"', "\\n": "\n"}
+
+
+class Sample(NamedTuple):
+    name: str
+    labels: Mapping[str, str]
+    value: float
+
+
+def native_name(name: str) -> str:
+    """APISIX's own name for a metric given under either naming."""
+    return _NATIVE_NAMES.get(name, name)
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return re.sub(r'\\[\\"n]', lambda match: _ESCAPES[match.group(0)], value)
+
+
+def parse_text(text: str) -> Iterator[Sample]:
+    """Samples from the Prometheus text exposition format (comments skipped)."""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if match is None:
+            continue
+        try:
+            value = float(match.group("value"))
+        except ValueError:
+            continue
+        labels = {
+            key: _unescape(raw)
+            for key, raw in _LABEL.findall(match.group("labels") or "")
+        }
+        yield Sample(match.group("name"), labels, value)
+
+
+def scrape(url: str, timeout: float = DEFAULT_TIMEOUT_SECONDS) -> list[Sample]:
+    request = urllib.request.Request(url, headers={"Accept": "text/plain"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return list(parse_text(response.read().decode("utf-8", errors="replace")))
+
+
+def histogram_quantile(
+    q: float, buckets: Iterable[tuple[float, float]]
+) -> float | None:
+    """
+    Prometheus' histogram_quantile over (upper bound, cumulative count) pairs:
+    linear interpolation inside the bucket holding the q-th observation, and
+    the highest finite bound when it lands in the +Inf bucket.
+    """
+    ordered = sorted(buckets)
+    if not ordered or ordered[-1][1] <= 0:
+        return None
+    rank = q * ordered[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, count in ordered:
+        if count >= rank:
+            if math.isinf(upper_bound):
+                return lower_bound
+            if count == lower_count:
+                return upper_bound
+            return lower_bound + (upper_bound - lower_bound) * (rank - lower_count) / (
+                count - lower_count
+            )
+        lower_bound, lower_count = upper_bound, count
+    return ordered[-1][0]
+
+
+def _family(name: str) -> str:
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return native_name(name)
+
+
+class RecordingWriter:
+    """
+    Append scrapes to a gzip JSON-lines file. Each series (name + labels,
+    with the scrape target as `instance`) is written once, the first time it
+    appears; every scrape line then carries only a timestamp and a value per
+    known series.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        targets: list[str],
+        interval_s: float,
+        families: Collection[str] | None = None,
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.families = families
+        self._index: dict[tuple[str, tuple[tuple[str, str], ...]], int] = {}
+        self._handle: IO[str] = gzip.open(path, "wt", encoding="utf-8")
+        self._write(
+            {"format": RECORDING_FORMAT, "targets": targets, "interval_s": interval_s}
+        )
+
+    def _write(self, payload: dict[str, object]) -> None:
+        self._handle.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+    def write(self, timestamp: float, scrapes: Mapping[str, list[Sample]]) -> None:
+        new: list[list[object]] = []
+        values: dict[int, float] = {}
+        for target, samples in scrapes.items():
+            for sample in samples:
+                if (
+                    self.families is not None
+                    and _family(sample.name) not in self.families
+                ):
+                    continue
+                labels = {**sample.labels, "instance": target}
+                key = (sample.name, tuple(sorted(labels.items())))
+                index = self._index.get(key)
+                if index is None:
+                    index = self._index[key] = len(self._index)
+                    new.append([sample.name, labels])
+                values[index] = sample.value
+        line: dict[str, object] = {"t": round(timestamp, 3)}
+        if new:
+            line["new"] = new
+        line["v"] = [_compact(values.get(index)) for index in range(len(self._index))]
+        self._write(line)
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _compact(value: float | None) -> float | int | None:
+    if value is None or math.isnan(value) or math.isinf(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+@dataclass
+class Recording:
+    targets: list[str]
+    interval_s: float
+    series: list[tuple[str, dict[str, str]]] = field(default_factory=list)
+    times: list[float] = field(default_factory=list)
+    # values[scrape][series]; None where the series was absent.
+    values: list[list[float | None]] = field(default_factory=list)
+
+    def column(self, index: int) -> list[float | None]:
+        return [row[index] for row in self.values]
+
+
+def read_recording(path: Path) -> Recording:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        header = json.loads(handle.readline())
+        if header.get("format") != RECORDING_FORMAT:
+            raise ValueError(f"{path} is not a {RECORDING_FORMAT} recording")
+        recording = Recording(
+            targets=header["targets"], interval_s=header["interval_s"]
+        )
+        for line in handle:
+            if not line.strip():
+                continue
+            scrape = json.loads(line)
+            for name, labels in scrape.get("new", []):
+                recording.series.append((name, labels))
+            recording.times.append(scrape["t"])
+            recording.values.append(scrape["v"])
+    width = len(recording.series)
+    recording.values = [row + [None] * (width - len(row)) for row in recording.values]
+    return recording
@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import contextvars
+import datetime as dt
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Protocol, Sequence
+
+from . import _prometheus
+from ._utils import ensure, run_logged
+
+logger = logging.getLogger(__name__)
+
+# Metric name candidates and the aggregation to read, per series.
+AZURE_METRICS: dict[str, tuple[tuple[str, ...], str]] = {
+    "replicas": (("Replicas", "ReplicaCount"), "maximum"),
+    "rps": (("Requests",), "total"),
+    "latency_ms": (("ResponseTime",), "average"),
+    "cpu_pct": (("CpuPercentage", "CpuUsagePercentage"), "average"),
+}
+APISIX_REQUESTS = _prometheus.APISIX_HTTP_STATUS
+APISIX_LATENCY_BUCKET = "apisix_http_latency_bucket"
+CLIENT_BUCKET_SECONDS = 10
+
+
+def _utc_now() -> dt.datetime:
+    return dt.datetime.now(dt.timezone.utc)
+
+
+@dataclass
+class ScalePoint:
+    at: dt.datetime
+    replicas: float | None = None
+    rps: float | None = None
+    latency_ms: float | None = None
+    cpu_pct: float | None = None
+
+    def to_dict(self, load_start: dt.datetime) -> dict[str, Any]:
+        def _round(value: float | None) -> float | None:
+            return None if value is None else round(value, 2)
+
+        return {
+            "at": self.at.isoformat(),
+            "t_s": round((self.at - load_start).total_seconds(), 1),
+            "replicas": _round(self.replicas),
+            "rps": _round(self.rps),
+            "latency_ms": _round(self.latency_ms),
+            "cpu_pct": _round(self.cpu_pct),
+        }
+
+
+class MetricSource(Protocol):
+    name: str
+    # What latency_ms holds ("avg" or "p95").
+    latency_stat: str
+    interval_s: float
+
+    def poll(self, start: dt.datetime, end: dt.datetime) -> list[ScalePoint]: ...
+
+
+class AzureMonitorSource:
+    """Per-minute gateway metrics of the container app from Azure Monitor."""
+
+    name = "azure-monitor"
+    latency_stat = "avg"
+    interval_s = 60.0
+
+    def __init__(self, resource_id: str) -> None:
+        self.resource_id = resource_id
+        self._metrics: dict[str, tuple[str, str]] | None = None
+
+    def _resolve(self) -> dict[str, tuple[str, str]]:
+        if self._metrics is None:
+            ensure(["az"])
+            result = run_logged(
+                [
+                    "az",
+                    "monitor",
+                    "metrics",
+                    "list-definitions",
+                    "--resource",
+                    self.resource_id,
+                    "--query",
+                    "[].name.value",
+                    "-o",
+                    "json",
+                ],
+                capture_output=True,
+                echo="on_error",
+            )
+            defined = set(json.loads(result.stdout))
+            self._metrics = {}
+            for key, (candidates, aggregation) in AZURE_METRICS.items():
+                name = next((name for name in candidates if name in defined), None)
+                if name is not None:
+                    self._metrics[key] = (name, aggregation)
+        return self._metrics
+
+    def poll(self, start: dt.datetime, end: dt.datetime) -> list[ScalePoint]:
+        metrics = self._resolve()
+        if not metrics:
+            return []
+        result = run_logged(
+            [
+                "az",
+                "monitor",
+                "metrics",
+                "list",
+                "--resource",
+                self.resource_id,
+                "--metrics",
+                *(name for name, _ in metrics.values()),
+                "--interval",
+                "PT1M",
+                "--aggregation",
+                "Maximum",
+                "Total",
+                "Average",
+                "--start-time",
+                start.isoformat(),
+                "--end-time",
+                end.isoformat(),
+                "-o",
+                "json",
+            ],
+            capture_output=True,
+            echo="on_error",
+        )
+        by_name = {
+            name: (key, aggregation) for key, (name, aggregation) in metrics.items()
+        }
+        points: dict[dt.datetime, ScalePoint] = {}
+        for metric in json.loads(result.stdout).get("value", []):
+            key, aggregation = by_name.get(
+                metric.get("name", {}).get("value"), (None, "")
+            )
+            if key is None:
+                continue
+            for timeseries in metric.get("timeseries", []):
+                for sample in timeseries.get("data", []):
+                    value = sample.get(aggregation)
+                    if value is None:
+                        continue
+                    at = dt.datetime.fromisoformat(
+                        sample["timeStamp"].replace("Z", "+00:00")
+                    )
+                    point = points.setdefault(at, ScalePoint(at=at))
+                    if key == "rps":
+                        value = float(value) / 60
+                    setattr(point, key, float(value))
+        return sorted(points.values(), key=lambda point: point.at)
+
+
+class PrometheusSource:
+    """
+    Stand-in mode: scrape APISIX's Prometheus endpoint on each gateway
+    replica directly. Replicas is the number of endpoints that answered.
+    """
+
+    name = "prometheus"
+    latency_stat = "p95"
+    interval_s = 5.0
+
+    def __init__(self, urls: Sequence[str]) -> None:
+        self.urls = list(urls)
+        self._previous: tuple[dt.datetime, float, dict[float, float]] | None = None
+
+    def poll(self, start: dt.datetime, end: dt.datetime) -> list[ScalePoint]:
+        now = _utc_now()
+        answered = 0
+        requests = 0.0
+        buckets: dict[float, float] = {}
+        for url in self.urls:
+            try:
+                samples = _prometheus.scrape(url)
+            except OSError as exc:
+                logger.debug("Scrape of %s failed: %s", url, exc)
+                continue
+            answered += 1
+            for sample in samples:
+                if _prometheus.native_name(sample.name) == APISIX_REQUESTS:
+                    requests += sample.value
+                elif sample.name == APISIX_LATENCY_BUCKET and sample.labels.get(
+                    "type"
+                ) in (
+                    None,
+                    "request",
+                ):
+                    le = float(sample.labels.get("le", "+Inf"))
+                    buckets[le] = buckets.get(le, 0.0) + sample.value
+        previous, self._previous = self._previous, (now, requests, buckets)
+        point = ScalePoint(at=now, replicas=float(answered))
+        if previous is not None:
+            before, before_requests, before_buckets = previous
+            elapsed = (now - before).total_seconds()
+            # Counters restart with a replica; a negative delta is skipped.
+            if elapsed > 0 and requests >= before_requests:
+                point.rps = (requests - before_requests) / elapsed
+            point.latency_ms = _prometheus.histogram_quantile(
+                0.95,
+                (
+                    (le, max(0.0, count - before_buckets.get(le, 0.0)))
+                    for le, count in buckets.items()
+                ),
+            )
+        return [point]
+
+
+class ScaleSampler:
+    """
+    Poll a metric source from a background thread while load runs, keeping
+    one point per timestamp (Azure Monitor buckets are refreshed as they
+    fill in).
+    """
+
+    def __init__(self, source: MetricSource, *, label: str) -> None:
+        self.source = source
+        self.label = label
+        self.points: dict[dt.datetime, ScalePoint] = {}
+        self.started = _utc_now()
+        self.ended: dt.datetime | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> ScaleSampler:
+        self.started = _utc_now()
+        self.poll()
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(
+            target=context.run,
+            args=(self._run,),
+            name=f"scale-sampler-{self.label}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.ended = _utc_now()
+        self.poll()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.source.interval_s):
+            self.poll()
+
+    def poll(self) -> None:
+        # Look back a minute so the bucket containing the start is included.
+        window_start = self.started - dt.timedelta(minutes=1)
+        try:
+            polled = self.source.poll(window_start, _utc_now())
+        except Exception as exc:
+            logger.warning(
+                "Sampling %s for '%s' failed: %s", self.source.name, self.label, exc
+            )
+            return
+        for point in polled:
+            self.points[point.at] = point
+        if polled:
+            latest = polled[-1]
+            logger.info(
+                "[%s] replicas=%s rps=%s latency_%s=%s cpu=%s",
+                self.source.name,
+                _fmt(latest.replicas, "%.0f"),
+                _fmt(latest.rps, "%.1f"),
+                self.source.latency_stat,
+                _fmt(latest.latency_ms, "%.0fms"),
+                _fmt(latest.cpu_pct, "%.0f%%"),
+            )
+
+    def series(self) -> list[ScalePoint]:
+        return [self.points[at] for at in sorted(self.points)]
+
+
+def _fmt(value: float | None, pattern: str) -> str:
+    return "-" if value is None else pattern % value
+
+
+def _client_window(points: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    points = list(points)
+    if not points:
+        return {"points": 0}
+
+    def _max(key: str) -> float | None:
+        values = [point[key] for point in points if point[key] is not None]
+        return max(values) if values else None
+
+    return {
+        "points": len(points),
+        "mean_rps": round(sum(point["rps"] for point in points) / len(points), 2),
+        "max_failures_per_s": _max("failures_per_s"),
+        "max_p95_ms": _max("p95_ms"),
+        "max_p99_ms": _max("p99_ms"),
+    }
+
+
+def _client_series(
+    history: list[dict[str, Any]], load_start: dt.datetime
+) -> list[dict[str, Any]]:
+    """Locust's per-second history folded into CLIENT_BUCKET_SECONDS buckets."""
+    buckets: dict[int, list[dict[str, Any]]] = {}
+    for point in history:
+        offset = point["timestamp"] - load_start.timestamp()
+        buckets.setdefault(int(offset // CLIENT_BUCKET_SECONDS), []).append(point)
+    series = []
+    for index in sorted(buckets):
+        points = buckets[index]
+        window = _client_window(points)
+        series.append(
+            {
+                "t_s": index * CLIENT_BUCKET_SECONDS,
+                "users": max(point["users"] for point in points),
+                "rps": window["mean_rps"],
+                "failures_per_s": window["max_failures_per_s"],
+                "p95_ms": window["max_p95_ms"],
+                "p99_ms": window["max_p99_ms"],
+            }
+        )
+    return series
+
+
+def scale_report(
+    sampler: ScaleSampler,
+    client_history: list[dict[str, Any]],
+    *,
+    baseline_replicas: float | None,
+    required_replicas: float | None,
+) -> dict[str, Any]:
+    """
+    Time-to-scale and latency while scaling: the ramp window runs from the
+    start of load until replicas first reach their peak.
+    """
+    load_start = sampler.started
+    load_end = sampler.ended or _utc_now()
+    series = [point for point in sampler.series() if point.at <= load_end]
+    with_replicas = [point for point in series if point.replicas is not None]
+    peak = max((point.replicas for point in with_replicas), default=None)  # type: ignore[type-var]
+    if baseline_replicas is None and with_replicas:
+        baseline_replicas = with_replicas[0].replicas
+
+    def _offset(point: ScalePoint | None) -> float | None:
+        if point is None:
+            return None
+        return max(0.0, (point.at - load_start).total_seconds())
+
+    first_scale = next(
+        (
+            point
+            for point in with_replicas
+            if baseline_replicas is not None and point.replicas > baseline_replicas  # type: ignore[operator]
+        ),
+        None,
+    )
+    first_peak = next(
+        (point for point in with_replicas if point.replicas == peak), None
+    )
+    ramp_end = (
+        first_peak.at if first_scale is not None and first_peak else load_end
+    ).timestamp()
+    ramp = [point for point in client_history if point["timestamp"] < ramp_end]
+    steady = [point for point in client_history if point["timestamp"] >= ramp_end]
+
+    return {
+        "source": sampler.source.name,
+        "latency_stat": sampler.source.latency_stat,
+        "load_start": load_start.isoformat(),
+        "load_end": load_end.isoformat(),
+        "baseline_replicas": baseline_replicas,
+        "peak_replicas": peak,
+        "required_replicas": required_replicas,
+        "time_to_scale_s": _offset(first_scale),
+        "time_to_peak_s": _offset(first_peak) if first_scale is not None else None,
+        "client_ramp": _client_window(ramp),
+        "client_steady": _client_window(steady),
+        "verdict": {
+            "replicas_ok": None
+            if required_replicas is None or peak is None
+            else peak >= required_replicas,
+        },
+        "gateway_series": [point.to_dict(load_start) for point in series],
+        "client_series": _client_series(client_history, load_start),
+    }
+
+
+def log_scale_report(report: dict[str, Any]) -> None:
+    ramp, steady = report["client_ramp"], report["client_steady"]
+    logger.info(
+        "Scaling: replicas %s -> %s, time to first scale-out %s, time to peak %s",
+        report["baseline_replicas"],
+        report["peak_replicas"],
+        _fmt(report["time_to_scale_s"], "%.0fs"),
+        _fmt(report["time_to_peak_s"], "%.0fs"),
+    )
+    logger.info(
+        "Client latency during ramp: p95<=%s p99<=%s (%.1f rps); after: p95<=%s p99<=%s (%.1f rps)",
+        _fmt(ramp.get("max_p95_ms"), "%.0fms"),
+        _fmt(ramp.get("max_p99_ms"), "%.0fms"),
+        ramp.get("mean_rps", 0.0),
+        _fmt(steady.get("max_p95_ms"), "%.0fms"),
+        _fmt(steady.get("max_p99_ms"), "%.0fms"),
+        steady.get("mean_rps", 0.0),
+    )
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from ._utils import run_logged
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Remote (azurerm) entries are trusted for this many seconds before their blob
+# ETag is re-checked; local state and the az profile are validated every time.
+DEFAULT_REMOTE_TTL_SECONDS = 60.0
+# A cached no-op plan cannot see drift made outside Terraform, so it is only
+# trusted for this long before the stack is planned again.
+DEFAULT_PLAN_TTL_SECONDS = 3600.0
+
+_TERRAFORM_OUTPUT = "terraform-output"
+_REMOTE_STATE = "remote-state"
+_AZURE_CONTEXT = "azure-context"
+_NOOP_PLAN = "noop-plan"
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("OPS_CACHE", "on").strip().lower() not in {
+        "0",
+        "off",
+        "false",
+        "no",
+    }
+
+
+def cache_dir() -> Path:
+    override = os.environ.get("OPS_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "apisix-az-genai-ops"
+
+
+def _seconds_from_env(name: str, default: float) -> float:
+    raw = os.environ.get(name, "")
+    try:
+        return max(0.0, float(raw)) if raw else default
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, raw)
+        return default
+
+
+def _remote_ttl() -> float:
+    return _seconds_from_env("OPS_STATE_CACHE_TTL", DEFAULT_REMOTE_TTL_SECONDS)
+
+
+def _entry_path(namespace: str, key: str) -> Path:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return cache_dir() / f"{namespace}-{digest}.json"
+
+
+def _read_entry(path: Path, key: str) -> dict[str, Any] | None:
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get("key") != key:
+        return None
+    return entry
+
+
+def _write_entry(path: Path, entry: dict[str, Any]) -> None:
+    """Write via a private temp file and rename so readers never see partial JSON."""
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except OSError as exc:
+        logger.debug("State cache: unable to write %s (%s)", path, exc)
+
+
+def cached(
+    namespace: str,
+    key: str,
+    fingerprint: Callable[[], str | None],
+    loader: Callable[[], T],
+    *,
+    fresh_seconds: float = 0.0,
+) -> T:
+    """
+    Return the cached value for key while its fingerprint is unchanged.
+
+    fingerprint() identifies the current source version (state serial/lineage,
+    blob ETag, ...); None means it cannot be determined and bypasses the cache.
+    Entries younger than fresh_seconds are returned without re-fingerprinting.
+    """
+    if not cache_enabled():
+        return loader()
+
+    path = _entry_path(namespace, key)
+    entry = _read_entry(path, key)
+    now = time.time()
+    if (
+        entry is not None
+        and fresh_seconds > 0
+        and now - float(entry.get("stored_at", 0)) < fresh_seconds
+    ):
+        logger.debug("State cache: fresh hit for %s %s", namespace, key)
+        return entry["value"]
+
+    current = fingerprint()
+    if current is None:
+        return loader()
+
+    if entry is not None and entry.get("fingerprint") == current:
+        logger.debug("State cache: validated hit for %s %s", namespace, key)
+        value = entry["value"]
+    else:
+        value = loader()
+    _write_entry(
+        path,
+        {"key": key, "fingerprint": current, "stored_at": now, "value": value},
+    )
+    return value
+
+
+def invalidate(namespace: str, key: str) -> None:
+    try:
+        _entry_path(namespace, key).unlink(missing_ok=True)
+    except OSError as exc:
+        logger.debug(
+            "State cache: unable to invalidate %s %s (%s)", namespace, key, exc
+        )
+
+
+def _local_state_fingerprint(state_path: Path) -> str | None:
+    try:
+        parsed = json.loads(state_path.read_text())
+    except (OSError, ValueError):
+        return None
+    lineage = parsed.get("lineage")
+    serial = parsed.get("serial")
+    if not lineage or serial is None:
+        return None
+    return f"local:{lineage}:{serial}"
+
+
+def _blob_etag(account: str, container: str, blob: str) -> str | None:
+    try:
+        etag = run_logged(
+            [
+                "az",
+                "storage",
+                "blob",
+                "show",
+                "--auth-mode",
+                "login",
+                "--only-show-errors",
+                "--account-name",
+                account,
+                "--container-name",
+                container,
+                "--name",
+                blob,
+                "--query",
+                "properties.etag",
+                "-o",
+                "tsv",
+            ],
+            capture_output=True,
+            echo="never",
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"azurerm:{etag}" if etag else None
+
+
+def _backend(stack_dir: Path) -> tuple[str, dict[str, Any]]:
+    tfstate_path = stack_dir / ".terraform" / "terraform.tfstate"
+    try:
+        parsed = json.loads(tfstate_path.read_text())
+    except (OSError, ValueError):
+        return "local", {}
+    backend = parsed.get("backend") or {}
+    return str(backend.get("type") or "local"), backend.get("config") or {}
+
+
+def _remote_blob(config: dict[str, Any]) -> tuple[str, str, str] | None:
+    blob = (
+        config.get("storage_account_name"),
+        config.get("container_name"),
+        config.get("key"),
+    )
+    if all(isinstance(value, str) and value for value in blob):
+        return blob  # type: ignore[return-value]
+    return None
+
+
+def _stack_key(stack_dir: Path) -> str:
+    workspace = os.environ.get("TF_WORKSPACE", "default")
+    return f"{stack_dir.resolve()}#{workspace}"
+
+
+def _remote_key(account: str, container: str, blob: str) -> str:
+    return f"{account}/{container}/{blob}"
+
+
+def _state_fingerprint(stack_dir: Path) -> Callable[[], str | None] | None:
+    backend_type, config = _backend(stack_dir)
+    if backend_type == "local":
+        state_path = Path(config.get("path") or "terraform.tfstate")
+        if not state_path.is_absolute():
+            state_path = stack_dir / state_path
+        return partial(_local_state_fingerprint, state_path)
+    if backend_type == "azurerm" and (blob := _remote_blob(config)) is not None:
+        return partial(_blob_etag, *blob)
+    return None
+
+
+def terraform_outputs(
+    stack_dir: Path, loader: Callable[[], dict[str, Any]]
+) -> dict[str, Any]:
+    """Cache `terraform output -json` for a stack, keyed by its current state version."""
+    fingerprint = _state_fingerprint(stack_dir)
+    if fingerprint is None:
+        return loader()
+    fresh_seconds = _remote_ttl() if _backend(stack_dir)[0] == "azurerm" else 0.0
+    return cached(
+        _TERRAFORM_OUTPUT,
+        _stack_key(stack_dir),
+        fingerprint,
+        loader,
+        fresh_seconds=fresh_seconds,
+    )
+
+
+def remote_state_outputs(
+    account: str,
+    container: str,
+    blob: str,
+    loader: Callable[[], dict[str, Any]],
+) -> dict[str, Any]:
+    """Cache outputs read from a remote state blob, keyed by the blob ETag."""
+    return cached(
+        _REMOTE_STATE,
+        _remote_key(account, container, blob),
+        partial(_blob_etag, account, container, blob),
+        loader,
+        fresh_seconds=_remote_ttl(),
+    )
+
+
+def invalidate_stack(stack_dir: Path) -> None:
+    """Drop every cached view of a stack's state (call after terraform apply)."""
+    invalidate(_TERRAFORM_OUTPUT, _stack_key(stack_dir))
+    backend_type, config = _backend(stack_dir)
+    if backend_type == "azurerm" and (blob := _remote_blob(config)) is not None:
+        invalidate(_REMOTE_STATE, _remote_key(*blob))
+
+
+def _plan_fingerprint(stack_dir: Path, inputs_digest: str) -> str | None:
+    state_fingerprint = _state_fingerprint(stack_dir)
+    current = state_fingerprint() if state_fingerprint is not None else None
+    return f"{inputs_digest}:{current}" if current is not None else None
+
+
+def noop_plan_cached(stack_dir: Path, inputs_digest: str) -> bool:
+    """
+    True when the last plan for these exact inputs (tfvars, module sources,
+    TF_VAR_ environment) and this state version reported no changes.
+    """
+    if not cache_enabled():
+        return False
+    key = _stack_key(stack_dir)
+    entry = _read_entry(_entry_path(_NOOP_PLAN, key), key)
+    if entry is None:
+        return False
+    age = time.time() - float(entry.get("stored_at", 0))
+    if age >= _seconds_from_env("OPS_PLAN_CACHE_TTL", DEFAULT_PLAN_TTL_SECONDS):
+        return False
+    current = _plan_fingerprint(stack_dir, inputs_digest)
+    return current is not None and entry.get("fingerprint") == current
+
+
+def record_noop_plan(
+    stack_dir: Path, inputs_digest: str, summary: dict[str, Any]
+) -> None:
+    """Remember that a plan for these inputs and this state found nothing to change."""
+    if not cache_enabled():
+        return
+    current = _plan_fingerprint(stack_dir, inputs_digest)
+    if current is None:
+        return
+    key = _stack_key(stack_dir)
+    _write_entry(
+        _entry_path(_NOOP_PLAN, key),
+        {
+            "key": key,
+            "fingerprint": current,
+            "stored_at": time.time(),
+            "value": summary,
+        },
+    )
+
+
+def _azure_profile_fingerprint() -> str | None:
+    config_dir = Path(os.environ.get("AZURE_CONFIG_DIR") or Path.home() / ".azure")
+    try:
+        content = (config_dir / "azureProfile.json").read_bytes()
+    except OSError:
+        return None
+    return hashlib.sha256(content).hexdigest()
+
+
+def azure_account(loader: Callable[[], dict[str, str]]) -> dict[str, str]:
+    """Cache `az account show` until the az CLI profile (login/default subscription) changes."""
+    config_dir = os.environ.get("AZURE_CONFIG_DIR") or str(Path.home() / ".azure")
+    return cached(_AZURE_CONTEXT, config_dir, _azure_profile_fingerprint, loader)
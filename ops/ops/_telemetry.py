@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import atexit
+import datetime as dt
+import functools
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+SERVICE_NAME = "apisix-az-genai-ops"
+# Slowest span names listed in the log when a command exits.
+SUMMARY_TOP_N = 8
+
+_SUBCOMMAND = re.compile(r"^[A-Za-z][A-Za-z0-9_.-]*$")
+# "<trace id>-<span id>" handed to child ops commands (image builds run as
+# `uv run build-and-push-*`) so their spans join the parent's trace.
+TRACE_PARENT_ENV = "OPS_TRACE_PARENT"
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    thread: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    end_ns: int | None = None
+    error: str | None = None
+
+    @property
+    def duration_seconds(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e9
+
+
+class Recorder:
+    """Collects finished spans for this process; one trace per command."""
+
+    def __init__(self) -> None:
+        inherited = os.environ.get(TRACE_PARENT_ENV, "").split("-")
+        if len(inherited) == 2 and len(inherited[0]) == 32 and len(inherited[1]) == 16:
+            self.trace_id, self.root_parent_id = inherited[0], inherited[1]
+        else:
+            self.trace_id, self.root_parent_id = secrets.token_hex(16), None
+        self.started_ns = time.time_ns()
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            if not self._registered:
+                atexit.register(self.flush)
+                self._registered = True
+
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return sorted(self._spans, key=lambda span: span.start_ns)
+
+    def flush(self) -> None:
+        spans = self.spans()
+        if not spans:
+            return
+        command = _command_name()
+        try:
+            report = self.report(command, spans)
+            path = _write_report(command, report)
+            _log_summary(report, path)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Unable to write timing report: %s", exc)
+        endpoint = os.environ.get("OPS_OTLP_ENDPOINT", "").strip()
+        if endpoint:
+            export_otlp(endpoint, command, self.trace_id, spans)
+
+    def report(self, command: str, spans: Sequence[Span]) -> dict[str, Any]:
+        ended_ns = max(span.end_ns or span.start_ns for span in spans)
+        totals: dict[str, dict[str, Any]] = {}
+        for span in spans:
+            entry = totals.setdefault(
+                span.name, {"name": span.name, "count": 0, "total_seconds": 0.0}
+            )
+            entry["count"] += 1
+            entry["total_seconds"] += span.duration_seconds
+        by_name = sorted(totals.values(), key=lambda item: -item["total_seconds"])
+        for entry in by_name:
+            entry["total_seconds"] = round(entry["total_seconds"], 3)
+        return {
+            "command": command,
+            "trace_id": self.trace_id,
+            "started_at": _iso(self.started_ns),
+            "duration_seconds": round((ended_ns - self.started_ns) / 1e9, 3),
+            "by_name": by_name,
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_offset_seconds": round(
+                        (span.start_ns - self.started_ns) / 1e9, 3
+                    ),
+                    "duration_seconds": round(span.duration_seconds, 3),
+                    "status": "error" if span.error else "ok",
+                    **({"error": span.error} if span.error else {}),
+                    "thread": span.thread,
+                    "attributes": span.attributes,
+                }
+                for span in spans
+            ],
+        }
+
+
+_RECORDER = Recorder()
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("ops_current_span", default=None)
+
+
+def enabled() -> bool:
+    return os.environ.get("OPS_TELEMETRY", "on").strip().lower() not in {
+        "0",
+        "off",
+        "false",
+        "no",
+    }
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """
+    Time a block as a span nested under the current one. Worker threads join
+    the caller's trace when submitted through contextvars.copy_context().run.
+    """
+    if not enabled():
+        yield None
+        return
+    parent = _CURRENT_SPAN.get()
+    current = Span(
+        name=name,
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent is not None else _RECORDER.root_parent_id,
+        start_ns=time.time_ns(),
+        thread=threading.current_thread().name,
+        attributes={
+            key: value for key, value in attributes.items() if value is not None
+        },
+    )
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = type(exc).__name__
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        current.end_ns = time.time_ns()
+        _RECORDER.add(current)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of span() for whole phases."""
+
+    def _decorate(func: F) -> F:
+        @functools.wraps(func)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return _wrapper  # type: ignore[return-value]
+
+    return _decorate
+
+
+def child_env(env: Mapping[str, str] | None) -> Mapping[str, str] | None:
+    """env for a subprocess, carrying the current span as its trace parent."""
+    current = _CURRENT_SPAN.get()
+    if current is None:
+        return env
+    base = os.environ if env is None else env
+    return {**base, TRACE_PARENT_ENV: f"{_RECORDER.trace_id}-{current.span_id}"}
+
+
+def command_label(cmd: Sequence[str]) -> tuple[str, dict[str, Any]]:
+    """
+    Short, secret-free span name for a subprocess: the executable and its
+    subcommand words up to the first flag ("az keyvault secret set",
+    "terraform apply"). Argument values are never recorded.
+    """
+    if not cmd:
+        return "exec", {}
+    words = [Path(cmd[0]).name]
+    attributes: dict[str, Any] = {}
+    rest = list(cmd[1:])
+    if words[0] == "terraform":
+        while rest and rest[0].startswith("-chdir="):
+            attributes["stack"] = Path(rest.pop(0).split("=", 1)[1]).name
+    if words[0].startswith("python") and rest[:1] == ["-m"] and len(rest) > 1:
+        words.append(f"-m {rest[1]}")
+        rest = rest[2:]
+    for arg in rest:
+        if len(words) >= 4 or not _SUBCOMMAND.match(arg):
+            break
+        words.append(arg)
+    return " ".join(words), attributes
+
+
+def _command_name() -> str:
+    name = Path(sys.argv[0]).name.removesuffix(".py") if sys.argv else ""
+    # `python -c`/stdin runs have no useful script name.
+    return name if name and not name.startswith("-") else "ops"
+
+
+def _iso(ns: int) -> str:
+    return dt.datetime.fromtimestamp(ns / 1e9, dt.timezone.utc).isoformat()
+
+
+def report_dir() -> Path:
+    override = os.environ.get("OPS_TIMING_DIR")
+    if override:
+        return Path(override)
+    from ._utils import repo_root
+
+    return repo_root() / ".ops-telemetry"
+
+
+def _write_report(command: str, report: dict[str, Any]) -> Path:
+    directory = report_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = directory / f"{command}-{stamp}-{os.getpid()}.json"
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def _log_summary(report: dict[str, Any], path: Path) -> None:
+    top = report["by_name"][:SUMMARY_TOP_N]
+    lines = [
+        f"  {entry['total_seconds']:8.1f}s  {entry['count']:>3}x  {entry['name']}"
+        for entry in top
+    ]
+    sys.stderr.write(
+        f"Timing report ({report['duration_seconds']:.1f}s total): {path}\n"
+        + "\n".join(lines)
+        + "\n"
+    )
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)} for key, value in attributes.items()
+    ]
+
+
+def export_otlp(
+    endpoint: str, command: str, trace_id: str, spans: Sequence[Span]
+) -> None:
+    """POST spans as OTLP/HTTP JSON to a collector (e.g. http://localhost:4318)."""
+    payload = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes(
+                        {"service.name": SERVICE_NAME, "ops.command": command}
+                    )
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "ops"},
+                        "spans": [
+                            {
+                                "traceId": trace_id,
+                                "spanId": span.span_id,
+                                **(
+                                    {"parentSpanId": span.parent_id}
+                                    if span.parent_id
+                                    else {}
+                                ),
+                                "name": span.name,
+                                "kind": 1,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                                "attributes": _otlp_attributes(
+                                    {"thread.name": span.thread, **span.attributes}
+                                ),
+                                "status": (
+                                    {"code": 2, "message": span.error}
+                                    if span.error
+                                    else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+    url = endpoint.rstrip("/")
+    if not url.endswith("/v1/traces"):
+        url = f"{url}/v1/traces"
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+    except (OSError, urllib.error.URLError) as exc:
+        logger.warning("Unable to export spans to %s: %s", url, exc)
@@ -1,15 +1,90 @@
 from __future__ import annotations
 
+import codecs
 import datetime as dt
+import locale
+import logging
+import os
 import shutil
+import signal
 import subprocess
 import sys
+import tempfile
 import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import IO, Any, Iterable, Literal, Sequence
+from typing import IO, Any, Iterable, Iterator, Literal, Sequence
+
+from ._telemetry import child_env, command_label, span
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 
+READ_CHUNK_BYTES = 64 * 1024
+# Output replayed for echo="on_error" failures (and attached to the raised
+# CalledProcessError when output is not captured), per stream.
+OUTPUT_TAIL_CHARS = 256 * 1024
+# Captured output above this size spills from memory to a temp file.
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+# Serializes echoed lines so concurrent run_logged calls do not interleave mid-line.
+_ECHO_LOCK = threading.Lock()
+# (prefix, log file) applied to run_logged output in the current context; set
+# by output_context so concurrent deploy steps keep their output apart.
+_OUTPUT_CONTEXT: ContextVar[tuple[str | None, IO[str] | None]] = ContextVar(
+    "ops_output_context", default=(None, None)
+)
+
+
+@contextmanager
+def output_context(prefix: str, log_file: IO[str] | None = None) -> Iterator[None]:
+    """Tag run_logged output with prefix and mirror it to log_file within the block."""
+    token = _OUTPUT_CONTEXT.set((prefix, log_file))
+    try:
+        yield
+    finally:
+        _OUTPUT_CONTEXT.reset(token)
+
+
+def current_output() -> tuple[str | None, IO[str] | None]:
+    return _OUTPUT_CONTEXT.get()
+
+
+class _OutputTagFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        prefix, _ = current_output()
+        record.output_tag = f"[{prefix}] " if prefix else ""
+        return True
+
+
+class _OutputLogHandler(logging.Handler):
+    """Mirror log records into the current output_context log file."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        _, log_file = current_output()
+        if log_file is None:
+            return
+        try:
+            log_file.write(self.format(record) + "\n")
+            log_file.flush()
+        except Exception:  # noqa: BLE001
+            self.handleError(record)
+
+
+def tag_logging_with_output_context(console_format: str = "%(message)s") -> None:
+    """
+    Prefix console log lines with the output_context prefix and mirror them
+    into its log file, as run_logged does for subprocess output.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers:
+        handler.addFilter(_OutputTagFilter())
+        handler.setFormatter(logging.Formatter("%(output_tag)s" + console_format))
+    file_handler = _OutputLogHandler()
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    root.addHandler(file_handler)
+
 
 def repo_root() -> Path:
     return REPO_ROOT
@@ -22,18 +97,63 @@ def run_logged(
     text: bool = True,
     check: bool = True,
     echo: Literal["always", "on_error", "never"] = "always",
+    prefix: str | None = None,
+    cancel: threading.Event | None = None,
     **kwargs: Any,
 ) -> subprocess.CompletedProcess[str]:
     """
     Run a subprocess, streaming stdout/stderr live while still capturing them.
-    If the process fails and echo="on_error", buffered output is replayed.
+    Output is read in chunks; captured output is spooled to a temp file once
+    it grows large. If the process fails and echo="on_error", the last
+    OUTPUT_TAIL_CHARS of each stream are replayed.
+    Echoed lines are tagged with "[prefix] " when prefix is set. When cancel is
+    set while capturing, the process runs in its own session and its whole
+    process group is terminated. Inside output_context the context prefix is
+    prepended and echoed output is also written to the context log file.
+    Every call is recorded as a telemetry span named after the command.
     """
     if not text:
         raise ValueError("run_logged supports text mode only")
 
     cmd_list: Sequence[str] = list(cmd)
+    label, attributes = command_label(cmd_list)
+    with span(label, **attributes) as current:
+        if current is not None:
+            kwargs["env"] = child_env(kwargs.get("env"))
+        try:
+            result = _run_logged(
+                cmd_list,
+                capture_output=capture_output,
+                check=check,
+                echo=echo,
+                prefix=prefix,
+                cancel=cancel,
+                **kwargs,
+            )
+        except subprocess.CalledProcessError as exc:
+            if current is not None:
+                current.attributes["exit_code"] = exc.returncode
+            raise
+        if current is not None:
+            current.attributes["exit_code"] = result.returncode
+        return result
+
 
-    if not capture_output:
+def _run_logged(
+    cmd_list: Sequence[str],
+    *,
+    capture_output: bool,
+    check: bool,
+    echo: Literal["always", "on_error", "never"],
+    prefix: str | None,
+    cancel: threading.Event | None,
+    **kwargs: Any,
+) -> subprocess.CompletedProcess[str]:
+    context_prefix, log_file = current_output()
+    if context_prefix:
+        prefix = f"{context_prefix}/{prefix}" if prefix else context_prefix
+
+    if not capture_output and prefix is None and log_file is None:
         result = subprocess.run(
             cmd_list,
             capture_output=False,
@@ -49,70 +169,181 @@ def run_logged(
             )
         return result
 
+    if cancel is not None and os.name == "posix":
+        kwargs.setdefault("start_new_session", True)
+
+    # Binary pipes read in large chunks: per-line text reads cost a Python
+    # round trip per line, which dominates for chatty commands.
     proc = subprocess.Popen(
         cmd_list,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        text=True,
         **kwargs,
     )
+    tag = f"[{prefix}] " if prefix else ""
+    encoding = locale.getpreferredencoding(False)
+
+    def _emit(writer: IO[str], lines: Iterable[str]) -> None:
+        with _ECHO_LOCK:
+            lines = list(lines)
+            writer.writelines(f"{tag}{line}" for line in lines)
+            writer.flush()
+            if log_file is not None:
+                log_file.writelines(lines)
+                log_file.flush()
 
-    stdout_buf: list[str] = []
-    stderr_buf: list[str] = []
+    # Full output is only kept when the caller asked for it, and then in a
+    # spooled temp file; failures are replayed from a bounded tail.
+    stdout_spool = _spool() if capture_output else None
+    stderr_spool = _spool() if capture_output else None
+    stdout_tail = _OutputTail(OUTPUT_TAIL_CHARS)
+    stderr_tail = _OutputTail(OUTPUT_TAIL_CHARS)
 
-    def _reader(stream: IO[str] | None, buffer: list[str], writer: IO[str]) -> None:
+    keep_tail = echo == "on_error" or not capture_output
+
+    def _reader(
+        stream: IO[bytes] | None,
+        spool: IO[str] | None,
+        tail: _OutputTail,
+        writer: IO[str],
+    ) -> None:
         if stream is None:
             return
-        for line in iter(stream.readline, ""):
-            buffer.append(line)
-            if echo == "always":
-                writer.write(line)
-                writer.flush()
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        partial = ""
+        while True:
+            chunk = stream.read1(READ_CHUNK_BYTES)  # type: ignore[attr-defined]
+            data = decoder.decode(chunk, final=not chunk)
+            if data:
+                if spool is not None:
+                    spool.write(data)
+                if keep_tail:
+                    tail.add(data)
+                if echo == "always":
+                    lines = (partial + data).splitlines(keepends=True)
+                    partial = "" if lines[-1].endswith(("\n", "\r")) else lines.pop()
+                    if lines:
+                        _emit(writer, lines)
+            if not chunk:
+                break
+        if partial:
+            _emit(writer, [partial + "\n"])
         stream.close()
 
     threads: list[threading.Thread] = []
     threads.append(
         threading.Thread(
-            target=_reader, args=(proc.stdout, stdout_buf, sys.stdout), daemon=True
+            target=_reader,
+            args=(proc.stdout, stdout_spool, stdout_tail, sys.stdout),
+            daemon=True,
         )
     )
     threads.append(
         threading.Thread(
-            target=_reader, args=(proc.stderr, stderr_buf, sys.stderr), daemon=True
+            target=_reader,
+            args=(proc.stderr, stderr_spool, stderr_tail, sys.stderr),
+            daemon=True,
         )
     )
     for thread in threads:
         thread.start()
 
-    returncode = proc.wait()
+    if cancel is None:
+        returncode = proc.wait()
+    else:
+        while proc.poll() is None:
+            if cancel.wait(0.2):
+                _terminate(proc)
+                break
+        returncode = proc.wait()
     for thread in threads:
         thread.join()
 
     if echo == "on_error" and returncode != 0:
-        if stdout_buf:
-            sys.stdout.writelines(stdout_buf)
-            sys.stdout.flush()
-        if stderr_buf:
-            sys.stderr.writelines(stderr_buf)
-            sys.stderr.flush()
+        for tail, writer in ((stdout_tail, sys.stdout), (stderr_tail, sys.stderr)):
+            replay = tail.text()
+            if replay:
+                _emit(writer, replay.splitlines(keepends=True))
 
-    stdout_joined = "".join(stdout_buf)
-    stderr_joined = "".join(stderr_buf)
+    stdout_text = _drain(stdout_spool)
+    stderr_text = _drain(stderr_spool)
 
     completed = subprocess.CompletedProcess(
-        cmd_list,
-        returncode,
-        stdout=stdout_joined,
-        stderr=stderr_joined,
+        cmd_list, returncode, stdout=stdout_text, stderr=stderr_text
     )
 
     if check and returncode != 0:
         raise subprocess.CalledProcessError(
-            returncode, cmd_list, output=stdout_joined, stderr=stderr_joined
+            returncode,
+            cmd_list,
+            output=stdout_text if stdout_text is not None else stdout_tail.text(),
+            stderr=stderr_text if stderr_text is not None else stderr_tail.text(),
         )
     return completed
 
 
+class _OutputTail:
+    """The last `limit` characters of a stream (roughly), kept as a deque of chunks."""
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._chunks: deque[str] = deque()
+        self._size = 0
+        self._dropped = False
+
+    def add(self, data: str) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size - len(self._chunks[0]) >= self._limit:
+            self._size -= len(self._chunks.popleft())
+            self._dropped = True
+
+    def text(self) -> str:
+        data = "".join(self._chunks)
+        if len(data) > self._limit:
+            data = data[-self._limit :]
+            self._dropped = True
+        if not self._dropped:
+            return data
+        # Drop the (probably partial) first line after truncation.
+        _, newline, rest = data.partition("\n")
+        return f"... (earlier output truncated) ...\n{rest if newline else data}"
+
+
+def _spool() -> IO[str]:
+    return tempfile.SpooledTemporaryFile(  # type: ignore[return-value]
+        max_size=SPOOL_MEMORY_BYTES, mode="w+", encoding="utf-8", newline=""
+    )
+
+
+def _drain(spool: IO[str] | None) -> str | None:
+    if spool is None:
+        return None
+    with spool:
+        spool.seek(0)
+        # Match text-mode pipes, which translate platform newlines.
+        return spool.read().replace("\r\n", "\n")
+
+
+def _terminate(proc: subprocess.Popen[str], grace_seconds: float = 10.0) -> None:
+    """Terminate a process (and its process group on POSIX), killing after a grace period."""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGTERM)
+        else:
+            proc.terminate()
+        proc.wait(timeout=grace_seconds)
+    except subprocess.TimeoutExpired:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
 def ensure(commands: Iterable[str]) -> None:
     for name in commands:
         if shutil.which(name) is None:
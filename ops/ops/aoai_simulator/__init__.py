@@ -0,0 +1,23 @@
+"""Local Azure OpenAI stand-in for gateway benchmarks and failover tests."""
+
+from .config import (
+    DeploymentConfig,
+    FaultRule,
+    LatencyDistribution,
+    SimulatorConfig,
+    SimulatorConfigError,
+    load_config,
+)
+from .server import Simulator, main, serve
+
+__all__ = [
+    "DeploymentConfig",
+    "FaultRule",
+    "LatencyDistribution",
+    "Simulator",
+    "SimulatorConfig",
+    "SimulatorConfigError",
+    "load_config",
+    "main",
+    "serve",
+]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Awaitable, Callable, Mapping
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+class BadRequest(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Request:
+    method: str
+    path: str
+    query: Mapping[str, list[str]]
+    headers: Mapping[str, str]
+    body: bytes
+
+
+class ResponseWriter:
+    """Writes one HTTP/1.1 response, either whole or as a chunked stream."""
+
+    def __init__(self, writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+        self._writer = writer
+        self.keep_alive = keep_alive
+        self.started = False
+
+    def _head(self, status: int, headers: Mapping[str, str]) -> bytes:
+        reason = (
+            HTTPStatus(status).phrase if status in HTTPStatus._value2member_map_ else ""
+        )
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Connection: {'keep-alive' if self.keep_alive else 'close'}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def send(
+        self, status: int, headers: Mapping[str, str], body: bytes = b""
+    ) -> None:
+        self.started = True
+        head = self._head(status, {**headers, "Content-Length": str(len(body))})
+        self._writer.write(head + body)
+        await self._writer.drain()
+
+    async def start_stream(self, status: int, headers: Mapping[str, str]) -> None:
+        self.started = True
+        self._writer.write(
+            self._head(status, {**headers, "Transfer-Encoding": "chunked"})
+        )
+        await self._writer.drain()
+
+    async def write_chunk(self, data: bytes) -> None:
+        if data:
+            self._writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await self._writer.drain()
+
+    async def end_stream(self) -> None:
+        self._writer.write(b"0\r\n\r\n")
+        await self._writer.drain()
+
+
+Handler = Callable[[Request, ResponseWriter], Awaitable[None]]
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Mapping[str, str]) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        parts: list[bytes] = []
+        total = 0
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers end with an empty line.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(parts)
+            total += size
+            if total > MAX_BODY_BYTES:
+                raise BadRequest("request body too large")
+            parts.append(await reader.readexactly(size))
+            await reader.readline()
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise BadRequest("request body too large")
+    return await reader.readexactly(length) if length else b""
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[Request, bool] | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError as exc:
+        raise BadRequest("malformed request line") from exc
+
+    headers: dict[str, str] = {}
+    size = 0
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if size > MAX_HEADER_BYTES:
+            raise BadRequest("headers too large")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = (
+        connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    )
+    body = await _read_body(reader, headers)
+    parsed = urlsplit(target)
+    return (
+        Request(
+            method=method.upper(),
+            path=parsed.path,
+            query=parse_qs(parsed.query),
+            headers=headers,
+            body=body,
+        ),
+        keep_alive,
+    )
+
+
+async def serve_connection(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, handler: Handler
+) -> None:
+    """Serve requests on one keep-alive connection until the client closes it."""
+    try:
+        while True:
+            try:
+                parsed = await _read_request(reader)
+            except BadRequest as exc:
+                await ResponseWriter(writer, keep_alive=False).send(
+                    400, {"Content-Type": "text/plain"}, str(exc).encode()
+                )
+                return
+            if parsed is None:
+                return
+            request, keep_alive = parsed
+            response = ResponseWriter(writer, keep_alive)
+            try:
+                await handler(request, response)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                return
+            except Exception:
+                logger.exception(
+                    "Unhandled error serving %s %s", request.method, request.path
+                )
+                if response.started:
+                    return
+                await response.send(
+                    500, {"Content-Type": "text/plain"}, b"internal error"
+                )
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
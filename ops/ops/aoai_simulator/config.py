@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import math
+import random
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Literal, Mapping
+
+Operation = Literal["chat", "embeddings", "responses"]
+OPERATIONS: tuple[Operation, ...] = ("chat", "embeddings", "responses")
+DEFAULT_DEPLOYMENT = "*"
+
+
+class SimulatorConfigError(ValueError):
+    """Raised when a simulator config file or override is invalid."""
+
+
+@dataclass(frozen=True)
+class LatencyDistribution:
+    """
+    A latency distribution in milliseconds.
+
+    kind is one of constant (mean), uniform (min..max), normal (mean, stddev)
+    or lognormal (mean, stddev of the resulting distribution). Samples are
+    clamped to [min, max] when those are set.
+    """
+
+    kind: Literal["constant", "uniform", "normal", "lognormal"] = "constant"
+    mean: float = 0.0
+    stddev: float = 0.0
+    min: float = 0.0
+    max: float | None = None
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            value = self.mean
+        elif self.kind == "uniform":
+            value = rng.uniform(
+                self.min, self.max if self.max is not None else self.mean
+            )
+        elif self.kind == "normal":
+            value = rng.gauss(self.mean, self.stddev)
+        elif self.kind == "lognormal":
+            if self.mean <= 0:
+                value = 0.0
+            else:
+                # Parameterize by the distribution's own mean/stddev.
+                variance = math.log(1 + (self.stddev / self.mean) ** 2)
+                mu = math.log(self.mean) - variance / 2
+                value = rng.lognormvariate(mu, math.sqrt(variance))
+        else:  # pragma: no cover - rejected by from_value
+            raise SimulatorConfigError(f"Unknown latency kind: {self.kind}")
+        value = max(value, self.min)
+        if self.max is not None:
+            value = min(value, self.max)
+        return value
+
+    @classmethod
+    def from_value(cls, value: Any) -> LatencyDistribution:
+        """Accept a number (constant ms) or a mapping of the dataclass fields."""
+        if isinstance(value, LatencyDistribution):
+            return value
+        if isinstance(value, (int, float)):
+            return cls(kind="constant", mean=float(value))
+        if isinstance(value, Mapping):
+            distribution = cls(**_known_fields(cls, value, "latency"))
+            if distribution.kind not in ("constant", "uniform", "normal", "lognormal"):
+                raise SimulatorConfigError(f"Unknown latency kind: {distribution.kind}")
+            return distribution
+        raise SimulatorConfigError(f"Invalid latency distribution: {value!r}")
+
+
+@dataclass(frozen=True)
+class FaultRule:
+    """
+    A scripted failure.
+
+    kind="status" answers with `status` (after `delay_ms`) instead of serving
+    the request; kind="sse_error" streams normally and then emits an SSE
+    error event with `code` in place of chunk number `at_chunk` (1-based).
+    A rule applies to requests whose operation is in `operations` (all when
+    empty) while the simulator has been up for [start_s, end_s) seconds, to
+    the `skip`+1-th matching request onwards, at most `count` times, each
+    with `probability`.
+    """
+
+    kind: Literal["status", "sse_error"] = "status"
+    status: int = 429
+    code: str = "too_many_requests"
+    message: str = ""
+    retry_after_s: float | None = None
+    delay_ms: float = 0.0
+    at_chunk: int = 1
+    operations: tuple[Operation, ...] = ()
+    start_s: float = 0.0
+    end_s: float | None = None
+    skip: int = 0
+    count: int | None = None
+    probability: float = 1.0
+
+    @classmethod
+    def from_value(cls, value: Any) -> FaultRule:
+        if isinstance(value, FaultRule):
+            return value
+        if not isinstance(value, Mapping):
+            raise SimulatorConfigError(f"Invalid fault rule: {value!r}")
+        data = _known_fields(cls, value, "fault")
+        if "operations" in data:
+            data["operations"] = tuple(data["operations"])
+            unknown = set(data["operations"]) - set(OPERATIONS)
+            if unknown:
+                raise SimulatorConfigError(
+                    f"Unknown fault operation(s): {', '.join(sorted(unknown))}"
+                )
+        rule = cls(**data)
+        if rule.kind not in ("status", "sse_error"):
+            raise SimulatorConfigError(f"Unknown fault kind: {rule.kind}")
+        return rule
+
+
+@dataclass(frozen=True)
+class DeploymentConfig:
+    """Latency, capacity and fault behaviour of one simulated deployment."""
+
+    ttft_ms: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution("lognormal", mean=350, stddev=120)
+    )
+    token_ms: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution("normal", mean=15, stddev=4, min=1)
+    )
+    embeddings_ms: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution("lognormal", mean=60, stddev=20)
+    )
+    # Completion length when the request does not set max_tokens.
+    output_tokens: int = 64
+    # Tokens emitted per streamed chunk.
+    tokens_per_chunk: int = 1
+    embedding_dimensions: int = 1536
+    # 0 disables the limit.
+    tpm: int = 0
+    rpm: int = 0
+    # Azure enforces per-minute quotas over short windows; buckets hold this
+    # many seconds' worth of quota.
+    burst_seconds: float = 10.0
+    faults: tuple[FaultRule, ...] = ()
+
+    @classmethod
+    def from_value(
+        cls, value: Mapping[str, Any], base: DeploymentConfig | None = None
+    ) -> DeploymentConfig:
+        data = _known_fields(cls, value, "deployment")
+        for name in ("ttft_ms", "token_ms", "embeddings_ms"):
+            if name in data:
+                data[name] = LatencyDistribution.from_value(data[name])
+        if "faults" in data:
+            data["faults"] = tuple(
+                FaultRule.from_value(rule) for rule in data["faults"]
+            )
+        return replace(base or cls(), **data)
+
+
+@dataclass(frozen=True)
+class SimulatorConfig:
+    host: str = "127.0.0.1"
+    port: int = 8000
+    # When set, requests must carry it as `api-key` or `Authorization: Bearer`.
+    api_key: str | None = None
+    # Reported in the x-ms-region header so failover tests can tell backends apart.
+    region: str = "local"
+    seed: int | None = None
+    # Deployment name -> behaviour; "*" applies to unknown deployment names.
+    deployments: Mapping[str, DeploymentConfig] = field(
+        default_factory=lambda: {DEFAULT_DEPLOYMENT: DeploymentConfig()}
+    )
+
+    def deployment(self, name: str) -> DeploymentConfig | None:
+        return self.deployments.get(name) or self.deployments.get(DEFAULT_DEPLOYMENT)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> SimulatorConfig:
+        top = _known_fields(cls, data, "simulator")
+        raw_deployments = top.pop("deployments", None) or {}
+        if not isinstance(raw_deployments, Mapping):
+            raise SimulatorConfigError("deployments must be a mapping")
+        default = DeploymentConfig.from_value(
+            raw_deployments.get(DEFAULT_DEPLOYMENT, {})
+        )
+        deployments = {DEFAULT_DEPLOYMENT: default}
+        for name, value in raw_deployments.items():
+            if name != DEFAULT_DEPLOYMENT:
+                # Named deployments inherit the "*" settings they do not override.
+                deployments[name] = DeploymentConfig.from_value(value, base=default)
+        return cls(**top, deployments=deployments)
+
+
+def load_config(path: Path) -> SimulatorConfig:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise SimulatorConfigError(
+            f"Unable to read simulator config {path}: {exc}"
+        ) from exc
+    if not isinstance(data, Mapping):
+        raise SimulatorConfigError(f"Simulator config {path} must be a JSON object")
+    return SimulatorConfig.from_dict(data)
+
+
+def _known_fields(cls: type, value: Mapping[str, Any], label: str) -> dict[str, Any]:
+    allowed = {item.name for item in fields(cls)}
+    unknown = set(value) - allowed
+    if unknown:
+        raise SimulatorConfigError(
+            f"Unknown {label} setting(s): {', '.join(sorted(unknown))}"
+        )
+    return dict(value)
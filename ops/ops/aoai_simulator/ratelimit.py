@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+
+class TokenBucket:
+    """
+    Continuously refilled bucket; `rate_per_minute` units refill per minute
+    and at most `burst_seconds` worth of them can accumulate.
+    """
+
+    def __init__(self, rate_per_minute: int, burst_seconds: float) -> None:
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate_per_second * burst_seconds)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._level = min(
+                self.capacity, self._level + elapsed * self.rate_per_second
+            )
+            self._updated = now
+
+    def remaining(self, now: float | None = None) -> int:
+        self._refill(time.monotonic() if now is None else now)
+        return max(0, int(self._level))
+
+    def wait_seconds(self, amount: float, now: float | None = None) -> float:
+        """Seconds until `amount` units are available (0 when they already are)."""
+        self._refill(time.monotonic() if now is None else now)
+        # Requests larger than the bucket are admitted once it is full.
+        needed = min(amount, self.capacity) - self._level
+        return 0.0 if needed <= 0 else needed / self.rate_per_second
+
+    def take(self, amount: float) -> None:
+        self._level -= min(amount, self.capacity)
+
+
+@dataclass(frozen=True)
+class Admission:
+    allowed: bool
+    retry_after_s: float
+    remaining_requests: int | None
+    remaining_tokens: int | None
+    limited_by: str | None = None
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after_s)))
+
+
+class DeploymentLimiter:
+    """Azure-style RPM/TPM admission for one deployment."""
+
+    def __init__(self, rpm: int, tpm: int, burst_seconds: float) -> None:
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm > 0 else None
+
+    def admit(self, estimated_tokens: int) -> Admission:
+        now = time.monotonic()
+        waits = {}
+        if self.requests is not None:
+            waits["requests"] = self.requests.wait_seconds(1, now)
+        if self.tokens is not None:
+            waits["tokens"] = self.tokens.wait_seconds(estimated_tokens, now)
+        limited_by = max(waits, key=lambda name: waits[name]) if waits else None
+        if limited_by is not None and waits[limited_by] > 0:
+            return Admission(
+                allowed=False,
+                retry_after_s=waits[limited_by],
+                remaining_requests=self._remaining(self.requests, now),
+                remaining_tokens=self._remaining(self.tokens, now),
+                limited_by=limited_by,
+            )
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(estimated_tokens)
+        return Admission(
+            allowed=True,
+            retry_after_s=0.0,
+            remaining_requests=self._remaining(self.requests, now),
+            remaining_tokens=self._remaining(self.tokens, now),
+        )
+
+    @staticmethod
+    def _remaining(bucket: TokenBucket | None, now: float) -> int | None:
+        return bucket.remaining(now) if bucket is not None else None
@@ -0,0 +1,948 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, AsyncGenerator, Iterable, Mapping, Sequence
+
+from ._http import Request, ResponseWriter, serve_connection
+from .config import (
+    DEFAULT_DEPLOYMENT,
+    DeploymentConfig,
+    FaultRule,
+    LatencyDistribution,
+    Operation,
+    SimulatorConfig,
+    SimulatorConfigError,
+    load_config,
+)
+from .ratelimit import Admission, DeploymentLimiter
+
+logger = logging.getLogger(__name__)
+
+# Retrieved/cancelled via GET/POST /responses/{id}; oldest are evicted first.
+STORED_RESPONSES_MAX = 1000
+_WORDS = (
+    "the gateway routes each request to a healthy backend and retries on "
+    "throttling so clients see fewer errors while quota is shared fairly "
+    "across regions deployments and priority tiers"
+).split()
+_OPERATION_PATHS: dict[str, Operation] = {
+    "chat/completions": "chat",
+    "embeddings": "embeddings",
+    "responses": "responses",
+}
+_OPERATION_NAMES = {
+    "chat": "ChatCompletions_Create",
+    "embeddings": "Embeddings_Create",
+    "responses": "Responses_Create",
+}
+_DEPLOYMENT_ROUTE = re.compile(
+    r"^/openai/deployments/(?P<deployment>[^/]+)/(?P<op>chat/completions|embeddings|responses)$"
+)
+_V1_ROUTE = re.compile(r"^/openai/v1/(?P<op>chat/completions|embeddings|responses)$")
+_RESPONSE_ROUTE = re.compile(
+    r"^/openai/(?:deployments/[^/]+|v1)/responses/(?P<id>[^/]+)(?P<cancel>/cancel)?$"
+)
+
+
+@dataclass
+class _FaultState:
+    rule: FaultRule
+    seen: int = 0
+    fired: int = 0
+
+
+@dataclass(frozen=True)
+class _Call:
+    """One admitted generation request."""
+
+    deployment: str
+    config: DeploymentConfig
+    operation: Operation
+    body: Mapping[str, Any]
+    stream: bool
+    prompt_tokens: int
+    completion_tokens: int
+    admission: Admission
+
+
+def _text_tokens(value: Any) -> int:
+    """Rough prompt size: ~4 characters per token over every string in value."""
+    if isinstance(value, str):
+        return math.ceil(len(value) / 4)
+    if isinstance(value, Mapping):
+        return sum(_text_tokens(item) for key, item in value.items() if key != "role")
+    if isinstance(value, Sequence):
+        return sum(_text_tokens(item) for item in value)
+    return 0
+
+
+def _json(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _sse(payload: Any, event: str | None = None) -> bytes:
+    prefix = f"event: {event}\n" if event else ""
+    data = (
+        payload
+        if isinstance(payload, str)
+        else json.dumps(payload, separators=(",", ":"))
+    )
+    return f"{prefix}data: {data}\n\n".encode("utf-8")
+
+
+def _error_body(code: str, message: str) -> bytes:
+    return _json({"error": {"code": code, "message": message}})
+
+
+class Simulator:
+    """
+    In-process Azure OpenAI stand-in: chat completions (JSON and SSE),
+    embeddings and Responses with sampled latency, RPM/TPM token buckets and
+    scripted faults.
+    """
+
+    def __init__(self, config: SimulatorConfig) -> None:
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._limiters: dict[str, DeploymentLimiter] = {}
+        self._faults: dict[str, list[_FaultState]] = {
+            name: [_FaultState(rule) for rule in deployment.faults]
+            for name, deployment in config.deployments.items()
+        }
+        self._stored: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._vectors: dict[int, str] = {}
+        self.stats: dict[str, Counter[str]] = {}
+        self.started_at = time.monotonic()
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task[None]] = {}
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+
+    async def start(self) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(
+            self._serve_connection,
+            self.config.host,
+            self.config.port,
+            backlog=1024,
+        )
+        self.started_at = time.monotonic()
+        return self._server
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._connections[writer] = task
+        try:
+            await serve_connection(reader, writer, self.handle)
+        finally:
+            self._connections.pop(writer, None)
+
+    @property
+    def port(self) -> int:
+        if self._server is None:
+            return self.config.port
+        return int(self._server.sockets[0].getsockname()[1])
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://{self.config.host}:{self.port}"
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise hold wait_closed().
+            connections = list(self._connections.items())
+            for writer, _ in connections:
+                writer.close()
+            await asyncio.gather(
+                *(task for _, task in connections), return_exceptions=True
+            )
+            await self._server.wait_closed()
+            self._server = None
+
+    # ── control ──────────────────────────────────────────────────────────────
+
+    def _config_key(self, deployment: str) -> str:
+        return (
+            deployment if deployment in self.config.deployments else DEFAULT_DEPLOYMENT
+        )
+
+    def set_faults(self, deployment: str, rules: Iterable[FaultRule]) -> None:
+        """Replace the scripted faults of a deployment ("*" for the default)."""
+        self._faults[deployment] = [_FaultState(rule) for rule in rules]
+        if deployment not in self.config.deployments:
+            base = self.config.deployments[DEFAULT_DEPLOYMENT]
+            self.config = replace(
+                self.config,
+                deployments={**self.config.deployments, deployment: base},
+            )
+
+    def reset(self) -> None:
+        self._limiters.clear()
+        self.stats.clear()
+        for states in self._faults.values():
+            for state in states:
+                state.seen = state.fired = 0
+        self.started_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "region": self.config.region,
+            "uptime_s": round(time.monotonic() - self.started_at, 3),
+            "deployments": {
+                name: dict(counter) for name, counter in self.stats.items()
+            },
+        }
+
+    def _count(self, deployment: str, **increments: int) -> None:
+        counter = self.stats.setdefault(deployment, Counter())
+        counter.update(increments)
+
+    # ── request handling ─────────────────────────────────────────────────────
+
+    def _headers(self, deployment: str | None = None, **extra: str) -> dict[str, str]:
+        headers = {
+            "apim-request-id": str(uuid.uuid4()),
+            "x-ms-region": self.config.region,
+        }
+        if deployment:
+            headers["x-ms-deployment-name"] = deployment
+        headers.update(extra)
+        return headers
+
+    def _authorized(self, request: Request) -> bool:
+        key = self.config.api_key
+        if not key:
+            return True
+        return (
+            request.headers.get("api-key") == key
+            or request.headers.get("authorization") == f"Bearer {key}"
+        )
+
+    async def handle(self, request: Request, response: ResponseWriter) -> None:
+        path = request.path.rstrip("/") or "/"
+        if path.startswith("/_sim/"):
+            await self._handle_control(request, response, path)
+            return
+        if path == "/healthz":
+            await response.send(200, {"Content-Type": "text/plain"}, b"ok")
+            return
+        if not self._authorized(request):
+            await response.send(
+                401,
+                {"Content-Type": "application/json", **self._headers()},
+                _error_body(
+                    "401",
+                    "Access denied due to invalid subscription key or wrong API endpoint.",
+                ),
+            )
+            return
+        if path in ("/openai/models", "/openai/v1/models") and request.method == "GET":
+            await self._send_json(response, 200, self._models())
+            return
+        if match := _RESPONSE_ROUTE.match(path):
+            await self._handle_stored_response(request, response, match)
+            return
+
+        deployment: str | None = None
+        operation: Operation | None = None
+        if match := _DEPLOYMENT_ROUTE.match(path):
+            deployment = match["deployment"]
+            operation = _OPERATION_PATHS[match["op"]]
+        elif match := _V1_ROUTE.match(path):
+            operation = _OPERATION_PATHS[match["op"]]
+        if operation is None:
+            await self._send_error(response, 404, "404", "Resource not found")
+            return
+        if request.method != "POST":
+            await self._send_error(response, 405, "405", "Method not allowed")
+            return
+        try:
+            body = json.loads(request.body or b"{}")
+        except ValueError:
+            await self._send_error(
+                response, 400, "invalid_json", "Request body is not valid JSON"
+            )
+            return
+        if not isinstance(body, Mapping):
+            await self._send_error(
+                response, 400, "invalid_body", "Request body must be an object"
+            )
+            return
+        deployment = deployment or str(body.get("model") or "")
+        if not deployment:
+            await self._send_error(response, 400, "missing_model", "model is required")
+            return
+        await self._handle_generation(response, deployment, operation, body)
+
+    async def _handle_generation(
+        self,
+        response: ResponseWriter,
+        deployment: str,
+        operation: Operation,
+        body: Mapping[str, Any],
+    ) -> None:
+        key = self._config_key(deployment)
+        config = self.config.deployments[key]
+        stream = bool(body.get("stream")) and operation != "embeddings"
+        self._count(deployment, requests=1, **{f"requests_{operation}": 1})
+
+        fault = self._pick_fault(key, operation, "status", stream)
+        if fault is not None:
+            await self._send_fault(response, deployment, operation, fault)
+            return
+
+        prompt_tokens, completion_tokens, max_tokens = self._token_counts(
+            config, operation, body
+        )
+        limiter = self._limiters.get(deployment)
+        if limiter is None:
+            limiter = DeploymentLimiter(config.rpm, config.tpm, config.burst_seconds)
+            self._limiters[deployment] = limiter
+        admission = limiter.admit(prompt_tokens + max_tokens)
+        if not admission.allowed:
+            self._count(deployment, throttled=1, status_429=1)
+            await self._send_throttled(response, deployment, operation, admission)
+            return
+
+        call = _Call(
+            deployment=deployment,
+            config=config,
+            operation=operation,
+            body=body,
+            stream=stream,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            admission=admission,
+        )
+        self._count(
+            deployment, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        if operation == "embeddings":
+            await self._embeddings(response, call)
+        elif stream:
+            sse_fault = self._pick_fault(key, operation, "sse_error", stream)
+            events = (
+                self._chat_events(call)
+                if operation == "chat"
+                else self._responses_events(call)
+            )
+            await self._stream(response, call, events, sse_fault)
+        elif operation == "chat":
+            await self._chat(response, call)
+        else:
+            await self._responses(response, call)
+
+    def _token_counts(
+        self, config: DeploymentConfig, operation: Operation, body: Mapping[str, Any]
+    ) -> tuple[int, int, int]:
+        if operation == "chat":
+            prompt = _text_tokens(body.get("messages") or [])
+            requested = body.get("max_completion_tokens") or body.get("max_tokens")
+        elif operation == "responses":
+            prompt = _text_tokens(body.get("input") or "") + _text_tokens(
+                body.get("instructions") or ""
+            )
+            requested = body.get("max_output_tokens")
+        else:
+            return max(1, _text_tokens(body.get("input") or "")), 0, 0
+        completion = config.output_tokens
+        if isinstance(requested, int) and requested > 0:
+            completion = min(completion, requested)
+            # Azure counts the requested maximum against TPM up front.
+            return max(1, prompt), completion, requested
+        return max(1, prompt), completion, completion
+
+    def _pick_fault(
+        self, key: str, operation: Operation, kind: str, stream: bool
+    ) -> FaultRule | None:
+        elapsed = time.monotonic() - self.started_at
+        for state in self._faults.get(key, ()):
+            rule = state.rule
+            if rule.kind != kind or (kind == "sse_error" and not stream):
+                continue
+            if rule.operations and operation not in rule.operations:
+                continue
+            if elapsed < rule.start_s or (
+                rule.end_s is not None and elapsed >= rule.end_s
+            ):
+                continue
+            state.seen += 1
+            if state.seen <= rule.skip:
+                continue
+            if rule.count is not None and state.fired >= rule.count:
+                continue
+            if rule.probability < 1.0 and self._rng.random() >= rule.probability:
+                continue
+            state.fired += 1
+            return rule
+        return None
+
+    def _ratelimit_headers(self, admission: Admission) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if admission.remaining_requests is not None:
+            headers["x-ratelimit-remaining-requests"] = str(
+                admission.remaining_requests
+            )
+        if admission.remaining_tokens is not None:
+            headers["x-ratelimit-remaining-tokens"] = str(admission.remaining_tokens)
+        return headers
+
+    async def _send_json(
+        self,
+        response: ResponseWriter,
+        status: int,
+        payload: Any,
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        await response.send(
+            status,
+            {"Content-Type": "application/json", **self._headers(), **(headers or {})},
+            payload if isinstance(payload, bytes) else _json(payload),
+        )
+
+    async def _send_error(
+        self, response: ResponseWriter, status: int, code: str, message: str
+    ) -> None:
+        await self._send_json(response, status, _error_body(code, message))
+
+    async def _send_throttled(
+        self,
+        response: ResponseWriter,
+        deployment: str,
+        operation: Operation,
+        admission: Admission,
+        retry_after_s: float | None = None,
+    ) -> None:
+        wait_s = admission.retry_after_s if retry_after_s is None else retry_after_s
+        retry_after = str(max(1, math.ceil(wait_s)))
+        limit = "token" if admission.limited_by != "requests" else "call"
+        await self._send_json(
+            response,
+            429,
+            _error_body(
+                "429",
+                f"Requests to the {_OPERATION_NAMES[operation]} Operation under Azure "
+                f"OpenAI API have exceeded {limit} rate limit of your current pricing "
+                f"tier. Please retry after {retry_after} seconds.",
+            ),
+            {
+                "Retry-After": retry_after,
+                "retry-after-ms": str(max(1, math.ceil(wait_s * 1000))),
+                "x-ms-deployment-name": deployment,
+                **self._ratelimit_headers(admission),
+            },
+        )
+
+    async def _send_fault(
+        self,
+        response: ResponseWriter,
+        deployment: str,
+        operation: Operation,
+        rule: FaultRule,
+    ) -> None:
+        self._count(deployment, faults_status=1, **{f"status_{rule.status}": 1})
+        if rule.delay_ms > 0:
+            await asyncio.sleep(rule.delay_ms / 1000)
+        if rule.status == 429:
+            retry_after = rule.retry_after_s if rule.retry_after_s is not None else 1.0
+            await self._send_throttled(
+                response,
+                deployment,
+                operation,
+                Admission(False, retry_after, 0, 0, "tokens"),
+                retry_after,
+            )
+            return
+        code = rule.code if rule.code != "too_many_requests" else str(rule.status)
+        message = (
+            rule.message or "The server had an error while processing your request."
+        )
+        headers = {"x-ms-deployment-name": deployment}
+        if rule.retry_after_s is not None:
+            headers["Retry-After"] = str(max(1, math.ceil(rule.retry_after_s)))
+        await self._send_json(
+            response, rule.status, _error_body(code, message), headers
+        )
+
+    # ── latency ──────────────────────────────────────────────────────────────
+
+    def _sample_s(self, distribution: LatencyDistribution) -> float:
+        return distribution.sample_ms(self._rng) / 1000.0
+
+    def _chunks(self, call: _Call) -> list[str]:
+        per_chunk = max(1, call.config.tokens_per_chunk)
+        words = [
+            _WORDS[index % len(_WORDS)] + " " for index in range(call.completion_tokens)
+        ]
+        return [
+            "".join(words[i : i + per_chunk]) for i in range(0, len(words), per_chunk)
+        ]
+
+    async def _generation_delay(self, call: _Call) -> None:
+        delay = self._sample_s(call.config.ttft_ms)
+        delay += sum(
+            self._sample_s(call.config.token_ms)
+            for _ in range(max(0, call.completion_tokens - 1))
+        )
+        await asyncio.sleep(delay)
+
+    # ── payloads ─────────────────────────────────────────────────────────────
+
+    def _usage(self, call: _Call) -> dict[str, int]:
+        return {
+            "prompt_tokens": call.prompt_tokens,
+            "completion_tokens": call.completion_tokens,
+            "total_tokens": call.prompt_tokens + call.completion_tokens,
+        }
+
+    def _response_usage(self, call: _Call) -> dict[str, Any]:
+        return {
+            "input_tokens": call.prompt_tokens,
+            "output_tokens": call.completion_tokens,
+            "total_tokens": call.prompt_tokens + call.completion_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+        }
+
+    def _success_headers(self, call: _Call, content_type: str) -> dict[str, str]:
+        return {
+            "Content-Type": content_type,
+            **self._headers(call.deployment),
+            **self._ratelimit_headers(call.admission),
+        }
+
+    async def _chat(self, response: ResponseWriter, call: _Call) -> None:
+        await self._generation_delay(call)
+        self._count(call.deployment, status_200=1)
+        payload = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": call.deployment,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": "".join(self._chunks(call)).strip(),
+                    },
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": self._usage(call),
+        }
+        await response.send(
+            200, self._success_headers(call, "application/json"), _json(payload)
+        )
+
+    def _response_object(
+        self, call: _Call, response_id: str, status: str, text: str
+    ) -> dict[str, Any]:
+        return {
+            "id": response_id,
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": status,
+            "model": call.deployment,
+            "output": (
+                [
+                    {
+                        "type": "message",
+                        "id": f"msg_{response_id[5:]}",
+                        "status": "completed",
+                        "role": "assistant",
+                        "content": [
+                            {"type": "output_text", "text": text, "annotations": []}
+                        ],
+                    }
+                ]
+                if text
+                else []
+            ),
+            "usage": self._response_usage(call) if status == "completed" else None,
+        }
+
+    def _store(self, call: _Call, payload: dict[str, Any]) -> None:
+        if call.body.get("store") is False:
+            return
+        self._stored[payload["id"]] = payload
+        while len(self._stored) > STORED_RESPONSES_MAX:
+            self._stored.popitem(last=False)
+
+    async def _responses(self, response: ResponseWriter, call: _Call) -> None:
+        await self._generation_delay(call)
+        self._count(call.deployment, status_200=1)
+        payload = self._response_object(
+            call,
+            f"resp_{uuid.uuid4().hex}",
+            "completed",
+            "".join(self._chunks(call)).strip(),
+        )
+        self._store(call, payload)
+        await response.send(
+            200, self._success_headers(call, "application/json"), _json(payload)
+        )
+
+    def _vector(self, dimensions: int) -> str:
+        # Embedding values are irrelevant to the gateway; encode one vector per
+        # size once so large batches do not cost JSON encoding per request.
+        vector = self._vectors.get(dimensions)
+        if vector is None:
+            rng = random.Random(dimensions)
+            vector = json.dumps(
+                [round(rng.uniform(-0.1, 0.1), 6) for _ in range(dimensions)]
+            )
+            self._vectors[dimensions] = vector
+        return vector
+
+    async def _embeddings(self, response: ResponseWriter, call: _Call) -> None:
+        await asyncio.sleep(self._sample_s(call.config.embeddings_ms))
+        self._count(call.deployment, status_200=1)
+        inputs = call.body.get("input")
+        count = (
+            len(inputs)
+            if isinstance(inputs, list) and inputs and not isinstance(inputs[0], int)
+            else 1
+        )
+        requested = call.body.get("dimensions")
+        dimensions = (
+            requested
+            if isinstance(requested, int) and requested > 0
+            else call.config.embedding_dimensions
+        )
+        vector = self._vector(dimensions)
+        items = ",".join(
+            f'{{"object":"embedding","index":{index},"embedding":{vector}}}'
+            for index in range(count)
+        )
+        usage = _json(
+            {"prompt_tokens": call.prompt_tokens, "total_tokens": call.prompt_tokens}
+        )
+        body = (
+            f'{{"object":"list","data":[{items}],"model":{json.dumps(call.deployment)},'
+            f'"usage":{usage.decode()}}}'
+        ).encode("utf-8")
+        await response.send(200, self._success_headers(call, "application/json"), body)
+
+    async def _chat_events(self, call: _Call) -> AsyncGenerator[bytes, None]:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        def chunk(delta: dict[str, Any], finish: str | None = None) -> bytes:
+            return _sse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": call.deployment,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+            )
+
+        await asyncio.sleep(self._sample_s(call.config.ttft_ms))
+        # Azure opens with prompt filter results before any choices.
+        yield _sse(
+            {
+                "id": "",
+                "object": "",
+                "created": 0,
+                "model": "",
+                "choices": [],
+                "prompt_filter_results": [
+                    {"prompt_index": 0, "content_filter_results": {}}
+                ],
+            }
+        )
+        for index, text in enumerate(self._chunks(call)):
+            if index:
+                await asyncio.sleep(
+                    sum(
+                        self._sample_s(call.config.token_ms)
+                        for _ in range(call.config.tokens_per_chunk)
+                    )
+                )
+            delta = {"content": text}
+            if index == 0:
+                delta = {"role": "assistant", **delta}
+            yield chunk(delta)
+        yield chunk({}, "stop")
+        stream_options = call.body.get("stream_options")
+        if isinstance(stream_options, Mapping) and stream_options.get("include_usage"):
+            yield _sse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": call.deployment,
+                    "choices": [],
+                    "usage": self._usage(call),
+                }
+            )
+        yield _sse("[DONE]")
+
+    async def _responses_events(self, call: _Call) -> AsyncGenerator[bytes, None]:
+        response_id = f"resp_{uuid.uuid4().hex}"
+        item_id = f"msg_{response_id[5:]}"
+        sequence = 0
+
+        def event(kind: str, **payload: Any) -> bytes:
+            nonlocal sequence
+            sequence += 1
+            return _sse(
+                {"type": kind, "sequence_number": sequence, **payload}, event=kind
+            )
+
+        await asyncio.sleep(self._sample_s(call.config.ttft_ms))
+        yield event(
+            "response.created",
+            response=self._response_object(call, response_id, "in_progress", ""),
+        )
+        yield event(
+            "response.in_progress",
+            response=self._response_object(call, response_id, "in_progress", ""),
+        )
+        yield event(
+            "response.output_item.added",
+            output_index=0,
+            item={
+                "type": "message",
+                "id": item_id,
+                "status": "in_progress",
+                "role": "assistant",
+                "content": [],
+            },
+        )
+        yield event(
+            "response.content_part.added",
+            item_id=item_id,
+            output_index=0,
+            content_index=0,
+            part={"type": "output_text", "text": "", "annotations": []},
+        )
+        texts: list[str] = []
+        for index, text in enumerate(self._chunks(call)):
+            if index:
+                await asyncio.sleep(
+                    sum(
+                        self._sample_s(call.config.token_ms)
+                        for _ in range(call.config.tokens_per_chunk)
+                    )
+                )
+            texts.append(text)
+            yield event(
+                "response.output_text.delta",
+                item_id=item_id,
+                output_index=0,
+                content_index=0,
+                delta=text,
+            )
+        full_text = "".join(texts).strip()
+        yield event(
+            "response.output_text.done",
+            item_id=item_id,
+            output_index=0,
+            content_index=0,
+            text=full_text,
+        )
+        completed = self._response_object(call, response_id, "completed", full_text)
+        self._store(call, completed)
+        yield event("response.completed", response=completed)
+
+    async def _stream(
+        self,
+        response: ResponseWriter,
+        call: _Call,
+        events: AsyncGenerator[bytes, None],
+        fault: FaultRule | None,
+    ) -> None:
+        started = False
+        index = 0
+        async for data in events:
+            index += 1
+            if fault is not None and index == max(1, fault.at_chunk):
+                self._count(call.deployment, faults_sse=1)
+                error = {
+                    "code": fault.code,
+                    "message": fault.message
+                    or "Rate limit is exceeded. Try again later.",
+                }
+                payload = (
+                    {"type": "error", "error": error}
+                    if call.operation == "responses"
+                    else {"error": error}
+                )
+                data = _sse(
+                    payload, event="error" if call.operation == "responses" else None
+                )
+            if not started:
+                await response.start_stream(
+                    200,
+                    {
+                        "Cache-Control": "no-cache",
+                        **self._success_headers(call, "text/event-stream"),
+                    },
+                )
+                started = True
+            await response.write_chunk(data)
+            if fault is not None and index == max(1, fault.at_chunk):
+                # Azure ends the stream after an error event.
+                await events.aclose()
+                break
+        self._count(call.deployment, status_200=1)
+        await response.end_stream()
+
+    async def _handle_stored_response(
+        self, request: Request, response: ResponseWriter, match: re.Match[str]
+    ) -> None:
+        response_id = match["id"]
+        stored = self._stored.get(response_id)
+        if stored is None:
+            await self._send_error(
+                response, 404, "not_found", f"Response {response_id} not found"
+            )
+            return
+        if request.method == "GET":
+            await self._send_json(response, 200, stored)
+        elif request.method == "DELETE":
+            del self._stored[response_id]
+            await self._send_json(
+                response,
+                200,
+                {"id": response_id, "object": "response.deleted", "deleted": True},
+            )
+        elif request.method == "POST" and match["cancel"]:
+            await self._send_json(response, 200, {**stored, "status": "cancelled"})
+        else:
+            await self._send_error(response, 405, "405", "Method not allowed")
+
+    def _models(self) -> dict[str, Any]:
+        names = [name for name in self.config.deployments if name != DEFAULT_DEPLOYMENT]
+        return {
+            "object": "list",
+            "data": [
+                {"id": name, "object": "model", "owned_by": "simulator"}
+                for name in names
+            ],
+        }
+
+    async def _handle_control(
+        self, request: Request, response: ResponseWriter, path: str
+    ) -> None:
+        if path == "/_sim/stats" and request.method == "GET":
+            await self._send_json(response, 200, self.snapshot())
+        elif path == "/_sim/reset" and request.method == "POST":
+            self.reset()
+            await self._send_json(response, 200, {"reset": True})
+        elif path == "/_sim/faults" and request.method == "POST":
+            try:
+                body = json.loads(request.body or b"{}")
+                rules = [
+                    FaultRule.from_value(rule) for rule in body.get("faults") or []
+                ]
+            except (ValueError, AttributeError, SimulatorConfigError) as exc:
+                await self._send_error(response, 400, "invalid_faults", str(exc))
+                return
+            deployment = str(body.get("deployment") or DEFAULT_DEPLOYMENT)
+            self.set_faults(deployment, rules)
+            await self._send_json(
+                response, 200, {"deployment": deployment, "faults": len(rules)}
+            )
+        else:
+            await self._send_error(
+                response, 404, "404", "Unknown simulator control endpoint"
+            )
+
+
+async def serve(config: SimulatorConfig) -> None:
+    simulator = Simulator(config)
+    await simulator.start()
+    logger.info(
+        "Azure OpenAI simulator (%s) listening on %s; deployments: %s",
+        config.region,
+        simulator.endpoint,
+        ", ".join(sorted(config.deployments)),
+    )
+    assert simulator._server is not None
+    async with simulator._server:
+        await simulator._server.serve_forever()
+
+
+def _apply_overrides(
+    config: SimulatorConfig, args: argparse.Namespace
+) -> SimulatorConfig:
+    top: dict[str, Any] = {}
+    for name in ("host", "port", "region", "api_key", "seed"):
+        value = getattr(args, name)
+        if value is not None:
+            top[name] = value
+    overrides: dict[str, Any] = {}
+    for name in ("tpm", "rpm", "output_tokens"):
+        value = getattr(args, name)
+        if value is not None:
+            overrides[name] = value
+    if args.ttft_ms is not None:
+        overrides["ttft_ms"] = LatencyDistribution.from_value(args.ttft_ms)
+    if args.token_ms is not None:
+        overrides["token_ms"] = LatencyDistribution.from_value(args.token_ms)
+    deployments = dict(config.deployments)
+    if overrides:
+        deployments = {
+            name: replace(value, **overrides) for name, value in deployments.items()
+        }
+    for name in args.deployment or []:
+        deployments.setdefault(name, deployments[DEFAULT_DEPLOYMENT])
+    return replace(config, **top, deployments=deployments)
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="run-aoai-simulator",
+        description=(
+            "Serve a local Azure OpenAI stand-in (chat completions, embeddings, "
+            "Responses) with simulated latency, rate limits and scripted faults."
+        ),
+    )
+    parser.add_argument("--config", type=Path, help="JSON simulator config")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--region", help="Value for the x-ms-region header")
+    parser.add_argument("--api-key", help="Require this api-key / bearer token")
+    parser.add_argument("--seed", type=int, help="Seed latency and fault sampling")
+    parser.add_argument(
+        "--deployment", action="append", help="Declare a deployment name"
+    )
+    parser.add_argument("--tpm", type=int, help="Tokens per minute per deployment")
+    parser.add_argument("--rpm", type=int, help="Requests per minute per deployment")
+    parser.add_argument("--ttft-ms", type=float, help="Constant time to first token")
+    parser.add_argument("--token-ms", type=float, help="Constant time per output token")
+    parser.add_argument("--output-tokens", type=int, help="Default completion length")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config) if args.config else SimulatorConfig()
+        config = _apply_overrides(config, args)
+    except SimulatorConfigError as exc:
+        parser.error(str(exc))
+    try:
+        asyncio.run(serve(config))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,16 +2,61 @@ from __future__ import annotations
 
 import argparse
 import json
+import logging
 import os
-import tempfile
-from contextlib import contextmanager
+import threading
 from pathlib import Path
-from shutil import copy2, copytree
-from typing import Iterable, Iterator
-
+from typing import Iterable, Protocol
+
+from . import _state_cache
+from ._build_context import (
+    ContextPlan,
+    context_digest,
+    context_dockerfile,
+    plan_context,
+    staged_context,
+    write_context_tar,
+)
 from ._deploy_common import load_tfvars, update_tfvars
 from ._utils import derive_image_tag, ensure, repo_root, run_logged
 
+logger = logging.getLogger(__name__)
+
+BUILD_PLATFORM = "linux/amd64"
+CONTENT_TAG_PREFIX = "ctx-"
+
+
+class ImageRegistry(Protocol):
+    """Answers whether an image tag has already been pushed."""
+
+    def has_image(self, repository: str, tag: str) -> bool: ...
+
+
+class AcrImageRegistry:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def has_image(self, repository: str, tag: str) -> bool:
+        result = run_logged(
+            [
+                "az",
+                "acr",
+                "repository",
+                "show",
+                "--name",
+                self.name,
+                "--image",
+                f"{repository}:{tag}",
+                "--only-show-errors",
+                "-o",
+                "none",
+            ],
+            capture_output=True,
+            check=False,
+            echo="never",
+        )
+        return result.returncode == 0
+
 
 def build_and_push(
     *,
@@ -22,6 +67,9 @@ def build_and_push(
     local_docker: bool,
     tfvars_key: str | None,
     tfvars_path: Path | None,
+    force: bool = False,
+    registry: ImageRegistry | None = None,
+    stream_context: bool = False,
 ) -> str:
     ensure(["terraform", "az"])
     if local_docker:
@@ -30,43 +78,50 @@ def build_and_push(
     root = repo_root()
     stack = root / "infra" / "terraform" / "stacks" / "10-platform"
     template = root / "acr-build.yaml"
-    image_tag = os.environ.get("IMAGE_TAG") or derive_image_tag(root)
 
     outputs = _terraform_outputs(stack)
     acr_login_server = outputs.get("platform_acr_login_server", {}).get("value")
     if not acr_login_server:
         raise RuntimeError("acr_login_server missing from terraform outputs")
     registry_name = _registry_name_from_login_server(acr_login_server)
-
-    if local_docker:
-        _acr_docker_login(registry_name)
-
+    image_registry = registry or AcrImageRegistry(registry_name)
     prefix = _image_repo_prefix()
-    full_image = f"{acr_login_server}/{prefix}/{target}:{image_tag}"
-    remote_image = f"{prefix}/{target}:{image_tag}"
+    repository = f"{prefix}/{target}"
 
-    with _staged_context(
+    plan = plan_context(
         root, template, include_paths, build_context, dockerfile, target
-    ) as (
-        context_root,
-        dockerfile_rel,
-        build_context_rel,
-    ):
-        if local_docker:
-            _docker_build_and_push(
-                image=full_image,
-                dockerfile=context_root / dockerfile_rel,
-                context_dir=context_root / build_context_rel,
-            )
-        else:
-            _acr_run_build(
-                registry=registry_name,
-                template=context_root / "acr-build.yaml",
-                image=remote_image,
-                dockerfile=dockerfile_rel,
-                build_context=build_context_rel,
-                workdir=context_root,
+    )
+    image_tag = _image_tag(root, plan)
+    full_image = f"{acr_login_server}/{repository}:{image_tag}"
+    remote_image = f"{repository}:{image_tag}"
+
+    if not force and image_registry.has_image(repository, image_tag):
+        logger.info("Image %s already exists; skipping build", full_image)
+    elif local_docker and stream_context:
+        _acr_docker_login(registry_name)
+        _docker_build_streamed(image=full_image, plan=plan)
+    else:
+        if stream_context:
+            logger.info(
+                "az acr run uploads a directory; staging with links instead of streaming"
             )
+        with staged_context(root, plan) as context_root:
+            if local_docker:
+                _acr_docker_login(registry_name)
+                _docker_build_and_push(
+                    image=full_image,
+                    dockerfile=context_root / plan.dockerfile,
+                    context_dir=context_root / plan.build_context,
+                )
+            else:
+                _acr_run_build(
+                    registry=registry_name,
+                    template=context_root / "acr-build.yaml",
+                    image=remote_image,
+                    dockerfile=plan.dockerfile,
+                    build_context=plan.build_context,
+                    workdir=context_root,
+                )
 
     tfvars = tfvars_path or _auto_tfvars_path(root, registry_name)
     if tfvars and tfvars_key:
@@ -76,6 +131,21 @@ def build_and_push(
     return full_image
 
 
+def _image_tag(root: Path, plan: ContextPlan) -> str:
+    explicit = os.environ.get("IMAGE_TAG")
+    if explicit:
+        return explicit
+    strategy = os.environ.get("IMAGE_TAG_STRATEGY", "content").strip().lower()
+    if strategy == "commit":
+        return derive_image_tag(root)
+    if strategy != "content":
+        raise ValueError(
+            f"Unknown IMAGE_TAG_STRATEGY '{strategy}' (expected 'content' or 'commit')"
+        )
+    digest = context_digest(plan, platform=BUILD_PLATFORM)
+    return f"{CONTENT_TAG_PREFIX}{digest[:24]}"
+
+
 def build_cli(
     *,
     argv: list[str] | None,
@@ -93,6 +163,16 @@ def build_cli(
     parser.add_argument(
         "--local-docker", action="store_true", help="Build locally with docker"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Build and push even if the image tag already exists in the registry",
+    )
+    parser.add_argument(
+        "--stream-context",
+        action="store_true",
+        help="With --local-docker, stream a .dockerignore-filtered tar to docker build",
+    )
     args = parser.parse_args(argv)
 
     build_and_push(
@@ -103,16 +183,21 @@ def build_cli(
         tfvars_key=tfvars_key,
         local_docker=args.local_docker,
         tfvars_path=None,
+        force=args.force,
+        stream_context=args.stream_context,
     )
     return 0
 
 
 def _terraform_outputs(stack_dir: Path) -> dict:
-    result = run_logged(
-        ["terraform", f"-chdir={stack_dir}", "output", "-json"],
-        capture_output=True,
-    )
-    return json.loads(result.stdout)
+    def _load() -> dict:
+        result = run_logged(
+            ["terraform", f"-chdir={stack_dir}", "output", "-json"],
+            capture_output=True,
+        )
+        return json.loads(result.stdout)
+
+    return _state_cache.terraform_outputs(stack_dir, _load)
 
 
 def _image_repo_prefix() -> str:
@@ -135,7 +220,7 @@ def _docker_build_and_push(image: str, dockerfile: Path, context_dir: Path) -> N
             "docker",
             "build",
             "--platform",
-            "linux/amd64",
+            BUILD_PLATFORM,
             "-t",
             image,
             "-f",
@@ -147,6 +232,47 @@ def _docker_build_and_push(image: str, dockerfile: Path, context_dir: Path) -> N
     run_logged(["docker", "push", image], capture_output=False)
 
 
+def _docker_build_streamed(image: str, plan: ContextPlan) -> None:
+    """Build from a tar piped straight to docker's stdin; nothing is staged on disk."""
+    dockerfile = context_dockerfile(plan)
+    read_fd, write_fd = os.pipe()
+    errors: list[BaseException] = []
+
+    def _writer() -> None:
+        try:
+            with os.fdopen(write_fd, "wb") as stream:
+                write_context_tar(plan, stream)
+        except BrokenPipeError:
+            pass  # docker exited early; its exit status reports the failure
+        except BaseException as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    writer = threading.Thread(target=_writer, daemon=True)
+    writer.start()
+    try:
+        run_logged(
+            [
+                "docker",
+                "build",
+                "--platform",
+                BUILD_PLATFORM,
+                "-t",
+                image,
+                "-f",
+                dockerfile,
+                "-",
+            ],
+            capture_output=False,
+            stdin=read_fd,
+        )
+    finally:
+        os.close(read_fd)
+        writer.join()
+    if errors:
+        raise errors[0]
+    run_logged(["docker", "push", image], capture_output=False)
+
+
 def _acr_run_build(
     *,
     registry: str,
@@ -171,7 +297,7 @@ def _acr_run_build(
             "--set",
             f"dockerfile={dockerfile.as_posix()}",
             "--set",
-            "platform=linux/amd64",
+            f"platform={BUILD_PLATFORM}",
             "--set",
             f"context={build_context.as_posix()}",
             str(workdir),
@@ -180,44 +306,6 @@ def _acr_run_build(
     )
 
 
-def _copy_into_context(root: Path, destination_root: Path, rel_path: Path) -> None:
-    source = root / rel_path
-    if not source.exists():
-        raise FileNotFoundError(f"Context path not found for build: {source}")
-
-    destination = destination_root / rel_path
-    destination.parent.mkdir(parents=True, exist_ok=True)
-
-    if source.is_dir():
-        copytree(source, destination, dirs_exist_ok=True)
-    else:
-        copy2(source, destination)
-
-
-@contextmanager
-def _staged_context(
-    root: Path,
-    template: Path,
-    include_paths: Iterable[Path],
-    build_context: Path,
-    dockerfile: Path,
-    target: str,
-) -> Iterator[tuple[Path, Path, Path]]:
-    with tempfile.TemporaryDirectory(prefix=f"{target}-ctx-") as tmpdir:
-        context_root = Path(tmpdir)
-        copy2(template, context_root / "acr-build.yaml")
-        for rel_path in include_paths:
-            _copy_into_context(root, context_root, rel_path)
-
-        build_context_abs = context_root / build_context
-        if not build_context_abs.exists():
-            raise FileNotFoundError(
-                f"Build context not found for {target}: {build_context_abs}"
-            )
-
-        yield context_root, dockerfile, build_context
-
-
 def _auto_tfvars_path(root: Path, registry: str) -> Path | None:
     stack_dir = root / "infra" / "terraform" / "stacks" / "20-workload"
     if not stack_dir.exists():
@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from ._deploy_common import (
+    AzureContext,
+    BootstrapState,
+    FoundryState,
+    Paths,
+    azure_context,
+    configure_logging,
+    export_core_tf_env,
+    load_bootstrap_state,
+    resolve_paths,
+    state_key,
+    terraform_init_remote,
+)
+from ._telemetry import span
+from ._utils import ensure, output_context, tag_logging_with_output_context
+from .deploy_bootstrap import deploy_bootstrap
+from .deploy_foundry import deploy_foundry
+from .deploy_observability import deploy_observability
+from .deploy_platform import deploy_platform
+from .deploy_workload import DEFAULT_BUILD_PARALLELISM, _build_images, deploy_workload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLELISM = 4
+PROGRESS_VERSION = 1
+# Steps whose result feeds later steps always run again on resume. Image
+# builds are tagged by context digest and skip tags already pushed, so a rerun
+# is cheap and picks up sources edited since the failed run.
+RERUN_ON_RESUME = frozenset({"images"})
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    depends_on: tuple[str, ...]
+    run: Callable[[], Any]
+
+
+@dataclass
+class DeployRun:
+    """State shared between steps; each key is written once before dependents start."""
+
+    env: str
+    ctx: AzureContext
+    paths: Paths
+    deploy_e2e: bool
+    local_docker: bool
+    skip_openai: bool
+    no_image_build: bool
+    build_parallelism: int
+    results: dict[str, Any] = field(default_factory=dict)
+
+    def bootstrap(self) -> BootstrapState:
+        state = self.results.get("bootstrap")
+        if state is None:
+            state = load_bootstrap_state(self.env, self.paths, self.ctx)
+            self.results["bootstrap"] = state
+        return state
+
+
+def _configure_stack_logging() -> None:
+    configure_logging()
+    tag_logging_with_output_context()
+
+
+def _state_dir(paths: Paths, env: str) -> Path:
+    return paths.root / ".ops-deploy" / env
+
+
+class Progress:
+    """
+    JSON progress file recording completed steps so a failed or interrupted
+    run can resume. A run that completes deletes it.
+    """
+
+    def __init__(self, path: Path, options: dict[str, Any], *, restart: bool) -> None:
+        self.path = path
+        self.options = options
+        self._lock = threading.Lock()
+        self.steps: dict[str, dict[str, Any]] = {}
+        if restart or not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable progress file %s (%s)", path, exc)
+            return
+        if data.get("version") != PROGRESS_VERSION or data.get("options") != options:
+            logger.info(
+                "Options changed since the last deploy-all run; starting from scratch"
+            )
+            return
+        self.steps = data.get("steps") or {}
+
+    def done(self, name: str) -> bool:
+        return self.steps.get(name, {}).get("status") == "done"
+
+    def record(self, name: str, status: str, duration: float) -> None:
+        with self._lock:
+            self.steps[name] = {
+                "status": status,
+                "finished_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+                "duration_seconds": round(duration, 1),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps(
+                    {
+                        "version": PROGRESS_VERSION,
+                        "options": self.options,
+                        "steps": self.steps,
+                    },
+                    indent=2,
+                )
+                + "\n"
+            )
+            os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.steps = {}
+            self.path.unlink(missing_ok=True)
+
+
+def _init_step(run: DeployRun, stack_dir: Path, stack_name: str) -> Callable[[], Any]:
+    def _init() -> None:
+        bootstrap = run.bootstrap()
+        terraform_init_remote(
+            stack_dir,
+            tenant_id=run.ctx.tenant_id,
+            state_rg=bootstrap.resource_group,
+            state_sa=bootstrap.storage_account,
+            state_container=bootstrap.container,
+            state_key=state_key(bootstrap.state_prefix, stack_name),
+        )
+
+    return _init
+
+
+def build_steps(run: DeployRun) -> list[Step]:
+    """
+    Stack DAG. Remote backend inits only need bootstrap and run together; each
+    apply then waits for the stacks whose outputs it reads (platform reads
+    observability, foundry reads platform, workload reads all). Images only
+    need the platform ACR, so they build while foundry applies.
+    """
+    paths = run.paths
+    steps = [
+        Step(
+            "00-bootstrap",
+            (),
+            lambda: run.results.__setitem__(
+                "bootstrap", deploy_bootstrap(run.env, ctx=run.ctx)
+            ),
+        ),
+        Step(
+            "init:05-observability",
+            ("00-bootstrap",),
+            _init_step(run, paths.observability, "05-observability"),
+        ),
+        Step(
+            "init:10-platform",
+            ("00-bootstrap",),
+            _init_step(run, paths.foundation, "10-platform"),
+        ),
+        Step(
+            "init:20-workload",
+            ("00-bootstrap",),
+            _init_step(run, paths.workload, "20-workload"),
+        ),
+        Step(
+            "05-observability",
+            ("00-bootstrap", "init:05-observability"),
+            lambda: deploy_observability(
+                run.env, ctx=run.ctx, bootstrap_state=run.bootstrap()
+            ),
+        ),
+        Step(
+            "10-platform",
+            ("05-observability", "init:10-platform"),
+            lambda: run.results.__setitem__(
+                "foundation",
+                deploy_platform(run.env, ctx=run.ctx, bootstrap_state=run.bootstrap()),
+            ),
+        ),
+    ]
+
+    workload_deps = ["10-platform", "init:20-workload"]
+    if not run.skip_openai and paths.foundry.exists():
+        steps.append(
+            Step(
+                "init:15-foundry",
+                ("00-bootstrap",),
+                _init_step(run, paths.foundry, "15-foundry"),
+            )
+        )
+        steps.append(
+            Step(
+                "15-foundry",
+                ("10-platform", "init:15-foundry"),
+                lambda: run.results.__setitem__(
+                    "foundry",
+                    deploy_foundry(
+                        run.env,
+                        ctx=run.ctx,
+                        bootstrap_state=run.bootstrap(),
+                        foundation_state=run.results.get("foundation"),
+                    ),
+                ),
+            )
+        )
+        workload_deps.append("15-foundry")
+
+    if not run.no_image_build:
+        steps.append(
+            Step(
+                "images",
+                ("10-platform",),
+                lambda: _build_images(
+                    run.deploy_e2e, run.local_docker, run.build_parallelism
+                ),
+            )
+        )
+        workload_deps.append("images")
+
+    steps.append(
+        Step(
+            "20-workload",
+            tuple(workload_deps),
+            lambda: deploy_workload(
+                run.env,
+                ctx=run.ctx,
+                bootstrap_state=run.bootstrap(),
+                foundation_state=run.results.get("foundation"),
+                openai_state=_foundry_state(run),
+                deploy_e2e=run.deploy_e2e,
+                no_image_build=run.no_image_build,
+                local_docker=run.local_docker,
+                skip_openai=run.skip_openai,
+                images=run.results.get("images"),
+            ),
+        )
+    )
+    return steps
+
+
+def _foundry_state(run: DeployRun) -> FoundryState | None:
+    if run.skip_openai:
+        return FoundryState(provisioned=False, state_blob_key=None)
+    state = run.results.get("foundry")
+    return state if isinstance(state, FoundryState) else None
+
+
+def execute(
+    steps: list[Step],
+    progress: Progress,
+    run: DeployRun,
+    *,
+    parallelism: int,
+    log_dir: Path,
+) -> list[str]:
+    """Run steps as their dependencies finish; returns names of failed steps."""
+    pending = {step.name: step for step in steps}
+    finished: set[str] = set()
+    failed: list[str] = []
+
+    for step in steps:
+        if progress.done(step.name) and step.name not in RERUN_ON_RESUME:
+            logger.info("Skipping %s (completed in a previous run)", step.name)
+            finished.add(step.name)
+            del pending[step.name]
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    def _run(step: Step) -> Any:
+        log_path = log_dir / f"{step.name.replace(':', '-')}.log"
+        with ExitStack() as stack:
+            log_file = stack.enter_context(log_path.open("a", encoding="utf-8"))
+            stack.enter_context(output_context(step.name, log_file))
+            stack.enter_context(span("deploy_all_step", step=step.name))
+            logger.info("Starting %s (log: %s)", step.name, log_path)
+            started = time.monotonic()
+            try:
+                result = step.run()
+            except BaseException:
+                progress.record(step.name, "failed", time.monotonic() - started)
+                logger.exception("%s failed", step.name)
+                raise
+            if step.name == "images":
+                run.results["images"] = result
+            progress.record(step.name, "done", time.monotonic() - started)
+            logger.info("Finished %s in %.0fs", step.name, time.monotonic() - started)
+            return result
+
+    running: dict[Future[Any], str] = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, parallelism), thread_name_prefix="deploy"
+    ) as pool:
+        while pending or running:
+            if not failed:
+                ready = [
+                    step
+                    for step in pending.values()
+                    if all(dep in finished for dep in step.depends_on)
+                ]
+                for step in ready:
+                    running[pool.submit(_run, step)] = step.name
+                    del pending[step.name]
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is None:
+                    finished.add(name)
+                else:
+                    # Let in-flight applies finish (killing terraform leaves
+                    # state locks behind) but start nothing new.
+                    failed.append(name)
+
+    if failed and pending:
+        logger.error("Not started because of failures: %s", ", ".join(sorted(pending)))
+    if not failed:
+        progress.clear()
+    return failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    _configure_stack_logging()
+    parser = argparse.ArgumentParser(
+        prog="deploy-all",
+        description=(
+            "Deploy every terraform stack in dependency order, running independent "
+            "steps concurrently and resuming after failures."
+        ),
+    )
+    parser.add_argument("env")
+    parser.add_argument("--deploy-e2e", action="store_true")
+    parser.add_argument("--no-image-build", action="store_true")
+    parser.add_argument("--local-docker", action="store_true")
+    parser.add_argument("--no-azure-openai", action="store_true")
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=DEFAULT_PARALLELISM,
+        help="Maximum number of steps running at once",
+    )
+    parser.add_argument(
+        "--build-parallelism", type=int, default=DEFAULT_BUILD_PARALLELISM
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the progress file and run every step",
+    )
+    args = parser.parse_args(argv)
+
+    ensure(["az", "terraform"])
+    ctx = azure_context()
+    paths = resolve_paths()
+    # The backend init steps run terraform directly, so the core TF_VAR_/ARM_
+    # settings must be in the environment before any step starts.
+    export_core_tf_env(args.env, ctx)
+
+    run = DeployRun(
+        env=args.env,
+        ctx=ctx,
+        paths=paths,
+        deploy_e2e=args.deploy_e2e,
+        local_docker=args.local_docker,
+        skip_openai=args.no_azure_openai,
+        no_image_build=args.no_image_build,
+        build_parallelism=args.build_parallelism,
+    )
+    state_dir = _state_dir(paths, args.env)
+    options = {
+        "subscription_id": ctx.subscription_id,
+        "deploy_e2e": args.deploy_e2e,
+        "no_image_build": args.no_image_build,
+        "local_docker": args.local_docker,
+        "no_azure_openai": args.no_azure_openai,
+    }
+    progress = Progress(state_dir / "progress.json", options, restart=args.restart)
+
+    started = time.monotonic()
+    failed = execute(
+        build_steps(run),
+        progress,
+        run,
+        parallelism=args.parallelism,
+        log_dir=state_dir / "logs",
+    )
+    elapsed = time.monotonic() - started
+    if failed:
+        logger.error(
+            "deploy-all failed after %.0fs: %s (logs in %s; rerun to resume)",
+            elapsed,
+            ", ".join(failed),
+            state_dir / "logs",
+        )
+        return 1
+    logger.info("deploy-all completed in %.0fs", elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
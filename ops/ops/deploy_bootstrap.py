@@ -17,11 +17,13 @@ from ._deploy_common import (
     terraform_init_local,
     terraform_output,
 )
+from ._telemetry import traced
 from ._utils import ensure
 
 logger = logging.getLogger(__name__)
 
 
+@traced("deploy_bootstrap")
 def deploy_bootstrap(
     env: str, *, ctx: AzureContext | None = None, state_path: Path | None = None
 ) -> BootstrapState:
@@ -22,11 +22,13 @@ from ._deploy_common import (
     update_tfvars,
 )
 from ._openai_secrets import KeyVaultConnectionError, seed_openai_secrets
+from ._telemetry import traced
 from ._utils import ensure
 
 logger = logging.getLogger(__name__)
 
 
+@traced("deploy_foundry")
 def deploy_foundry(
     env: str,
     *,
@@ -86,8 +88,10 @@ def deploy_foundry(
     )
     # Azure OpenAI accounts frequently reject concurrent deployment updates with
     # 409 RequestConflict. Apply sequentially to make deploys deterministic.
-    os.environ.setdefault("TF_CLI_ARGS_apply", "-parallelism=1")
-    terraform_apply(paths.foundry, tfvars_file)
+    # Pass it per command (rather than exporting TF_CLI_ARGS_apply) so stacks
+    # applied later or concurrently in the same process keep full parallelism.
+    extra_args = [] if "TF_CLI_ARGS_apply" in os.environ else ["-parallelism=1"]
+    terraform_apply(paths.foundry, tfvars_file, extra_args=extra_args)
     try:
         seed_summary = seed_openai_secrets(
             env,
@@ -16,11 +16,13 @@ from ._deploy_common import (
     terraform_apply,
     terraform_init_remote,
 )
+from ._telemetry import traced
 from ._utils import ensure
 
 logger = logging.getLogger(__name__)
 
 
+@traced("deploy_observability")
 def deploy_observability(
     env: str,
     *,
@@ -22,11 +22,13 @@ from ._deploy_common import (
     terraform_output,
     update_tfvars,
 )
+from ._telemetry import traced
 from ._utils import ensure
 
 logger = logging.getLogger(__name__)
 
 
+@traced("deploy_platform")
 def deploy_platform(
     env: str,
     *,
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import argparse
+import contextvars
 import json
 import logging
 import os
 import secrets
 import subprocess
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Any
 
@@ -35,13 +38,22 @@ from ._deploy_common import (
 from ._openai_secrets import (
     KeyVaultConnectionError,
     seed_openai_secrets,
-    set_secret_with_retry,
+    sync_secrets,
 )
+from ._telemetry import traced
 from ._utils import ensure, run_logged
 
 logger = logging.getLogger(__name__)
 
+# Image builds mostly wait on ACR/docker I/O; the default builds all of them at once.
+DEFAULT_BUILD_PARALLELISM = 4
 
+
+class ImageBuildCancelledError(RuntimeError):
+    """Raised for image builds stopped because another build failed."""
+
+
+@traced("deploy_workload")
 def deploy_workload(
     env: str,
     *,
@@ -54,6 +66,8 @@ def deploy_workload(
     no_image_build: bool = False,
     local_docker: bool = False,
     skip_openai: bool = False,
+    build_parallelism: int = DEFAULT_BUILD_PARALLELISM,
+    images: dict[str, str] | None = None,
 ) -> None:
     ensure(["az", "terraform"])
     context = ctx if ctx is not None else azure_context()
@@ -154,11 +168,12 @@ def deploy_workload(
         },
     )
 
-    images = (
-        _images_from_tfvars(tfvars_file, deploy_e2e)
-        if no_image_build
-        else _build_images(deploy_e2e, local_docker)
-    )
+    if images is None:
+        images = (
+            _images_from_tfvars(tfvars_file, deploy_e2e)
+            if no_image_build
+            else _build_images(deploy_e2e, local_docker, build_parallelism)
+        )
     update_tfvars(
         tfvars_file,
         {
@@ -243,6 +258,7 @@ def _infer_openai_secret_names(app_settings: dict[str, str]) -> list[str]:
     return [f"azure-openai-key-{idx}" for idx in sorted(indices)]
 
 
+@traced("seed_secrets")
 def _seed_secrets_and_openai(
     env: str,
     tfvars_file: Path,
@@ -260,9 +276,10 @@ def _seed_secrets_and_openai(
 
     try:
         # Seed non-AOAI secrets to KV
-        for key, value in secrets.items():
-            secret_name = key.lower().replace("_", "-")
-            set_secret_with_retry(key_vault, secret_name, value)
+        sync_secrets(
+            key_vault,
+            {key.lower().replace("_", "-"): value for key, value in secrets.items()},
+        )
 
         # Seed AOAI secrets (provisioned or expected)
         openai_secret_names = _infer_openai_secret_names(app_settings)
@@ -344,17 +361,40 @@ def _configure_e2e(tfvars_file: Path, images: dict[str, str]) -> None:
     )
 
 
-def _build_images(deploy_e2e: bool, local_docker: bool) -> dict[str, str]:
-    logger.info("Building container images (capturing image names for Terraform)")
+@traced("build_images")
+def _build_images(
+    deploy_e2e: bool, local_docker: bool, parallelism: int = DEFAULT_BUILD_PARALLELISM
+) -> dict[str, str]:
+    builds = {
+        "gateway": "build-and-push-gateway",
+        "hydrenv": "build-and-push-hydrenv",
+    }
+    if deploy_e2e:
+        builds["gateway-config-api"] = "build-and-push-gateway-config-api"
+        builds["aoai-api-simulator"] = "build-and-push-aoai-api-simulator"
+
+    workers = max(1, min(parallelism, len(builds)))
+    logger.info(
+        "Building %d container image(s), %d at a time (capturing image names for Terraform)",
+        len(builds),
+        workers,
+    )
+    cancel = threading.Event()
 
-    def run_build(command: list[str]) -> str:
-        full_cmd = ["uv", "run", *command]
+    def run_build(name: str, command: str) -> str:
+        if cancel.is_set():
+            raise ImageBuildCancelledError(f"Image build for {name} cancelled")
+        full_cmd = ["uv", "run", command]
         if local_docker:
             full_cmd.append("--local-docker")
-        result = run_logged(full_cmd, capture_output=True, check=False)
+        result = run_logged(
+            full_cmd, capture_output=True, check=False, prefix=name, cancel=cancel
+        )
+        if cancel.is_set() and result.returncode != 0:
+            raise ImageBuildCancelledError(f"Image build for {name} cancelled")
         if result.returncode != 0:
             raise RuntimeError(
-                f"Image build failed for {' '.join(command)} (exit {result.returncode})"
+                f"Image build failed for {command} (exit {result.returncode})"
             )
         image = _last_non_empty_line(result.stdout)
         if image == "":
@@ -362,14 +402,32 @@ def _build_images(deploy_e2e: bool, local_docker: bool) -> dict[str, str]:
         logger.info("Built %s", image)
         return image
 
-    images: dict[str, str] = {
-        "gateway": run_build(["build-and-push-gateway"]),
-        "hydrenv": run_build(["build-and-push-hydrenv"]),
-    }
-    if deploy_e2e:
-        images["gateway-config-api"] = run_build(["build-and-push-gateway-config-api"])
-        images["aoai-api-simulator"] = run_build(["build-and-push-aoai-api-simulator"])
-    return images
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="image-build"
+    ) as pool:
+        # Copy the caller's context so deploy-all's per-stack output tagging
+        # carries over into the build threads.
+        futures = {
+            pool.submit(contextvars.copy_context().run, run_build, name, command): name
+            for name, command in builds.items()
+        }
+        try:
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        except BaseException:
+            cancel.set()
+            raise
+        failed = next((future for future in done if future.exception()), None)
+        if failed is not None:
+            # Stop queued builds and terminate running ones before re-raising.
+            logger.error(
+                "Image build for %s failed; cancelling remaining builds",
+                futures[failed],
+            )
+            cancel.set()
+            wait(futures)
+            raise failed.exception()  # type: ignore[misc]
+
+    return {name: future.result() for future, name in futures.items()}
 
 
 def _images_from_tfvars(tfvars_path: Path, deploy_e2e: bool) -> dict[str, str]:
@@ -506,6 +564,12 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--no-image-build", action="store_true")
     parser.add_argument("--local-docker", action="store_true")
     parser.add_argument("--no-azure-openai", action="store_true")
+    parser.add_argument(
+        "--build-parallelism",
+        type=int,
+        default=DEFAULT_BUILD_PARALLELISM,
+        help="Maximum number of images built concurrently (1 builds sequentially)",
+    )
     args = parser.parse_args(argv)
 
     deploy_workload(
@@ -514,6 +578,7 @@ def main(argv: list[str] | None = None) -> int:
         no_image_build=args.no_image_build,
         local_docker=args.local_docker,
         skip_openai=args.no_azure_openai,
+        build_parallelism=args.build_parallelism,
     )
     return 0
 
@@ -0,0 +1,18 @@
+"""Open-loop load generation for gateway benchmarks."""
+
+from .histogram import Histogram
+from .runner import KindStats, LoadConfig, LoadGenerator, LoadResult, run_load
+from .workload import REQUEST_KINDS, Workload, WorkloadError, parse_mix
+
+__all__ = [
+    "REQUEST_KINDS",
+    "Histogram",
+    "KindStats",
+    "LoadConfig",
+    "LoadGenerator",
+    "LoadResult",
+    "Workload",
+    "WorkloadError",
+    "parse_mix",
+    "run_load",
+]
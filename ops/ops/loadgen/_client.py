@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Mapping
+from urllib.parse import urlsplit
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class HttpClientError(ConnectionError):
+    """The server closed or broke the connection mid-response."""
+
+
+class _Connection:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    @property
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class HttpResponse:
+    """A response whose body is read incrementally from the pooled connection."""
+
+    def __init__(
+        self,
+        connection: _Connection,
+        status: int,
+        headers: dict[str, str],
+        keep_alive: bool,
+    ) -> None:
+        self._connection = connection
+        self.status = status
+        self.headers = headers
+        self.keep_alive = keep_alive
+        self.complete = False
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """Yield body bytes as they arrive (chunked framing removed)."""
+        reader = self._connection.reader
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                if not size_line:
+                    raise HttpClientError("connection closed inside chunked body")
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                yield await reader.readexactly(size)
+                await reader.readline()
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"] or 0)
+            while remaining > 0:
+                data = await reader.read(min(remaining, READ_CHUNK_BYTES))
+                if not data:
+                    raise HttpClientError("connection closed before end of body")
+                remaining -= len(data)
+                yield data
+        else:
+            # Body delimited by connection close; the connection is not reusable.
+            self.keep_alive = False
+            while data := await reader.read(READ_CHUNK_BYTES):
+                yield data
+        self.complete = True
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections to one origin, at most `max_connections`
+    open at a time. Requests wait for a free connection rather than opening
+    unbounded sockets.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int,
+        connect_timeout: float = 10.0,
+        verify_tls: bool = True,
+    ) -> None:
+        parsed = urlsplit(base_url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported URL: {base_url}")
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.prefix = parsed.path.rstrip("/")
+        default_port = self.port == (443 if parsed.scheme == "https" else 80)
+        self._host_header = self.host if default_port else f"{self.host}:{self.port}"
+        self._ssl: ssl.SSLContext | None = None
+        if parsed.scheme == "https":
+            self._ssl = ssl.create_default_context()
+            if not verify_tls:
+                self._ssl.check_hostname = False
+                self._ssl.verify_mode = ssl.CERT_NONE
+        self._connect_timeout = connect_timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: list[_Connection] = []
+        self.opened = 0
+
+    async def _open(self) -> _Connection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port, ssl=self._ssl, limit=READ_CHUNK_BYTES * 4
+            ),
+            self._connect_timeout,
+        )
+        self.opened += 1
+        return _Connection(reader, writer)
+
+    async def _checkout(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.usable:
+                connection.reused = True
+                return connection
+            connection.close()
+        return await self._open()
+
+    def _encode(
+        self, method: str, path: str, headers: Mapping[str, str], body: bytes
+    ) -> bytes:
+        lines = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self._host_header}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Content-Length: {len(body)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _send(
+        self, connection: _Connection, request: bytes
+    ) -> tuple[int, dict[str, str], bool]:
+        connection.writer.write(request)
+        await connection.writer.drain()
+        status_line = await connection.reader.readline()
+        if not status_line:
+            raise HttpClientError("connection closed before response")
+        try:
+            version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+            code = int(status)
+        except ValueError as exc:
+            raise HttpClientError(f"malformed status line: {status_line!r}") from exc
+        headers: dict[str, str] = {}
+        while True:
+            line = await connection.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection_header = headers.get("connection", "").lower()
+        keep_alive = (
+            connection_header != "close"
+            if version == "HTTP/1.1"
+            else connection_header == "keep-alive"
+        )
+        return code, headers, keep_alive
+
+    @asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        headers: Mapping[str, str],
+        body: bytes = b"",
+    ) -> AsyncIterator[HttpResponse]:
+        """
+        Send a request and yield the response once its headers arrive. The
+        connection returns to the pool only if the body was read completely.
+        """
+        payload = self._encode(method, path, headers, body)
+        async with self._slots:
+            connection = await self._checkout()
+            try:
+                try:
+                    status, response_headers, keep_alive = await self._send(
+                        connection, payload
+                    )
+                except (HttpClientError, ConnectionError):
+                    if not connection.reused:
+                        raise
+                    # The server may have dropped an idle keep-alive connection.
+                    connection.close()
+                    connection = await self._open()
+                    status, response_headers, keep_alive = await self._send(
+                        connection, payload
+                    )
+                response = HttpResponse(
+                    connection, status, response_headers, keep_alive
+                )
+                yield response
+            except BaseException:
+                connection.close()
+                raise
+            if response.complete and response.keep_alive and connection.usable:
+                self._idle.append(connection)
+            else:
+                connection.close()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+        for connection in idle:
+            try:
+                await connection.writer.wait_closed()
+            except (ConnectionError, OSError, ssl.SSLError):
+                pass
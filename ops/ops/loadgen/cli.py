@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from .._bench_common import write_result
+from .._telemetry import span
+from .runner import LoadConfig, LoadResult, run_load
+from .workload import Workload, WorkloadError, parse_mix
+
+logger = logging.getLogger(__name__)
+
+
+def log_summary(result: LoadResult) -> None:
+    data = result.to_dict()
+    logger.info(
+        "Offered %.1f rps, achieved %.1f rps; sent=%s dropped=%s",
+        data["offered_rps"],
+        data["achieved_rps"],
+        data["requests"]["sent"],
+        data["requests"]["dropped"],
+    )
+    for kind, stats in data["kinds"].items():
+        latency, ttft = stats["latency_ms"], stats["ttft_ms"]
+        logger.info(
+            "  %-17s ok=%-6s err=%5.2f%% p50=%.0fms p99=%.0fms ttft_p50=%s ttft_p99=%s",
+            kind,
+            stats["succeeded"],
+            stats["error_rate"] * 100,
+            latency["p50"],
+            latency["p99"],
+            f"{ttft['p50']:.0f}ms" if ttft["count"] else "-",
+            f"{ttft['p99']:.0f}ms" if ttft["count"] else "-",
+        )
+    lag = data["schedule_lag_ms"]
+    if lag["p99"] > 50:
+        logger.warning(
+            "Load generator fell behind its schedule (p99 lag %.0fms); "
+            "results understate the offered rate. Lower --rate or run more generators.",
+            lag["p99"],
+        )
+
+
+def add_workload_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--deployment", default="gpt-4o", help="Chat/Responses deployment"
+    )
+    parser.add_argument("--embeddings-deployment", help="Defaults to --deployment")
+    parser.add_argument(
+        "--api-style", choices=["deployments", "v1"], default="deployments"
+    )
+    parser.add_argument("--api-version", default="2024-10-21")
+    parser.add_argument("--prompt-tokens", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, default=128)
+
+
+def workload_from_args(args: argparse.Namespace, mix: str) -> Workload:
+    return Workload(
+        mix=parse_mix(mix),
+        deployment=args.deployment,
+        embeddings_deployment=args.embeddings_deployment,
+        api_style=args.api_style,
+        api_version=args.api_version,
+        prompt_tokens=args.prompt_tokens,
+        max_tokens=args.max_tokens,
+    )
+
+
+def parse_headers(values: list[str] | None) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    for value in values or []:
+        name, sep, header_value = value.partition(":")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid header '{value}'; expected 'Name: value'")
+        headers[name.strip()] = header_value.strip()
+    return headers
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="run-loadgen",
+        description=(
+            "Open-loop load generator: sends requests at a fixed or Poisson "
+            "arrival rate and records latency, TTFT and inter-token latency."
+        ),
+    )
+    parser.add_argument("--url", required=True, help="Gateway or backend base URL")
+    parser.add_argument(
+        "--api-key",
+        default=os.environ.get("LOADGEN_API_KEY"),
+        help="Sent as the api-key header (default: $LOADGEN_API_KEY)",
+    )
+    parser.add_argument("--header", action="append", help="Extra header 'Name: value'")
+    parser.add_argument("--rate", type=float, required=True, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Unrecorded seconds")
+    parser.add_argument("--max-in-flight", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=512)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--insecure", action="store_true", help="Skip TLS verification")
+    parser.add_argument("--output", type=Path, help="Result JSON path")
+    parser.add_argument(
+        "--mix",
+        default="chat-stream",
+        help=(
+            "Weighted request kinds, e.g. 'chat-stream=6,chat=2,embeddings=1,"
+            "responses-stream=1' (kinds: chat, chat-stream, embeddings, "
+            "responses, responses-stream)"
+        ),
+    )
+    add_workload_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        config = LoadConfig(
+            url=args.url,
+            workload=workload_from_args(args, args.mix),
+            rate=args.rate,
+            duration_s=args.duration,
+            arrival=args.arrival,
+            warmup_s=args.warmup,
+            max_in_flight=args.max_in_flight,
+            connections=args.connections,
+            timeout_s=args.timeout,
+            api_key=args.api_key,
+            headers=parse_headers(args.header),
+            seed=args.seed,
+            verify_tls=not args.insecure,
+        )
+    except (WorkloadError, ValueError) as exc:
+        parser.error(str(exc))
+
+    with span("loadgen", rate=config.rate, duration_s=config.duration_s):
+        result = asyncio.run(run_load(config))
+    log_summary(result)
+    path = write_result("loadgen", result.to_dict(), args.output)
+    logger.info("Results written to %s", path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
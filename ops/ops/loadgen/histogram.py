@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable, Mapping
+
+# Log-linear buckets in the style of HdrHistogram with 3 significant digits:
+# values below 2048 are exact, above that every power-of-two range is split
+# into 1024 buckets (relative error < 0.1%).
+_SUB_BUCKET_BITS = 11
+_SUB_BUCKET_HALF_BITS = _SUB_BUCKET_BITS - 1
+_SUB_BUCKET_HALF = 1 << _SUB_BUCKET_HALF_BITS
+_SUB_BUCKET_MASK = (1 << _SUB_BUCKET_BITS) - 1
+
+REPORTED_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+
+def _index(value: int) -> int:
+    bucket = (value | _SUB_BUCKET_MASK).bit_length() - _SUB_BUCKET_BITS
+    sub_bucket = value >> bucket
+    return ((bucket + 1) << _SUB_BUCKET_HALF_BITS) + sub_bucket - _SUB_BUCKET_HALF
+
+
+def _highest_equivalent(index: int) -> int:
+    if index < (1 << _SUB_BUCKET_BITS):
+        return index
+    bucket = (index >> _SUB_BUCKET_HALF_BITS) - 1
+    sub_bucket = (index & (_SUB_BUCKET_HALF - 1)) + _SUB_BUCKET_HALF
+    return (sub_bucket << bucket) + (1 << bucket) - 1
+
+
+class Histogram:
+    """
+    Sparse log-linear latency histogram. Values are recorded in milliseconds
+    and stored as integer microseconds; percentiles report the highest value
+    equivalent to the bucket, as HdrHistogram does.
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self._total_us = 0
+        self._min_us: int | None = None
+        self._max_us = 0
+
+    def record(self, value_ms: float) -> None:
+        value = max(0, int(round(value_ms * 1000)))
+        index = _index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self._total_us += value
+        self._min_us = value if self._min_us is None else min(self._min_us, value)
+        self._max_us = max(self._max_us, value)
+
+    def merge(self, other: Histogram) -> None:
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self._total_us += other._total_us
+        if other._min_us is not None:
+            self._min_us = (
+                other._min_us
+                if self._min_us is None
+                else min(self._min_us, other._min_us)
+            )
+        self._max_us = max(self._max_us, other._max_us)
+
+    def percentile(self, percentile: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * min(percentile, 100.0) / 100.0))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= target:
+                return min(_highest_equivalent(index), self._max_us) / 1000.0
+        return self._max_us / 1000.0
+
+    @property
+    def mean(self) -> float:
+        return self._total_us / self.count / 1000.0 if self.count else 0.0
+
+    @property
+    def min(self) -> float:
+        return (self._min_us or 0) / 1000.0
+
+    @property
+    def max(self) -> float:
+        return self._max_us / 1000.0
+
+    def summary(
+        self, percentiles: Iterable[float] = REPORTED_PERCENTILES
+    ) -> dict[str, float]:
+        result = {
+            "count": self.count,
+            "min": round(self.min, 3),
+            "mean": round(self.mean, 3),
+            "max": round(self.max, 3),
+        }
+        for percentile in percentiles:
+            result[f"p{percentile:g}"] = round(self.percentile(percentile), 3)
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summary plus the raw bucket counts, so histograms can be merged later."""
+        return {
+            **self.summary(),
+            "unit": "ms",
+            "sum_us": self._total_us,
+            "buckets": [[index, self._counts[index]] for index in sorted(self._counts)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Histogram:
+        histogram = cls()
+        for index, count in data.get("buckets") or []:
+            histogram._counts[int(index)] = int(count)
+        histogram.count = sum(histogram._counts.values())
+        histogram._total_us = int(data.get("sum_us") or 0)
+        if histogram.count:
+            histogram._min_us = int(round(float(data.get("min", 0)) * 1000))
+            histogram._max_us = int(round(float(data.get("max", 0)) * 1000))
+        return histogram
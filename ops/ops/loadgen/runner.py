@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Literal, Mapping
+
+from ._client import ConnectionPool, HttpClientError, HttpResponse
+from .histogram import Histogram
+from .workload import PreparedRequest, RequestKind, Workload
+
+logger = logging.getLogger(__name__)
+
+Arrival = Literal["constant", "poisson"]
+PROGRESS_INTERVAL_SECONDS = 5.0
+# Requests still running when the schedule ends get this long past their
+# own timeout before they are cancelled (and counted as "cancelled").
+DRAIN_GRACE_SECONDS = 5.0
+
+# Substring checks keep SSE parsing off the generator's critical path; a full
+# JSON decode per chunk costs more CPU than the gateway spends proxying it.
+_CHAT_TOKEN = b'"content":"'
+_CHAT_EMPTY_TOKEN = b'"content":""'
+_RESPONSES_TOKEN = b'"type":"response.output_text.delta"'
+_SSE_ERRORS = (
+    b'data: {"error"',
+    b'"type":"error"',
+    b'"type":"response.failed"',
+    b"event: error",
+)
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    url: str
+    workload: Workload
+    # Requests per second, held regardless of how fast responses come back.
+    rate: float
+    duration_s: float
+    arrival: Arrival = "poisson"
+    # Requests scheduled during the warmup are sent but not recorded.
+    warmup_s: float = 0.0
+    # Beyond this many outstanding requests new arrivals are dropped (and
+    # counted) instead of growing the backlog without bound.
+    max_in_flight: int = 2000
+    connections: int = 512
+    timeout_s: float = 120.0
+    api_key: str | None = None
+    headers: Mapping[str, str] = field(default_factory=dict)
+    seed: int | None = None
+    verify_tls: bool = True
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "rate": self.rate,
+            "duration_s": self.duration_s,
+            "arrival": self.arrival,
+            "warmup_s": self.warmup_s,
+            "max_in_flight": self.max_in_flight,
+            "connections": self.connections,
+            "timeout_s": self.timeout_s,
+            "seed": self.seed,
+            "mix": dict(self.workload.mix),
+            "deployment": self.workload.deployment,
+            "api_style": self.workload.api_style,
+            "prompt_tokens": self.workload.prompt_tokens,
+            "max_tokens": self.workload.max_tokens,
+        }
+
+
+class KindStats:
+    """Outcome counters and latency histograms for one request kind."""
+
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.ttft = Histogram()
+        self.itl = Histogram()
+        self.statuses: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.succeeded = 0
+        # Streams that returned 200 and then an SSE error event.
+        self.sse_errors = 0
+        self.output_events = 0
+
+    @property
+    def completed(self) -> int:
+        return sum(self.statuses.values()) + sum(self.errors.values())
+
+    def merge(self, other: KindStats) -> None:
+        self.latency.merge(other.latency)
+        self.ttft.merge(other.ttft)
+        self.itl.merge(other.itl)
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+        self.succeeded += other.succeeded
+        self.sse_errors += other.sse_errors
+        self.output_events += other.output_events
+
+    def to_dict(self, measured_seconds: float) -> dict[str, Any]:
+        completed = self.completed
+        return {
+            "completed": completed,
+            "succeeded": self.succeeded,
+            "error_rate": round(1 - self.succeeded / completed, 6)
+            if completed
+            else 0.0,
+            "throughput_rps": round(self.succeeded / measured_seconds, 3)
+            if measured_seconds > 0
+            else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "errors": dict(sorted(self.errors.items())),
+            "sse_errors": self.sse_errors,
+            "output_events": self.output_events,
+            "latency_ms": self.latency.to_dict(),
+            "ttft_ms": self.ttft.to_dict(),
+            "itl_ms": self.itl.to_dict(),
+        }
+
+
+@dataclass
+class LoadResult:
+    config: LoadConfig
+    started_at: str
+    scheduled: int = 0
+    sent: int = 0
+    dropped: int = 0
+    measured_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    schedule_lag: Histogram = field(default_factory=Histogram)
+    kinds: dict[str, KindStats] = field(default_factory=dict)
+
+    def overall(self) -> KindStats:
+        total = KindStats()
+        for stats in self.kinds.values():
+            total.merge(stats)
+        return total
+
+    def to_dict(self) -> dict[str, Any]:
+        overall = self.overall()
+        return {
+            "started_at": self.started_at,
+            "config": self.config.describe(),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "measured_seconds": round(self.measured_seconds, 3),
+            "offered_rps": self.config.rate,
+            "achieved_rps": round(overall.succeeded / self.measured_seconds, 3)
+            if self.measured_seconds > 0
+            else 0.0,
+            "requests": {
+                "scheduled": self.scheduled,
+                "sent": self.sent,
+                "dropped": self.dropped,
+            },
+            "schedule_lag_ms": self.schedule_lag.to_dict(),
+            "overall": overall.to_dict(self.measured_seconds),
+            "kinds": {
+                kind: stats.to_dict(self.measured_seconds)
+                for kind, stats in sorted(self.kinds.items())
+            },
+        }
+
+
+def arrival_offsets(
+    rate: float, duration_s: float, arrival: Arrival, rng: random.Random
+) -> Iterator[float]:
+    """Intended send times, in seconds from the start of the run."""
+    if rate <= 0:
+        return
+    offset = 0.0
+    while True:
+        if arrival == "poisson":
+            offset += rng.expovariate(rate)
+        else:
+            offset += 1.0 / rate
+        if offset >= duration_s:
+            return
+        yield offset
+
+
+async def _sse_events(response: HttpResponse) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in response.iter_chunks():
+        buffer += chunk
+        if b"\r" in buffer:
+            buffer = buffer.replace(b"\r\n", b"\n")
+        while True:
+            end = buffer.find(b"\n\n")
+            if end < 0:
+                break
+            event, buffer = buffer[:end], buffer[end + 2 :]
+            if event:
+                yield event
+    if buffer.strip():
+        yield buffer
+
+
+def _is_output_event(kind: RequestKind, event: bytes) -> bool:
+    if kind == "responses-stream":
+        return _RESPONSES_TOKEN in event
+    return _CHAT_TOKEN in event and _CHAT_EMPTY_TOKEN not in event
+
+
+class LoadGenerator:
+    """
+    Open-loop load: requests are sent on a fixed (or Poisson) schedule no
+    matter how slowly responses return. Latency and TTFT are measured from
+    each request's intended send time, so time spent queued behind a slow
+    generator or a saturated server counts against the target (no
+    coordinated omission).
+    """
+
+    def __init__(self, config: LoadConfig) -> None:
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._choose = config.workload.chooser(self._rng)
+        self._prepared = config.workload.prepare()
+        self._headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+            **({"api-key": config.api_key} if config.api_key else {}),
+            **config.headers,
+        }
+        self._in_flight: set[asyncio.Task[None]] = set()
+        self.result = LoadResult(
+            config=config,
+            started_at=dt.datetime.now(dt.timezone.utc).isoformat(),
+            kinds={kind: KindStats() for kind in self._prepared},
+        )
+
+    async def _issue(
+        self,
+        pool: ConnectionPool,
+        request: PreparedRequest,
+        intended: float,
+        stats: KindStats | None,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        first_output: float | None = None
+        last_output: float | None = None
+        output_events = 0
+        sse_error = False
+        status: int | None = None
+        error: str | None = None
+        itl: list[float] = []
+        try:
+            async with asyncio.timeout(self.config.timeout_s):
+                async with pool.request(
+                    "POST", request.path, headers=self._headers, body=request.body
+                ) as response:
+                    status = response.status
+                    event_stream = "text/event-stream" in response.headers.get(
+                        "content-type", ""
+                    )
+                    if request.stream and status == 200 and event_stream:
+                        async for event in _sse_events(response):
+                            now = loop.time()
+                            if any(marker in event for marker in _SSE_ERRORS):
+                                sse_error = True
+                            elif _is_output_event(request.kind, event):
+                                output_events += 1
+                                if first_output is None:
+                                    first_output = now
+                                else:
+                                    itl.append(now - last_output)  # type: ignore[operator]
+                                last_output = now
+                    else:
+                        await response.read()
+        except TimeoutError:
+            error = "timeout"
+        except (HttpClientError, ConnectionError, OSError) as exc:
+            error = type(exc).__name__
+        except asyncio.CancelledError:
+            if stats is not None:
+                stats.errors["cancelled"] += 1
+            raise
+        finished = loop.time()
+        if stats is None:
+            return
+        if error is not None:
+            stats.errors[error] += 1
+            return
+        stats.statuses[str(status)] += 1
+        if sse_error:
+            stats.sse_errors += 1
+        stats.output_events += output_events
+        if status is not None and 200 <= status < 300 and not sse_error:
+            stats.succeeded += 1
+            stats.latency.record((finished - intended) * 1000)
+            if first_output is not None:
+                stats.ttft.record((first_output - intended) * 1000)
+            for gap in itl:
+                stats.itl.record(gap * 1000)
+
+    async def _report_progress(self, started: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+            completed = sum(stats.completed for stats in self.result.kinds.values())
+            logger.info(
+                "[%5.0fs] sent=%s completed=%s in_flight=%s dropped=%s",
+                loop.time() - started,
+                self.result.sent,
+                completed,
+                len(self._in_flight),
+                self.result.dropped,
+            )
+
+    async def run(self) -> LoadResult:
+        config = self.config
+        loop = asyncio.get_running_loop()
+        pool = ConnectionPool(
+            config.url,
+            max_connections=config.connections,
+            verify_tls=config.verify_tls,
+        )
+        result = self.result
+        # Start slightly in the future so the first arrivals are not late.
+        started = loop.time() + 0.05
+        progress = asyncio.create_task(self._report_progress(started))
+        try:
+            for offset in arrival_offsets(
+                config.rate, config.duration_s, config.arrival, self._rng
+            ):
+                intended = started + offset
+                delay = intended - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                result.scheduled += 1
+                measured = offset >= config.warmup_s
+                if len(self._in_flight) >= config.max_in_flight:
+                    if measured:
+                        result.dropped += 1
+                    continue
+                if measured:
+                    result.schedule_lag.record((loop.time() - intended) * 1000)
+                kind = self._choose()
+                task = asyncio.create_task(
+                    self._issue(
+                        pool,
+                        self._prepared[kind],
+                        intended,
+                        result.kinds[kind] if measured else None,
+                    )
+                )
+                result.sent += 1
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+            if self._in_flight:
+                _, pending = await asyncio.wait(
+                    set(self._in_flight), timeout=config.timeout_s + DRAIN_GRACE_SECONDS
+                )
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            progress.cancel()
+            await asyncio.gather(progress, return_exceptions=True)
+            await pool.close()
+        result.elapsed_seconds = loop.time() - started
+        result.measured_seconds = max(0.0, config.duration_s - config.warmup_s)
+        return result
+
+
+async def run_load(config: LoadConfig) -> LoadResult:
+    return await LoadGenerator(config).run()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import random
+from dataclasses import dataclass
+from typing import Literal, Mapping
+
+RequestKind = Literal[
+    "chat", "chat-stream", "embeddings", "responses", "responses-stream"
+]
+REQUEST_KINDS: tuple[RequestKind, ...] = (
+    "chat",
+    "chat-stream",
+    "embeddings",
+    "responses",
+    "responses-stream",
+)
+ApiStyle = Literal["deployments", "v1"]
+
+_PROMPT_WORDS = (
+    "summarize the quarterly report for the regional sales team and list the "
+    "three most important risks with one mitigation for each of them"
+).split()
+
+
+class WorkloadError(ValueError):
+    """Raised for an invalid request mix or workload setting."""
+
+
+def parse_mix(value: str) -> dict[RequestKind, float]:
+    """
+    Parse "chat-stream=6,chat=2,embeddings=1" into normalized weights. A bare
+    kind ("chat-stream") means weight 1.
+    """
+    weights: dict[RequestKind, float] = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in REQUEST_KINDS:
+            raise WorkloadError(
+                f"Unknown request kind '{name}'; expected one of {', '.join(REQUEST_KINDS)}"
+            )
+        try:
+            weights[name] = float(weight) if weight else 1.0  # type: ignore[index]
+        except ValueError as exc:
+            raise WorkloadError(f"Invalid weight for '{name}': {weight}") from exc
+    total = sum(weights.values())
+    if total <= 0:
+        raise WorkloadError(f"Request mix '{value}' has no positive weights")
+    return {kind: weight / total for kind, weight in weights.items() if weight > 0}
+
+
+@dataclass(frozen=True)
+class PreparedRequest:
+    kind: RequestKind
+    path: str
+    body: bytes
+    stream: bool
+
+
+@dataclass(frozen=True)
+class Workload:
+    """What each generated request looks like."""
+
+    mix: Mapping[RequestKind, float]
+    deployment: str
+    embeddings_deployment: str | None = None
+    api_style: ApiStyle = "deployments"
+    api_version: str = "2024-10-21"
+    # ~4 characters per token, as the Azure tokenizer averages for English.
+    prompt_tokens: int = 200
+    max_tokens: int = 128
+    embedding_inputs: int = 1
+
+    def _prompt(self) -> str:
+        words = [
+            _PROMPT_WORDS[index % len(_PROMPT_WORDS)]
+            for index in range(self.prompt_tokens * 4 // 5)
+        ]
+        return " ".join(words) or "hello"
+
+    def _path(self, operation: str, deployment: str) -> str:
+        if self.api_style == "v1":
+            return f"/openai/v1/{operation}"
+        return f"/openai/deployments/{deployment}/{operation}?api-version={self.api_version}"
+
+    def prepare(self) -> dict[RequestKind, PreparedRequest]:
+        """Encode one request body per kind; bodies are reused for every request."""
+        prompt = self._prompt()
+        prepared: dict[RequestKind, PreparedRequest] = {}
+        for kind in self.mix:
+            stream = kind.endswith("-stream")
+            if kind.startswith("chat"):
+                deployment = self.deployment
+                path = self._path("chat/completions", deployment)
+                body: dict[str, object] = {
+                    "messages": [{"role": "user", "content": prompt}],
+                    "max_tokens": self.max_tokens,
+                }
+                if stream:
+                    body["stream"] = True
+                    body["stream_options"] = {"include_usage": True}
+            elif kind == "embeddings":
+                deployment = self.embeddings_deployment or self.deployment
+                path = self._path("embeddings", deployment)
+                body = {"input": [prompt] * max(1, self.embedding_inputs)}
+            else:
+                deployment = self.deployment
+                path = self._path("responses", deployment)
+                body = {
+                    "input": prompt,
+                    "max_output_tokens": self.max_tokens,
+                    "store": False,
+                }
+                if stream:
+                    body["stream"] = True
+            if self.api_style == "v1":
+                body["model"] = deployment
+            prepared[kind] = PreparedRequest(
+                kind=kind,
+                path=path,
+                body=json.dumps(body, separators=(",", ":")).encode("utf-8"),
+                stream=stream,
+            )
+        return prepared
+
+    def chooser(self, rng: random.Random) -> KindChooser:
+        return KindChooser(self.mix, rng)
+
+
+class KindChooser:
+    def __init__(self, mix: Mapping[RequestKind, float], rng: random.Random) -> None:
+        self._kinds = list(mix)
+        self._weights = [mix[kind] for kind in self._kinds]
+        self._rng = rng
+
+    def __call__(self) -> RequestKind:
+        if len(self._kinds) == 1:
+            return self._kinds[0]
+        return self._rng.choices(self._kinds, self._weights)[0]
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import logging
+import math
+import os
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable
+
+from ._bench_common import simulator_process, write_result
+from ._telemetry import span
+from .loadgen._client import ConnectionPool
+from .loadgen.cli import add_workload_arguments, workload_from_args
+from .loadgen.runner import LoadConfig, run_load
+
+logger = logging.getLogger(__name__)
+
+# Backend index -> simulator fault rules (see FaultRule in ops.aoai_simulator).
+FaultPlan = dict[int, list[dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    mix: str
+    faults: Callable[[int, float, argparse.Namespace], FaultPlan]
+
+
+def _no_faults(backends: int, duration: float, args: argparse.Namespace) -> FaultPlan:
+    return {}
+
+
+def _region_throttled(
+    backends: int, duration: float, args: argparse.Namespace
+) -> FaultPlan:
+    return {0: [{"status": 429, "retry_after_s": args.retry_after}]}
+
+
+def _rolling_429(backends: int, duration: float, args: argparse.Namespace) -> FaultPlan:
+    plan: FaultPlan = {}
+    wave = args.wave_seconds
+    for index in range(math.ceil(duration / wave)):
+        plan.setdefault(index % backends, []).append(
+            {
+                "status": 429,
+                "retry_after_s": args.retry_after,
+                "start_s": index * wave,
+                "end_s": (index + 1) * wave,
+            }
+        )
+    return plan
+
+
+def _slow_5xx(backends: int, duration: float, args: argparse.Namespace) -> FaultPlan:
+    return {
+        0: [
+            {
+                "status": 503,
+                "code": "ServiceUnavailable",
+                "delay_ms": args.slow_error_ms,
+                "probability": 0.5,
+            }
+        ]
+    }
+
+
+def _sse_error(at_chunk: int) -> Callable[[int, float, argparse.Namespace], FaultPlan]:
+    def plan(backends: int, duration: float, args: argparse.Namespace) -> FaultPlan:
+        return {
+            0: [
+                {"kind": "sse_error", "code": "too_many_requests", "at_chunk": at_chunk}
+            ]
+        }
+
+    return plan
+
+
+SCENARIOS: dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("baseline", "No faults", "chat=1,chat-stream=1", _no_faults),
+        Scenario(
+            "region-throttled",
+            "Backend 0 answers every request with 429",
+            "chat=1,chat-stream=1",
+            _region_throttled,
+        ),
+        Scenario(
+            "rolling-429",
+            "Each backend in turn is throttled for --wave-seconds",
+            "chat=1,chat-stream=1",
+            _rolling_429,
+        ),
+        Scenario(
+            "slow-5xx",
+            "Half of backend 0's requests fail with 503 after --slow-error-ms",
+            "chat=1,chat-stream=1",
+            _slow_5xx,
+        ),
+        Scenario(
+            "sse-429-first-chunk",
+            "Backend 0 streams a too_many_requests error event as its first chunk",
+            "chat-stream=1,responses-stream=1",
+            _sse_error(1),
+        ),
+        Scenario(
+            "sse-429-second-chunk",
+            "Backend 0 streams a too_many_requests error event as its second chunk",
+            "chat-stream=1,responses-stream=1",
+            _sse_error(2),
+        ),
+    )
+}
+
+
+async def _control(
+    pool: ConnectionPool, method: str, path: str, payload: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    async with pool.request(
+        method, path, headers={"Content-Type": "application/json"}, body=body
+    ) as response:
+        data = await response.read()
+    if response.status != 200:
+        raise RuntimeError(
+            f"{method} {path} failed with {response.status}: {data[:200]!r}"
+        )
+    return json.loads(data)
+
+
+def _upstream_summary(stats: list[dict[str, Any]]) -> dict[str, Any]:
+    backends = []
+    for index, snapshot in enumerate(stats):
+        counters: dict[str, int] = {}
+        for deployment in snapshot["deployments"].values():
+            for key, value in deployment.items():
+                counters[key] = counters.get(key, 0) + value
+        calls = counters.get("requests", 0)
+        # A 200 whose stream carried an error event did not serve the client.
+        useful = counters.get("status_200", 0) - counters.get("faults_sse", 0)
+        backends.append(
+            {
+                "backend": index,
+                "region": snapshot["region"],
+                "calls": calls,
+                "served": useful,
+                "wasted": calls - useful,
+                "statuses": {
+                    key.removeprefix("status_"): value
+                    for key, value in sorted(counters.items())
+                    if key.startswith("status_")
+                },
+                "faults_injected": counters.get("faults_status", 0)
+                + counters.get("faults_sse", 0),
+                "quota_throttled": counters.get("throttled", 0),
+            }
+        )
+    return {
+        "calls": sum(backend["calls"] for backend in backends),
+        "wasted": sum(backend["wasted"] for backend in backends),
+        "backends": backends,
+    }
+
+
+async def run_scenario(
+    scenario: Scenario,
+    base: LoadConfig,
+    args: argparse.Namespace,
+    controls: list[ConnectionPool],
+) -> dict[str, Any]:
+    plan = scenario.faults(len(controls), args.duration, args)
+    for index, control in enumerate(controls):
+        await _control(
+            control,
+            "POST",
+            "/_sim/faults",
+            {"deployment": "*", "faults": plan.get(index, [])},
+        )
+    # Reset last: it zeroes counters and restarts the fault windows' clock.
+    for control in controls:
+        await _control(control, "POST", "/_sim/reset")
+
+    config = replace(base, workload=workload_from_args(args, scenario.mix))
+    result = await run_load(config)
+    upstream = _upstream_summary(
+        [await _control(control, "GET", "/_sim/stats") for control in controls]
+    )
+    data = result.to_dict()
+    overall = data["overall"]
+    latency = overall["latency_ms"]
+    # Every request is recorded (no warmup), so upstream calls line up with
+    # the requests the client sent.
+    sent = data["requests"]["sent"]
+    return {
+        "description": scenario.description,
+        "mix": scenario.mix,
+        "faults": {str(index): rules for index, rules in plan.items()},
+        "client": {
+            "sent": sent,
+            "succeeded": overall["succeeded"],
+            "error_rate": overall["error_rate"],
+            "statuses": overall["statuses"],
+            "errors": overall["errors"],
+            "sse_errors": overall["sse_errors"],
+            "time_to_success_ms": {
+                key: latency[key]
+                for key in ("p50", "p90", "p95", "p99", "p99.9", "max", "mean")
+            },
+            "ttft_ms": {
+                key: overall["ttft_ms"][key] for key in ("p50", "p95", "p99", "max")
+            },
+        },
+        "upstream": {
+            **upstream,
+            "attempts_per_request": round(upstream["calls"] / sent, 3) if sent else 0.0,
+            "wasted_per_success": round(upstream["wasted"] / overall["succeeded"], 3)
+            if overall["succeeded"]
+            else None,
+        },
+    }
+
+
+def compare_reports(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    lines = []
+    for name, entry in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        now, before = entry["client"], previous["client"]
+        lines.append(
+            f"{name:22} p99 {before['time_to_success_ms']['p99']:8.0f} -> "
+            f"{now['time_to_success_ms']['p99']:8.0f}ms  errors "
+            f"{before['error_rate']:6.2%} -> {now['error_rate']:6.2%}  attempts "
+            f"{previous['upstream']['attempts_per_request']:.2f} -> "
+            f"{entry['upstream']['attempts_per_request']:.2f}"
+        )
+    return lines
+
+
+async def run(args: argparse.Namespace, backend_urls: list[str]) -> dict[str, Any]:
+    controls = [ConnectionPool(url, max_connections=2) for url in backend_urls]
+    base = LoadConfig(
+        url=args.gateway_url,
+        workload=workload_from_args(args, "chat=1"),
+        rate=args.rate,
+        duration_s=args.duration,
+        arrival=args.arrival,
+        connections=args.connections,
+        timeout_s=args.timeout,
+        api_key=args.gateway_key,
+        seed=args.seed,
+        verify_tls=not args.insecure,
+    )
+    report: dict[str, Any] = {
+        "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "label": args.label,
+        "gateway_url": args.gateway_url,
+        "backends": backend_urls,
+        "rate": args.rate,
+        "duration_s": args.duration,
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            logger.info("Scenario %s: %s", name, SCENARIOS[name].description)
+            with span("bench_failover_scenario", scenario=name):
+                report["scenarios"][name] = await run_scenario(
+                    SCENARIOS[name], base, args, controls
+                )
+        # Leave the backends healthy for whoever uses them next.
+        for control in controls:
+            await _control(
+                control, "POST", "/_sim/faults", {"deployment": "*", "faults": []}
+            )
+    finally:
+        for control in controls:
+            await control.close()
+    return report
+
+
+def _log_report(report: dict[str, Any]) -> None:
+    logger.info(
+        "%-22s %8s %8s %8s %8s %9s %7s",
+        "scenario",
+        "p50",
+        "p99",
+        "p99.9",
+        "errors",
+        "attempts",
+        "wasted",
+    )
+    for name, entry in report["scenarios"].items():
+        client, upstream = entry["client"], entry["upstream"]
+        tts = client["time_to_success_ms"]
+        logger.info(
+            "%-22s %7.0fms %7.0fms %7.0fms %7.2f%% %9.2f %7s",
+            name,
+            tts["p50"],
+            tts["p99"],
+            tts["p99.9"],
+            client["error_rate"] * 100,
+            upstream["attempts_per_request"],
+            upstream["wasted"],
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="run-bench-failover",
+        description=(
+            "Script backend failures on local simulator backends and measure the "
+            "gateway's failover: time-to-success, attempts, wasted upstream calls."
+        ),
+    )
+    parser.add_argument("--gateway-url", required=True)
+    parser.add_argument(
+        "--gateway-key",
+        default=os.environ.get("LOADGEN_API_KEY"),
+        help="Gateway client key (default: $LOADGEN_API_KEY)",
+    )
+    backends = parser.add_mutually_exclusive_group()
+    backends.add_argument(
+        "--backend-url",
+        action="append",
+        help="Running run-aoai-simulator backends, in the gateway's backend order",
+    )
+    backends.add_argument(
+        "--backends",
+        type=int,
+        default=3,
+        help="Start this many simulators on consecutive ports from --base-port",
+    )
+    parser.add_argument("--base-port", type=int, default=8101)
+    parser.add_argument(
+        "--simulator-arg",
+        action="append",
+        default=[],
+        help="Extra run-aoai-simulator argument, e.g. --simulator-arg=--ttft-ms=300",
+    )
+    parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS), help="Default: all"
+    )
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--connections", type=int, default=512)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--insecure", action="store_true")
+    parser.add_argument("--retry-after", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--wave-seconds", type=float, default=15.0)
+    parser.add_argument("--slow-error-ms", type=float, default=2000.0)
+    parser.add_argument(
+        "--label", default="default", help="Routing configuration under test"
+    )
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare with")
+    parser.add_argument("--output", type=Path)
+    add_workload_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with ExitStack() as stack, span("bench_failover"):
+        urls = args.backend_url or [
+            stack.enter_context(
+                simulator_process(
+                    port=args.base_port + index,
+                    region=f"backend-{index}",
+                    extra_args=args.simulator_arg,
+                )
+            )
+            for index in range(args.backends)
+        ]
+        if len(urls) < 2:
+            parser.error("failover needs at least two backends")
+        report = asyncio.run(run(args, urls))
+
+    _log_report(report)
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        logger.info("Compared with %s (%s):", args.baseline, baseline.get("label"))
+        for line in compare_reports(report, baseline):
+            logger.info("  %s", line)
+    path = write_result(f"failover-{args.label}", report, args.output)
+    logger.info("Results written to %s", path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
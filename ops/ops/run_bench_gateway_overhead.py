@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import logging
+import math
+import os
+from contextlib import ExitStack
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+from ._bench_common import container_cpu_seconds, simulator_process, write_result
+from ._telemetry import span
+from .loadgen.cli import add_workload_arguments, workload_from_args
+from .loadgen.runner import LoadConfig, LoadResult, run_load
+
+logger = logging.getLogger(__name__)
+
+# Gateway route -> request kinds that exercise it.
+ROUTE_MIXES = {
+    "openai-chat": "chat=1,chat-stream=1",
+    "openai-embeddings": "embeddings=1",
+    "openai-responses": "responses=1,responses-stream=1",
+}
+PERCENTILES = ("p50", "p95", "p99")
+# Highest error rate a step may have and still count as sustainable.
+SUSTAINABLE_ERROR_RATE = 0.01
+# p99 schedule lag beyond which the load generator, not the target, limits
+# the offered rate.
+GENERATOR_MAX_LAG_MS = 50.0
+# gateway_http_concurrency is suggested at this share of the in-flight
+# requests one replica sustains, so scale-out starts before saturation.
+CONCURRENCY_HEADROOM = 0.7
+
+
+def _percentile_deltas(
+    direct: dict[str, Any], gateway: dict[str, Any]
+) -> dict[str, float] | None:
+    if not direct["count"] or not gateway["count"]:
+        return None
+    return {name: round(gateway[name] - direct[name], 3) for name in PERCENTILES}
+
+
+def _without_buckets(histogram: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in histogram.items() if key != "buckets"}
+
+
+def _compact(result: dict[str, Any]) -> dict[str, Any]:
+    """A loadgen result without histogram buckets, for the benchmark report."""
+
+    def strip(stats: dict[str, Any]) -> dict[str, Any]:
+        return {
+            key: _without_buckets(value) if key.endswith("_ms") else value
+            for key, value in stats.items()
+        }
+
+    return {
+        "achieved_rps": result["achieved_rps"],
+        "requests": result["requests"],
+        "schedule_lag_ms": _without_buckets(result["schedule_lag_ms"]),
+        "overall": strip(result["overall"]),
+        "kinds": {kind: strip(stats) for kind, stats in result["kinds"].items()},
+    }
+
+
+def compare(direct: LoadResult, gateway: LoadResult) -> dict[str, Any]:
+    """Added latency and TTFT per request kind (gateway minus direct)."""
+    direct_data, gateway_data = direct.to_dict(), gateway.to_dict()
+    added: dict[str, Any] = {}
+    for kind, gateway_stats in gateway_data["kinds"].items():
+        direct_stats = direct_data["kinds"].get(kind)
+        if direct_stats is None:
+            continue
+        added[kind] = {
+            "latency_ms": _percentile_deltas(
+                direct_stats["latency_ms"], gateway_stats["latency_ms"]
+            ),
+            "ttft_ms": _percentile_deltas(
+                direct_stats["ttft_ms"], gateway_stats["ttft_ms"]
+            ),
+            "error_rate": round(
+                gateway_stats["error_rate"] - direct_stats["error_rate"], 6
+            ),
+        }
+    return added
+
+
+def _sustainable(result: LoadResult, p99_budget_ms: float) -> tuple[bool, str]:
+    data = result.to_dict()
+    overall = data["overall"]
+    if data["schedule_lag_ms"]["p99"] > GENERATOR_MAX_LAG_MS:
+        return False, "load generator fell behind"
+    if overall["error_rate"] > SUSTAINABLE_ERROR_RATE:
+        return False, f"error rate {overall['error_rate']:.2%}"
+    # Open-loop arrivals past the in-flight cap are dropped instead of sent;
+    # any drop means the target no longer keeps up with the offered rate.
+    if data["requests"]["dropped"]:
+        return False, f"{data['requests']['dropped']} requests over the in-flight cap"
+    if overall["latency_ms"]["p99"] > p99_budget_ms:
+        return (
+            False,
+            f"p99 {overall['latency_ms']['p99']:.0f}ms > {p99_budget_ms:.0f}ms",
+        )
+    return True, "ok"
+
+
+async def _measure(
+    config: LoadConfig, container: str | None
+) -> tuple[LoadResult, float | None]:
+    cpu_before = container_cpu_seconds(container) if container else None
+    result = await run_load(config)
+    cpu_after = container_cpu_seconds(container) if container else None
+    cpu = (
+        cpu_after - cpu_before
+        if cpu_before is not None and cpu_after is not None
+        else None
+    )
+    return result, cpu
+
+
+async def _max_sustainable_rps(
+    config: LoadConfig,
+    *,
+    start_rate: float,
+    factor: float,
+    limit: float,
+    p99_budget_ms: float,
+) -> dict[str, Any]:
+    steps: list[dict[str, Any]] = []
+    best: LoadResult | None = None
+    rate = start_rate
+    while rate <= limit:
+        result = await run_load(replace(config, rate=rate))
+        ok, reason = _sustainable(result, p99_budget_ms)
+        data = result.to_dict()
+        steps.append(
+            {
+                "rate": round(rate, 3),
+                "achieved_rps": data["achieved_rps"],
+                "p99_ms": data["overall"]["latency_ms"]["p99"],
+                "error_rate": data["overall"]["error_rate"],
+                "sustainable": ok,
+                "reason": reason,
+            }
+        )
+        logger.info("  %.1f rps -> %s", rate, reason)
+        if not ok:
+            break
+        best = result
+        rate *= factor
+    # A search stopped by the generator (or --max-rate) is only a lower bound.
+    stopped_by = (
+        steps[-1]["reason"] if steps and not steps[-1]["sustainable"] else "max rate"
+    )
+    if best is None:
+        return {"steps": steps, "stopped_by": stopped_by, "max_sustainable_rps": None}
+    data = best.to_dict()
+    mean_latency_s = data["overall"]["latency_ms"]["mean"] / 1000.0
+    return {
+        "steps": steps,
+        "stopped_by": stopped_by,
+        "max_sustainable_rps": data["achieved_rps"],
+        # Little's law: requests in flight = arrival rate x time in system.
+        "in_flight_at_max": round(data["achieved_rps"] * mean_latency_s, 1),
+    }
+
+
+async def run(args: argparse.Namespace, backend_url: str) -> dict[str, Any]:
+    base = LoadConfig(
+        url=backend_url,
+        workload=workload_from_args(args, "chat=1"),
+        rate=args.rate,
+        duration_s=args.duration,
+        arrival=args.arrival,
+        warmup_s=args.warmup,
+        connections=args.connections,
+        timeout_s=args.timeout,
+        seed=args.seed,
+        verify_tls=not args.insecure,
+    )
+    report: dict[str, Any] = {
+        "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "gateway_url": args.gateway_url,
+        "backend_url": backend_url,
+        "rate": args.rate,
+        "duration_s": args.duration,
+        "replicas": args.replicas,
+        "routes": {},
+    }
+    for route in args.route or list(ROUTE_MIXES):
+        workload = workload_from_args(args, ROUTE_MIXES[route])
+        # The same seed replays the same arrival schedule and request mix.
+        direct_config = replace(base, workload=workload, api_key=args.backend_key)
+        gateway_config = replace(
+            base, url=args.gateway_url, workload=workload, api_key=args.gateway_key
+        )
+        logger.info("[%s] direct to backend at %.1f rps", route, args.rate)
+        direct = await run_load(direct_config)
+        logger.info("[%s] through the gateway at %.1f rps", route, args.rate)
+        gateway, cpu_seconds = await _measure(gateway_config, args.gateway_container)
+
+        gateway_data = gateway.to_dict()
+        completed = gateway_data["overall"]["completed"]
+        entry: dict[str, Any] = {
+            "added": compare(direct, gateway),
+            "cpu_ms_per_request": (
+                round(cpu_seconds * 1000 / completed, 3)
+                if cpu_seconds is not None and completed
+                else None
+            ),
+            "direct": _compact(direct.to_dict()),
+            "gateway": _compact(gateway_data),
+        }
+        if args.find_max_rps:
+            budget = (
+                direct.to_dict()["overall"]["latency_ms"]["p99"]
+                + args.p99_overhead_budget_ms
+            )
+            logger.info(
+                "[%s] searching max sustainable rate (p99 <= %.0fms)", route, budget
+            )
+            search = await _max_sustainable_rps(
+                gateway_config,
+                start_rate=args.rate,
+                factor=args.rate_factor,
+                limit=args.max_rate,
+                p99_budget_ms=budget,
+            )
+            max_rps = search["max_sustainable_rps"]
+            if max_rps is not None:
+                search["per_replica_rps"] = round(max_rps / args.replicas, 3)
+                search["suggested_http_concurrency"] = max(
+                    1,
+                    math.floor(
+                        search["in_flight_at_max"]
+                        / args.replicas
+                        * CONCURRENCY_HEADROOM
+                    ),
+                )
+            entry["capacity"] = search
+        report["routes"][route] = entry
+    return report
+
+
+def _log_report(report: dict[str, Any]) -> None:
+    for route, entry in report["routes"].items():
+        for kind, added in entry["added"].items():
+            latency, ttft = added["latency_ms"], added["ttft_ms"]
+            logger.info(
+                "%-18s %-17s added latency p50/p95/p99 %s  TTFT %s",
+                route,
+                kind,
+                "/".join(f"{latency[p]:+.1f}" for p in PERCENTILES) if latency else "-",
+                "/".join(f"{ttft[p]:+.1f}" for p in PERCENTILES) if ttft else "-",
+            )
+        if entry["cpu_ms_per_request"] is not None:
+            logger.info(
+                "%-18s CPU per request: %.2fms", route, entry["cpu_ms_per_request"]
+            )
+        capacity = entry.get("capacity")
+        if capacity and capacity.get("max_sustainable_rps") is not None:
+            logger.info(
+                "%-18s max sustainable %.1f rps per replica (stopped by: %s); "
+                "suggested gateway_http_concurrency %s",
+                route,
+                capacity["per_replica_rps"],
+                capacity["stopped_by"],
+                capacity["suggested_http_concurrency"],
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="run-bench-gateway-overhead",
+        description=(
+            "Send identical open-loop workloads directly to a backend and through "
+            "each gateway route, and report the latency, TTFT and CPU the gateway adds."
+        ),
+    )
+    parser.add_argument("--gateway-url", required=True)
+    parser.add_argument(
+        "--gateway-key",
+        default=os.environ.get("LOADGEN_API_KEY"),
+        help="Gateway client key (default: $LOADGEN_API_KEY)",
+    )
+    backend = parser.add_mutually_exclusive_group(required=True)
+    backend.add_argument("--backend-url", help="Backend the gateway proxies to")
+    backend.add_argument(
+        "--simulator-port",
+        type=int,
+        help=(
+            "Start run-aoai-simulator on this port as the backend; the gateway "
+            "must be configured to use it (e.g. AZURE_OPENAI_ENDPOINT_0)"
+        ),
+    )
+    parser.add_argument("--backend-key", default=os.environ.get("BACKEND_API_KEY"))
+    parser.add_argument(
+        "--simulator-arg",
+        action="append",
+        default=[],
+        help="Extra run-aoai-simulator argument, e.g. --simulator-arg=--ttft-ms=300",
+    )
+    parser.add_argument(
+        "--route",
+        action="append",
+        choices=list(ROUTE_MIXES),
+        help="Default: all routes",
+    )
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--warmup", type=float, default=10.0)
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--connections", type=int, default=512)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--insecure", action="store_true")
+    parser.add_argument(
+        "--gateway-container",
+        help="Local docker container running the gateway; enables CPU per request",
+    )
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=1,
+        help="Gateway replicas serving the test (pin min=max replicas on ACA)",
+    )
+    parser.add_argument(
+        "--find-max-rps",
+        action="store_true",
+        help="Raise the rate until the gateway stops keeping up",
+    )
+    parser.add_argument("--rate-factor", type=float, default=1.5)
+    parser.add_argument("--max-rate", type=float, default=2000.0)
+    parser.add_argument(
+        "--p99-overhead-budget-ms",
+        type=float,
+        default=250.0,
+        help="p99 above the direct p99 at which a rate stops being sustainable",
+    )
+    parser.add_argument("--output", type=Path)
+    add_workload_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.rate_factor <= 1:
+        parser.error("--rate-factor must be greater than 1")
+
+    with ExitStack() as stack, span("bench_gateway_overhead"):
+        backend_url = args.backend_url or stack.enter_context(
+            simulator_process(port=args.simulator_port, extra_args=args.simulator_arg)
+        )
+        report = asyncio.run(run(args, backend_url))
+    _log_report(report)
+    path = write_result("gateway-overhead", report, args.output)
+    logger.info("Results written to %s", path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,8 +3,20 @@ from __future__ import annotations
 import datetime as dt
 import json
 import logging
+import os
+from dataclasses import dataclass
+from typing import Any
 
-from ._e2e_common import build_test_environment, run_scenario
+from ._e2e_common import build_test_environment, e2e_results_dir, run_scenario
+from ._locust_stats import SUMMARY_SUFFIX, history, load_summary
+from ._scale_sampler import (
+    AzureMonitorSource,
+    MetricSource,
+    PrometheusSource,
+    ScaleSampler,
+    log_scale_report,
+    scale_report,
+)
 from ._utils import ensure, run_logged
 
 USER_COUNT = 180
@@ -14,6 +26,97 @@ EXPECTED_SCALE_INCREASE = 1
 ENDPOINT_PATH = "round-robin-simple"
 
 
+@dataclass(frozen=True)
+class ScalabilitySlo:
+    """What users must have experienced while the gateway scaled out."""
+
+    # Client-side latency over the whole run (Locust aggregate).
+    p95_ms: float
+    p99_ms: float
+    max_error_rate: float
+    # Mean client requests/s once replicas peaked (whole run if they never did).
+    min_rps: float
+    # From the start of load to the first replica above the minimum.
+    max_time_to_scale_s: float
+
+
+# Starting points for the simulator-backed E2E deployment; the round-robin
+# locustfile offers roughly one request per user per second.
+SLO = ScalabilitySlo(
+    p95_ms=2000.0,
+    p99_ms=5000.0,
+    max_error_rate=0.01,
+    min_rps=USER_COUNT * 0.5,
+    max_time_to_scale_s=300.0,
+)
+
+
+def evaluate_slo(
+    slo: ScalabilitySlo, summary: dict[str, Any] | None, report: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """One check per threshold; observed is None when it could not be measured."""
+    latency = summary["latency_ms"] if summary else {}
+    steady = report["client_steady"]
+    rps = (
+        steady["mean_rps"]
+        if steady["points"]
+        else report["client_ramp"].get("mean_rps")
+    )
+    stand_in = report["required_replicas"] is None
+    checks = [
+        ("p95_ms", slo.p95_ms, latency.get("p95"), "max"),
+        ("p99_ms", slo.p99_ms, latency.get("p99"), "max"),
+        (
+            "error_rate",
+            slo.max_error_rate,
+            summary["error_rate"] if summary else None,
+            "max",
+        ),
+        ("rps", slo.min_rps, rps, "min"),
+        (
+            "time_to_scale_s",
+            slo.max_time_to_scale_s,
+            # Without replica bounds (stand-in mode) scale-out is not measured.
+            None if stand_in else report["time_to_scale_s"],
+            "max",
+        ),
+    ]
+    results = []
+    for name, threshold, observed, kind in checks:
+        if observed is None:
+            # Never scaling out is a violation; anything else unmeasured is skipped.
+            ok = None if name != "time_to_scale_s" or stand_in else False
+        elif kind == "max":
+            ok = observed <= threshold
+        else:
+            ok = observed >= threshold
+        results.append(
+            {
+                "name": name,
+                "kind": kind,
+                "threshold": threshold,
+                "observed": observed,
+                "ok": ok,
+            }
+        )
+    return results
+
+
+def _log_slo(scenario: str, checks: list[dict[str, Any]]) -> None:
+    for check in checks:
+        status = {True: "ok", False: "VIOLATED", None: "not measured"}[check["ok"]]
+        logging.log(
+            logging.ERROR if check["ok"] is False else logging.INFO,
+            "SLO %s %-15s %s %s observed=%s: %s",
+            scenario,
+            check["name"],
+            "<=" if check["kind"] == "max" else ">=",
+            check["threshold"],
+            "-" if check["observed"] is None else round(check["observed"], 3),
+            status,
+        )
+
+
 def _utc_now() -> dt.datetime:
     return dt.datetime.now(dt.timezone.utc)
 
@@ -116,52 +219,127 @@ def _max_replica_count(
     return int(max(maxima))
 
 
-def run(
+def _metric_source(env: dict[str, str]) -> MetricSource:
+    # Stand-in mode: scrape gateway replicas directly instead of Azure Monitor.
+    urls = env.get("E2E_PROMETHEUS_URL") or os.environ.get("E2E_PROMETHEUS_URL")
+    if urls:
+        return PrometheusSource([url.strip() for url in urls.split(",") if url.strip()])
+    return AzureMonitorSource(env["GATEWAY_APP_RESOURCE_ID"])
+
+
+def run_scalability(
+    env: dict[str, str],
     *,
-    base_env: dict[str, str] | None = None,
+    scenario: str,
+    user_count: int,
+    spawn_rate: float,
+    run_time: str,
+    expected_scale_increase: int,
+    end_padding: dt.timedelta,
+    slo: ScalabilitySlo,
 ) -> None:
-    env = base_env or build_test_environment()
+    """
+    Run the load profile while sampling replicas, gateway RPS/latency and
+    client latency, write `<scenario>.scale.json`, and assert both the
+    scale-out and the scenario's SLO.
+    """
+    env = {**env, "E2E_RESULTS_DIR": str(e2e_results_dir(env))}
+    source = _metric_source(env)
+    stand_in = isinstance(source, PrometheusSource)
+    min_replicas: int | None = None
+    if not stand_in:
+        min_replicas, max_replicas_configured = _replica_bounds(
+            env["RESOURCE_GROUP_NAME"], env["GATEWAY_APP_NAME"]
+        )
+        logging.info(
+            "Replica bounds configured: min=%s max=%s",
+            min_replicas,
+            max_replicas_configured,
+        )
+    required = None if min_replicas is None else min_replicas + expected_scale_increase
 
-    resource_id = env["GATEWAY_APP_RESOURCE_ID"]
-    resource_group = env["RESOURCE_GROUP_NAME"]
-    app_name = env["GATEWAY_APP_NAME"]
+    sampler = ScaleSampler(source, label=scenario)
+    try:
+        with sampler:
+            run_scenario(
+                test_file="scenario_round_robin.py",
+                endpoint_path=ENDPOINT_PATH,
+                user_count=user_count,
+                run_time=run_time,
+                spawn_rate=spawn_rate,
+                base_env=env,
+                scenario=scenario,
+            )
+    finally:
+        results_dir = e2e_results_dir(env)
+        report = scale_report(
+            sampler,
+            history(results_dir / scenario),
+            baseline_replicas=min_replicas,
+            required_replicas=required,
+        )
+        summary_path = results_dir / f"{scenario}{SUMMARY_SUFFIX}"
+        summary = load_summary(summary_path) if summary_path.exists() else None
+        slo_checks = evaluate_slo(slo, summary, report)
+        report["verdict"]["slo"] = slo_checks
+        report["verdict"]["slo_ok"] = all(
+            check["ok"] is not False for check in slo_checks
+        )
+        report_path = results_dir / f"{scenario}.scale.json"
+        report_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        log_scale_report(report)
+        _log_slo(scenario, slo_checks)
+        logging.info("Scaling report written to %s", report_path)
 
-    window_start = _utc_now()
-    run_scenario(
-        test_file="scenario_round_robin.py",
-        endpoint_path=ENDPOINT_PATH,
-        user_count=USER_COUNT,
-        run_time=RUN_TIME,
-        spawn_rate=SPAWN_RATE,
-        base_env=env,
-    )
-    window_end = _utc_now() + dt.timedelta(minutes=2)
+    violations = [check["name"] for check in slo_checks if check["ok"] is False]
 
-    metric_name = _replica_metric_name(resource_id)
-    min_replicas, max_replicas_configured = _replica_bounds(resource_group, app_name)
+    if stand_in:
+        logging.info("Stand-in metrics source; skipping the replica count assertion")
+        _raise_on_violations(scenario, violations)
+        return
+    resource_id = env["GATEWAY_APP_RESOURCE_ID"]
     observed_max = _max_replica_count(
         resource_id=resource_id,
-        metric_name=metric_name,
-        window_start=window_start - dt.timedelta(minutes=1),
-        window_end=window_end,
+        metric_name=_replica_metric_name(resource_id),
+        window_start=sampler.started - dt.timedelta(minutes=1),
+        window_end=_utc_now() + end_padding,
     )
-
-    required = min_replicas + EXPECTED_SCALE_INCREASE
-    logging.info(
-        "Replica bounds configured: min=%s max=%s; observed peak=%s",
-        min_replicas,
-        max_replicas_configured,
-        observed_max,
-    )
-    if observed_max < required:
+    logging.info("Observed peak replicas=%s", observed_max)
+    if observed_max < required:  # type: ignore[operator]
         raise RuntimeError(
             f"Replica count did not scale as expected (observed {observed_max}, required >= {required})"
         )
     logging.info(
-        "Replica scaling OK: observed peak %s (required >= %s)",
+        "Replica scaling OK (%s): observed peak %s (required >= %s)",
+        scenario,
         observed_max,
         required,
     )
+    _raise_on_violations(scenario, violations)
+
+
+def _raise_on_violations(scenario: str, violations: list[str]) -> None:
+    if violations:
+        raise RuntimeError(
+            f"Scenario '{scenario}' violated its SLO: {', '.join(violations)}"
+        )
+    logging.info("SLO met (%s)", scenario)
+
+
+def run(
+    *,
+    base_env: dict[str, str] | None = None,
+) -> None:
+    run_scalability(
+        base_env or build_test_environment(),
+        scenario="scalability",
+        user_count=USER_COUNT,
+        spawn_rate=SPAWN_RATE,
+        run_time=RUN_TIME,
+        expected_scale_increase=EXPECTED_SCALE_INCREASE,
+        end_padding=dt.timedelta(minutes=2),
+        slo=SLO,
+    )
 
 
 def main(argv: list[str] | None = None) -> int:  # noqa: ARG001
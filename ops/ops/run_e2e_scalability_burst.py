@@ -3,64 +3,35 @@ from __future__ import annotations
 import datetime as dt
 import logging
 
-from ._e2e_common import build_test_environment, run_scenario
-from .run_e2e_scalability import (
-    _max_replica_count,
-    _replica_bounds,
-    _replica_metric_name,
-    _utc_now,
-)
+from ._e2e_common import build_test_environment
+from .run_e2e_scalability import ScalabilitySlo, run_scalability
 
 # Fixed load profile for a heavier burst scenario
 USER_COUNT = 260
 SPAWN_RATE = 40.0
 RUN_TIME = "20m"
 EXPECTED_SCALE_INCREASE = 2
-ENDPOINT_PATH = "round-robin-simple"
+# The burst spawns faster and needs two extra replicas, so latency and the
+# time to the first scale-out get more headroom.
+SLO = ScalabilitySlo(
+    p95_ms=3000.0,
+    p99_ms=8000.0,
+    max_error_rate=0.02,
+    min_rps=USER_COUNT * 0.5,
+    max_time_to_scale_s=300.0,
+)
 
 
 def run(*, base_env: dict[str, str] | None = None) -> None:
-    env = base_env or build_test_environment()
-
-    resource_id = env["GATEWAY_APP_RESOURCE_ID"]
-    resource_group = env["RESOURCE_GROUP_NAME"]
-    app_name = env["GATEWAY_APP_NAME"]
-
-    window_start = _utc_now()
-    run_scenario(
-        test_file="scenario_round_robin.py",
-        endpoint_path=ENDPOINT_PATH,
+    run_scalability(
+        base_env or build_test_environment(),
+        scenario="scalability-burst",
         user_count=USER_COUNT,
-        run_time=RUN_TIME,
         spawn_rate=SPAWN_RATE,
-        base_env=env,
-    )
-    window_end = _utc_now() + _metric_slop()
-
-    metric_name = _replica_metric_name(resource_id)
-    min_replicas, max_replicas_configured = _replica_bounds(resource_group, app_name)
-    observed_max = _max_replica_count(
-        resource_id=resource_id,
-        metric_name=metric_name,
-        window_start=window_start - _metric_slop(),
-        window_end=window_end,
-    )
-
-    required = min_replicas + EXPECTED_SCALE_INCREASE
-    logging.info(
-        "Replica bounds configured: min=%s max=%s; observed peak=%s",
-        min_replicas,
-        max_replicas_configured,
-        observed_max,
-    )
-    if observed_max < required:
-        raise RuntimeError(
-            f"Replica count did not scale as expected (observed {observed_max}, required >= {required})"
-        )
-    logging.info(
-        "Replica scaling OK (burst): observed peak %s (required >= %s)",
-        observed_max,
-        required,
+        run_time=RUN_TIME,
+        expected_scale_increase=EXPECTED_SCALE_INCREASE,
+        end_padding=_metric_slop(),
+        slo=SLO,
     )
 
 
@@ -2,6 +2,14 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
 
 from . import (
     run_e2e_latency_routing,
@@ -16,7 +24,19 @@ from . import (
     run_e2e_scalability_burst,
     run_e2e_usage_tracking,
 )
-from ._e2e_common import build_test_environment
+from ._e2e_common import build_test_environment, e2e_run_dir
+from ._locust_stats import SUMMARY_SUFFIX, Tolerances
+from ._telemetry import span
+from ._utils import output_context, tag_logging_with_output_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLELISM = 4
+DEFAULT_LOCUST_WEB_PORT = 8091
+
+# Simulator backends shared by every E2E route (see the e2e gateway config).
+PTU1, PAYG1, PAYG2 = "ptu1", "payg1", "payg2"
+ALL_BACKENDS = frozenset({PTU1, PAYG1, PAYG2})
 
 SCENARIO_RUNNERS = {
     "round-robin-simple": run_e2e_round_robin_simple.run,
@@ -33,11 +53,130 @@ SCENARIO_RUNNERS = {
 }
 
 
+@dataclass(frozen=True)
+class Footprint:
+    """What a scenario touches on the shared E2E deployment."""
+
+    route_prefix: str
+    backends: frozenset[str] = ALL_BACKENDS
+    # Drives the backends into throttling/failover, which skews the
+    # distribution and latency assertions of anything else using them.
+    disturbs_backends: bool = False
+    # Rewrites gateway/simulator settings through the config API.
+    mutates_config: bool = False
+    # Needs the whole gateway to itself (autoscaling, latency measurements).
+    exclusive: bool = False
+
+    def conflicts_with(self, other: Footprint) -> bool:
+        if self.exclusive or other.exclusive:
+            return True
+        if self.route_prefix == other.route_prefix:
+            return True
+        if self.mutates_config and other.mutates_config:
+            return True
+        if self.disturbs_backends and self.backends & other.backends:
+            return True
+        return bool(other.disturbs_backends and other.backends & self.backends)
+
+
+SCENARIO_FOOTPRINTS = {
+    "round-robin-simple": Footprint("round-robin-simple"),
+    "round-robin-simple-v2": Footprint("round-robin-simple-v2"),
+    "round-robin-weighted": Footprint("round-robin-weighted"),
+    "round-robin-weighted-v2": Footprint("round-robin-weighted-v2"),
+    "latency-routing": Footprint(
+        "latency-routing", mutates_config=True, exclusive=True
+    ),
+    "manage-spikes-with-payg": Footprint("retry-with-payg", disturbs_backends=True),
+    "manage-spikes-with-payg-v2": Footprint(
+        "retry-with-payg-v2", disturbs_backends=True
+    ),
+    "usage-tracking": Footprint("usage-tracking"),
+    "prioritization": Footprint("prioritization-simple", disturbs_backends=True),
+    "scalability": Footprint("round-robin-simple", exclusive=True),
+    "scalability-burst": Footprint("round-robin-simple", exclusive=True),
+}
+
+
+@dataclass(frozen=True)
+class ScenarioOutcome:
+    name: str
+    duration_s: float
+    error: BaseException | None = None
+
+
+def schedule(
+    names: list[str],
+    run_one: Callable[[str, int], None],
+    *,
+    parallelism: int,
+    stop_on_failure: bool = False,
+) -> list[ScenarioOutcome]:
+    """
+    Run scenarios in order, starting each one as soon as it does not conflict
+    with anything running. `run_one` gets the scenario name and a slot number
+    (0..parallelism-1) unique among the scenarios running at the same time.
+    An exclusive scenario waits for the gateway to drain and nothing after it
+    starts until it has run.
+    """
+    pending = list(names)
+    outcomes: list[ScenarioOutcome] = []
+    running: dict[Future[None], tuple[str, int, float]] = {}
+    free_slots = list(range(max(1, parallelism)))
+    failed = False
+
+    def _startable() -> list[str]:
+        selected: list[str] = []
+        active = [SCENARIO_FOOTPRINTS[name] for name, _, _ in running.values()]
+        for name in pending:
+            if len(selected) >= len(free_slots):
+                break
+            footprint = SCENARIO_FOOTPRINTS[name]
+            if all(not footprint.conflicts_with(other) for other in active):
+                selected.append(name)
+                active.append(footprint)
+            elif footprint.exclusive:
+                break
+        return selected
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, parallelism), thread_name_prefix="e2e"
+    ) as pool:
+        while pending or running:
+            if not (failed and stop_on_failure):
+                for name in _startable():
+                    slot = free_slots.pop(0)
+                    pending.remove(name)
+                    future = pool.submit(run_one, name, slot)
+                    running[future] = (name, slot, time.monotonic())
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, slot, started = running.pop(future)
+                free_slots.append(slot)
+                free_slots.sort()
+                error = future.exception()
+                outcomes.append(
+                    ScenarioOutcome(name, time.monotonic() - started, error)
+                )
+                if error is not None:
+                    failed = True
+
+    if pending:
+        logger.error("Not started because of failures: %s", ", ".join(pending))
+    return outcomes
+
+
 def main(argv: list[str] | None = None) -> int:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    tag_logging_with_output_context("%(levelname)s: %(message)s")
     parser = argparse.ArgumentParser(
         prog="run-e2e-all",
-        description="Run all APIM/GenAI toolkit end-to-end scenarios sequentially.",
+        description=(
+            "Run all APIM/GenAI toolkit end-to-end scenarios, running scenarios "
+            "with disjoint routes and backends concurrently."
+        ),
     )
     parser.add_argument(
         "--skip",
@@ -48,28 +187,105 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument(
         "--stop-on-failure",
         action="store_true",
-        help="Stop after the first failed scenario instead of continuing.",
+        help="Start no further scenarios after the first failure.",
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=DEFAULT_PARALLELISM,
+        help="Maximum number of scenarios running at once (1 runs them sequentially)",
+    )
+    parser.add_argument(
+        "--baseline-dir",
+        type=Path,
+        default=os.environ.get("E2E_BASELINE_DIR"),
+        help=(
+            "Directory of <scenario>.summary.json baselines; scenarios whose "
+            "Locust stats regress past tolerance fail (default: $E2E_BASELINE_DIR)"
+        ),
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Skip the regression check and store this run's summaries as the baseline",
+    )
+    defaults = Tolerances()
+    parser.add_argument("--p95-tolerance", type=float, default=defaults.p95)
+    parser.add_argument("--p99-tolerance", type=float, default=defaults.p99)
+    parser.add_argument(
+        "--error-rate-tolerance", type=float, default=defaults.error_rate
+    )
+    parser.add_argument(
+        "--throughput-tolerance", type=float, default=defaults.throughput
     )
     args = parser.parse_args(argv)
+    if args.update_baseline and args.baseline_dir is None:
+        parser.error("--update-baseline requires --baseline-dir")
 
     base_env = build_test_environment()
-    failures: list[tuple[str, Exception]] = []
+    base_port = int(base_env.get("LOCUST_WEB_PORT", DEFAULT_LOCUST_WEB_PORT))
+    log_dir = e2e_run_dir()
+    log_dir.mkdir(parents=True, exist_ok=True)
+    base_env = {
+        **base_env,
+        "E2E_RESULTS_DIR": str(log_dir),
+        "E2E_TOLERANCE_P95": str(args.p95_tolerance),
+        "E2E_TOLERANCE_P99": str(args.p99_tolerance),
+        "E2E_TOLERANCE_ERROR_RATE": str(args.error_rate_tolerance),
+        "E2E_TOLERANCE_THROUGHPUT": str(args.throughput_tolerance),
+    }
+    if args.baseline_dir is not None and not args.update_baseline:
+        base_env["E2E_BASELINE_DIR"] = str(args.baseline_dir)
 
-    for name, runner in SCENARIO_RUNNERS.items():
+    names = []
+    for name in SCENARIO_RUNNERS:
         if args.skip and name in args.skip:
-            logging.info("Skipping scenario '%s'", name)
+            logger.info("Skipping scenario '%s'", name)
             continue
-        try:
-            runner(base_env=base_env)
-        except Exception as exc:  # noqa: BLE001
-            failures.append((name, exc))
-            logging.error("Scenario '%s' failed: %s", name, exc)
-            if args.stop_on_failure:
-                break
+        names.append(name)
+
+    def _run(name: str, slot: int) -> None:
+        log_path = log_dir / f"{name}.log"
+        # Concurrent Locust processes each need their own web UI port.
+        env = {**base_env, "LOCUST_WEB_PORT": str(base_port + slot)}
+        with ExitStack() as stack:
+            log_file = stack.enter_context(log_path.open("a", encoding="utf-8"))
+            stack.enter_context(output_context(name, log_file))
+            stack.enter_context(span("e2e_scenario", scenario=name))
+            logger.info("Starting scenario '%s' (log: %s)", name, log_path)
+            try:
+                SCENARIO_RUNNERS[name](base_env=env)
+            except BaseException as exc:
+                logger.error("Scenario '%s' failed: %s", name, exc)
+                raise
+            logger.info("Scenario '%s' passed", name)
+
+    outcomes = schedule(
+        names,
+        _run,
+        parallelism=args.parallelism,
+        stop_on_failure=args.stop_on_failure,
+    )
 
+    logger.info("E2E summary (logs and Locust stats: %s):", log_dir)
+    for outcome in outcomes:
+        logger.info(
+            "  %-27s %-6s %6.0fs",
+            outcome.name,
+            "FAILED" if outcome.error else "passed",
+            outcome.duration_s,
+        )
+    failures = [outcome.name for outcome in outcomes if outcome.error is not None]
+    if args.update_baseline:
+        if failures:
+            logger.warning("Not updating the baseline because scenarios failed")
+        else:
+            args.baseline_dir.mkdir(parents=True, exist_ok=True)
+            for summary in sorted(log_dir.glob(f"*{SUMMARY_SUFFIX}")):
+                shutil.copy2(summary, args.baseline_dir / summary.name)
+            logger.info("Baseline updated in %s", args.baseline_dir)
     if failures:
-        failure_names = ", ".join(n for n, _ in failures)
-        raise RuntimeError(f"One or more scenarios failed: {failure_names}")
+        raise RuntimeError(f"One or more scenarios failed: {', '.join(failures)}")
     return 0
 
 
@@ -0,0 +1,531 @@
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+from . import _prometheus
+from ._bench_common import results_dir, write_result
+from ._telemetry import span
+from ._utils import run_logged
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = "http://localhost:9091/apisix/prometheus/metrics"
+DEFAULT_INTERVAL_SECONDS = 5.0
+
+HTTP_STATUS = _prometheus.APISIX_HTTP_STATUS
+PROMPT_TOKENS = _prometheus.APISIX_LLM_PROMPT_TOKENS
+COMPLETION_TOKENS = _prometheus.APISIX_LLM_COMPLETION_TOKENS
+
+# Metric families the Grafana dashboard (templates/grafana-dashboard) reads,
+# under APISIX's own names; recordings keep only these unless --all-metrics
+# is given.
+DASHBOARD_FAMILIES = frozenset(
+    {
+        HTTP_STATUS,
+        "apisix_http_latency",
+        "apisix_llm_latency",
+        "apisix_llm_active_connections",
+        PROMPT_TOKENS,
+        COMPLETION_TOKENS,
+        "apisix_nginx_http_current_connections",
+        "apisix_nginx_metric_errors_total",
+        "apisix_shared_dict_capacity_bytes",
+        "apisix_shared_dict_free_space_bytes",
+    }
+)
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+# llm_cost_usd only exists in the OTel collector, so cost is derived from the
+# token counters with the collector's prices
+# (templates/config/otel-collector/config.yaml.j2): counter, labels it must
+# carry, cost_component, USD per token.
+LLM_TOKEN_PRICES = (
+    (PROMPT_TOKENS, {"llm_model": "gpt-5-mini"}, "prompt", 0.10e-6),
+    (COMPLETION_TOKENS, {"llm_model": "gpt-5-mini"}, "completion", 0.60e-6),
+    (
+        PROMPT_TOKENS,
+        {"llm_model": "text-embedding-3-small", "request_type": "ai_embeddings"},
+        "embedding_input",
+        0.02e-6,
+    ),
+)
+
+LabelFilter = Callable[[Mapping[str, str]], bool]
+
+
+def _all(labels: Mapping[str, str]) -> bool:
+    return True
+
+
+def _ok(labels: Mapping[str, str]) -> bool:
+    return labels.get("code", "").startswith("2")
+
+
+def _request_latency(labels: Mapping[str, str]) -> bool:
+    # APISIX splits apisix_http_latency by type (request/upstream/apisix);
+    # end-to-end request latency is what clients see.
+    return labels.get("type", "request") == "request"
+
+
+def _increase(values: list[float | None], present_from_start: bool) -> float:
+    """
+    Counter increase across scrapes, treating a drop as a restart. A series
+    that first appears mid-recording is counted from zero: APISIX creates
+    label sets on their first request.
+    """
+    total = 0.0
+    previous = None if present_from_start else 0.0
+    for value in values:
+        if value is None:
+            continue
+        if previous is not None:
+            total += value - previous if value >= previous else value
+        previous = value
+    return total
+
+
+class Evaluation:
+    """PromQL-style aggregations over a recording, in the dashboard's terms."""
+
+    def __init__(self, recording: _prometheus.Recording) -> None:
+        self.recording = recording
+        self.seconds = (
+            recording.times[-1] - recording.times[0]
+            if len(recording.times) > 1
+            else 0.0
+        )
+        self._by_name: dict[str, list[int]] = defaultdict(list)
+        for index, (name, _) in enumerate(recording.series):
+            self._by_name[_prometheus.native_name(name)].append(index)
+        # Scrape at which each series first appeared.
+        self._first_seen = [len(recording.values)] * len(recording.series)
+        for row, values in enumerate(recording.values):
+            for index, value in enumerate(values):
+                if value is not None and self._first_seen[index] > row:
+                    self._first_seen[index] = row
+
+    def _series(self, name: str, where: LabelFilter) -> list[int]:
+        return [
+            index
+            for index in self._by_name.get(name, [])
+            if where(self.recording.series[index][1])
+        ]
+
+    def _key(self, index: int, by: tuple[str, ...]) -> tuple[str, ...]:
+        labels = self.recording.series[index][1]
+        return tuple(labels.get(label, "") for label in by)
+
+    def increase(
+        self,
+        name: str,
+        by: tuple[str, ...] = (),
+        where: LabelFilter = _all,
+        start: int = 0,
+        end: int | None = None,
+    ) -> dict[tuple[str, ...], float]:
+        """sum by (<by>) (increase(name{where}[window])) between two scrapes."""
+        rows = self.recording.values[start : (end + 1) if end is not None else None]
+        totals: dict[tuple[str, ...], float] = defaultdict(float)
+        for index in self._series(name, where):
+            column = [row[index] for row in rows]
+            totals[self._key(index, by)] += _increase(
+                column, self._first_seen[index] <= start
+            )
+        return dict(totals)
+
+    def rate(
+        self, name: str, by: tuple[str, ...] = (), where: LabelFilter = _all
+    ) -> dict[tuple[str, ...], float]:
+        if self.seconds <= 0:
+            return {}
+        return {
+            key: value / self.seconds
+            for key, value in self.increase(name, by, where).items()
+        }
+
+    def total_rate(self, name: str, where: LabelFilter = _all) -> float:
+        return self.rate(name, (), where).get((), 0.0)
+
+    def quantiles(
+        self,
+        family: str,
+        by: tuple[str, ...] = (),
+        where: LabelFilter = _all,
+        start: int = 0,
+        end: int | None = None,
+    ) -> dict[tuple[str, ...], dict[str, float | None]]:
+        """histogram_quantile over sum by (le, <by>) (increase(family_bucket[window]))."""
+        buckets = self.increase(f"{family}_bucket", (*by, "le"), where, start, end)
+        grouped: dict[tuple[str, ...], list[tuple[float, float]]] = defaultdict(list)
+        for key, count in buckets.items():
+            grouped[key[:-1]].append((float(key[-1]), count))
+        return {
+            key: {
+                name: _round(_prometheus.histogram_quantile(q, pairs))
+                for name, q in QUANTILES.items()
+            }
+            for key, pairs in grouped.items()
+        }
+
+    def gauge(
+        self, name: str, by: tuple[str, ...] = (), where: LabelFilter = _all
+    ) -> dict[tuple[str, ...], dict[str, float]]:
+        """max and last of sum by (<by>) (name) across scrapes."""
+        sums: dict[tuple[str, ...], list[float]] = defaultdict(
+            lambda: [0.0] * len(self.recording.values)
+        )
+        for index in self._series(name, where):
+            column = sums[self._key(index, by)]
+            for row, value in enumerate(self.recording.column(index)):
+                if value is not None:
+                    column[row] += value
+        return {
+            key: {"max": _round(max(values)), "last": _round(values[-1])}
+            for key, values in sums.items()
+            if values
+        }
+
+
+def _round(value: float | None, digits: int = 3) -> float | None:
+    return None if value is None else round(value, digits)
+
+
+def _label(value: str) -> str:
+    return value or "unknown"
+
+
+def _flat(values: Mapping[tuple[str, ...], Any]) -> dict[str, Any]:
+    return {
+        "|".join(_label(part) for part in key) if key else "all": value
+        for key, value in sorted(values.items())
+    }
+
+
+def _ratio(numerator: float, denominator: float) -> float | None:
+    return round(numerator / denominator, 6) if denominator > 0 else None
+
+
+def _status_breakdown(evaluation: Evaluation) -> dict[str, Any]:
+    name = HTTP_STATUS
+    total = evaluation.total_rate(name)
+    by_backend = evaluation.rate(name, ("backend_identifier",))
+    ok_by_backend = evaluation.rate(name, ("backend_identifier",), _ok)
+    errors: dict[str, dict[str, float]] = defaultdict(dict)
+    for (backend, status), value in evaluation.rate(
+        name,
+        ("backend_identifier", "backend_error_status"),
+        lambda labels: labels.get("backend_error_status", "") != "",
+    ).items():
+        errors[_label(backend)][status] = round(value, 3)
+    by_type = evaluation.increase(name, ("request_type",))
+    return {
+        "rps": round(total, 3),
+        "success_ratio": _ratio(evaluation.total_rate(name, _ok), total),
+        "by_code": {
+            key: round(value, 3)
+            for key, value in _flat(evaluation.rate(name, ("code",))).items()
+        },
+        "by_route": {
+            key: round(value, 3)
+            for key, value in _flat(evaluation.rate(name, ("route",))).items()
+        },
+        "by_backend_identifier": {
+            _label(backend): {
+                "rps": round(value, 3),
+                "success_ratio": _ratio(ok_by_backend.get((backend,), 0.0), value),
+            }
+            for (backend,), value in sorted(by_backend.items())
+        },
+        "backend_errors": dict(sorted(errors.items())),
+        "stream_ratio": _ratio(
+            by_type.get(("ai_stream",), 0.0), by_type.get(("ai_chat",), 0.0)
+        ),
+    }
+
+
+def _timeline(evaluation: Evaluation) -> list[dict[str, Any]]:
+    recording = evaluation.recording
+    points = []
+    for end in range(1, len(recording.times)):
+        elapsed = recording.times[end] - recording.times[end - 1]
+        if elapsed <= 0:
+            continue
+        total = evaluation.increase(HTTP_STATUS, start=end - 1, end=end)
+        ok = evaluation.increase(HTTP_STATUS, where=_ok, start=end - 1, end=end)
+        latency = evaluation.quantiles(
+            "apisix_http_latency", where=_request_latency, start=end - 1, end=end
+        ).get((), {})
+        requests = total.get((), 0.0)
+        points.append(
+            {
+                "t_s": round(recording.times[end] - recording.times[0], 1),
+                "rps": round(requests / elapsed, 3),
+                "success_ratio": _ratio(ok.get((), 0.0), requests),
+                "p95_ms": latency.get("p95"),
+            }
+        )
+    return points
+
+
+def _shared_dict_utilization(evaluation: Evaluation) -> dict[str, float | None]:
+    capacity = evaluation.gauge("apisix_shared_dict_capacity_bytes", ("name",))
+    free = evaluation.gauge("apisix_shared_dict_free_space_bytes", ("name",))
+    utilization = {}
+    for key, stats in sorted(capacity.items()):
+        total = stats["last"] or 0.0
+        available = free.get(key, {}).get("last") or 0.0
+        utilization[_label(key[0])] = _ratio(total - available, total)
+    return utilization
+
+
+def _cost(evaluation: Evaluation) -> dict[str, float]:
+    by_component: dict[str, float] = defaultdict(float)
+    for name, match, component, usd_per_token in LLM_TOKEN_PRICES:
+        tokens = evaluation.increase(
+            name,
+            where=lambda labels, match=match: all(
+                labels.get(key) == value for key, value in match.items()
+            ),
+        ).get((), 0.0)
+        by_component[component] += tokens * usd_per_token
+    return dict(by_component)
+
+
+def evaluate(recording: _prometheus.Recording) -> dict[str, Any]:
+    """
+    Rates, latency quantiles and per-backend breakdowns over the whole
+    recording, keyed by the metric names the Grafana dashboard uses.
+    """
+    evaluation = Evaluation(recording)
+    llm_latency = evaluation.quantiles("apisix_llm_latency", ("backend_identifier",))
+    cost_by_component = _cost(evaluation)
+    cost = sum(cost_by_component.values())
+    minutes = evaluation.seconds / 60 if evaluation.seconds > 0 else 0.0
+    return {
+        "window": {
+            "start": dt.datetime.fromtimestamp(
+                recording.times[0], dt.timezone.utc
+            ).isoformat()
+            if recording.times
+            else None,
+            "seconds": round(evaluation.seconds, 3),
+            "scrapes": len(recording.times),
+            "targets": recording.targets,
+            "series": len(recording.series),
+        },
+        _prometheus.DASHBOARD_NAMES[HTTP_STATUS]: _status_breakdown(evaluation),
+        "apisix_http_latency": {
+            "overall_ms": evaluation.quantiles(
+                "apisix_http_latency", where=_request_latency
+            ).get((), {}),
+            "by_route_ms": _flat(
+                evaluation.quantiles(
+                    "apisix_http_latency", ("route",), _request_latency
+                )
+            ),
+        },
+        "apisix_llm_latency": {
+            "by_backend_identifier_ms": _flat(llm_latency),
+        },
+        **{
+            _prometheus.DASHBOARD_NAMES[name]: {
+                "per_minute_by_llm_model": {
+                    key: round(value * 60, 3)
+                    for key, value in _flat(
+                        evaluation.rate(name, ("llm_model",))
+                    ).items()
+                },
+            }
+            for name in (PROMPT_TOKENS, COMPLETION_TOKENS)
+        },
+        "llm_cost_usd_total": {
+            "increase": round(cost, 6),
+            "per_minute": round(cost / minutes, 6) if minutes else None,
+            "by_cost_component": {
+                component: round(value, 6)
+                for component, value in sorted(cost_by_component.items())
+            },
+        },
+        "apisix_llm_active_connections": evaluation.gauge(
+            "apisix_llm_active_connections"
+        ).get((), {}),
+        "apisix_nginx_http_current_connections": _flat(
+            evaluation.gauge("apisix_nginx_http_current_connections", ("state",))
+        ),
+        "apisix_nginx_metric_errors_total": {
+            "rps": round(evaluation.total_rate("apisix_nginx_metric_errors_total"), 6),
+        },
+        "apisix_shared_dict": {
+            "utilization_by_name": _shared_dict_utilization(evaluation),
+        },
+        "timeline": _timeline(evaluation),
+    }
+
+
+def log_evaluation(result: dict[str, Any]) -> None:
+    status = result[_prometheus.DASHBOARD_NAMES[HTTP_STATUS]]
+    latency = result["apisix_http_latency"]["overall_ms"]
+    logger.info(
+        "Gateway: %.1f rps over %.0fs, success=%s, p50=%s p95=%s p99=%s ms",
+        status["rps"],
+        result["window"]["seconds"],
+        status["success_ratio"],
+        latency.get("p50"),
+        latency.get("p95"),
+        latency.get("p99"),
+    )
+    llm_latency = result["apisix_llm_latency"]["by_backend_identifier_ms"]
+    for backend, stats in status["by_backend_identifier"].items():
+        upstream_p95 = llm_latency.get(backend, {}).get("p95")
+        logger.info(
+            "  %-24s %8.2f rps success=%s upstream_p95=%s errors=%s",
+            backend,
+            stats["rps"],
+            stats["success_ratio"],
+            "-" if upstream_p95 is None else f"{upstream_p95:.0f}ms",
+            status["backend_errors"].get(backend, {}),
+        )
+
+
+class Scraper:
+    """Scrape every target on a fixed interval into a RecordingWriter."""
+
+    def __init__(
+        self, urls: list[str], writer: _prometheus.RecordingWriter, interval_s: float
+    ) -> None:
+        self.urls = urls
+        self.writer = writer
+        self.interval_s = interval_s
+        self.scrapes = 0
+        self.stop = threading.Event()
+
+    def scrape_once(self) -> None:
+        results: dict[str, list[_prometheus.Sample]] = {}
+        for url in self.urls:
+            try:
+                results[url] = _prometheus.scrape(url)
+            except OSError as exc:
+                logger.warning("Scrape of %s failed: %s", url, exc)
+        if results:
+            self.writer.write(time.time(), results)
+            self.scrapes += 1
+
+    def run(self, duration_s: float | None = None) -> None:
+        started = time.monotonic()
+        next_at = started
+        while True:
+            self.scrape_once()
+            next_at += self.interval_s
+            if duration_s is not None and next_at - started > duration_s:
+                return
+            if self.stop.wait(max(0.0, next_at - time.monotonic())):
+                # One last scrape so the window covers the whole run.
+                self.scrape_once()
+                return
+
+
+def _record(args: argparse.Namespace, recording_path: Path) -> int:
+    writer = _prometheus.RecordingWriter(
+        recording_path,
+        targets=args.url,
+        interval_s=args.interval,
+        families=None if args.all_metrics else DASHBOARD_FAMILIES,
+    )
+    scraper = Scraper(args.url, writer, args.interval)
+    exit_code = 0
+    try:
+        with span("gateway_metrics_scrape", targets=len(args.url)):
+            if args.command:
+                thread = threading.Thread(target=scraper.run, name="prometheus-scraper")
+                thread.start()
+                try:
+                    result = run_logged(args.command, check=False)
+                    exit_code = result.returncode
+                finally:
+                    scraper.stop.set()
+                    thread.join()
+            else:
+                logger.info(
+                    "Scraping %s every %.0fs%s (Ctrl-C to stop)",
+                    ", ".join(args.url),
+                    args.interval,
+                    f" for {args.duration:.0f}s" if args.duration else "",
+                )
+                try:
+                    scraper.run(args.duration)
+                except KeyboardInterrupt:
+                    scraper.scrape_once()
+    finally:
+        writer.close()
+    logger.info("Recorded %s scrapes to %s", scraper.scrapes, recording_path)
+    return exit_code
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="run-gateway-metrics",
+        description=(
+            "Scrape APISIX's Prometheus endpoint during a run, store the samples "
+            "compactly and compute rates, latency quantiles and per-backend "
+            "breakdowns locally. Anything after '--' is run while scraping."
+        ),
+    )
+    parser.add_argument(
+        "--url",
+        action="append",
+        help=f"Prometheus endpoint; repeat for several replicas (default: {DEFAULT_URL})",
+    )
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS)
+    parser.add_argument(
+        "--duration", type=float, help="Seconds to scrape without a command"
+    )
+    parser.add_argument(
+        "--all-metrics",
+        action="store_true",
+        help="Record every metric instead of only the dashboard's",
+    )
+    parser.add_argument("--recording", type=Path, help="Recording path (.jsonl.gz)")
+    parser.add_argument(
+        "--evaluate",
+        type=Path,
+        metavar="RECORDING",
+        help="Evaluate an existing recording instead of scraping",
+    )
+    parser.add_argument("--output", type=Path, help="Evaluation JSON path")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    if args.command and args.command[0] == "--":
+        args.command = args.command[1:]
+    args.url = args.url or [DEFAULT_URL]
+
+    exit_code = 0
+    recording_path = args.evaluate
+    if recording_path is None:
+        stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        recording_path = (
+            args.recording or results_dir() / f"gateway-metrics-{stamp}.jsonl.gz"
+        )
+        exit_code = _record(args, recording_path)
+
+    recording = _prometheus.read_recording(recording_path)
+    if len(recording.times) < 2:
+        logger.error(
+            "Need at least two scrapes to compute rates; got %s", len(recording.times)
+        )
+        return exit_code or 1
+    result = {"recording": str(recording_path), **evaluate(recording)}
+    log_evaluation(result)
+    path = write_result("gateway-metrics", result, args.output)
+    logger.info("Evaluation written to %s", path)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
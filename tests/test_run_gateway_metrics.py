@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from ops import _prometheus, run_gateway_metrics
+
+FIXTURES = Path(__file__).parent / "fixtures"
+TARGET = "http://gateway:9091/apisix/prometheus/metrics"
+
+
+@pytest.fixture
+def recording(tmp_path: Path) -> _prometheus.Recording:
+    """Two scrapes of APISIX's own exporter, 30s apart, recorded like the tool does."""
+    path = tmp_path / "recording.jsonl.gz"
+    writer = _prometheus.RecordingWriter(
+        path,
+        targets=[TARGET],
+        interval_s=30.0,
+        families=run_gateway_metrics.DASHBOARD_FAMILIES,
+    )
+    for index, timestamp in enumerate((1_000.0, 1_030.0)):
+        text = (FIXTURES / f"apisix_metrics_{index}.prom").read_text()
+        writer.write(timestamp, {TARGET: list(_prometheus.parse_text(text))})
+    writer.close()
+    return _prometheus.read_recording(path)
+
+
+def test_recording_keeps_native_counters(recording: _prometheus.Recording) -> None:
+    names = {name for name, _ in recording.series}
+    assert _prometheus.APISIX_HTTP_STATUS in names
+    assert _prometheus.APISIX_LLM_PROMPT_TOKENS in names
+    assert _prometheus.APISIX_LLM_COMPLETION_TOKENS in names
+    assert "apisix_node_info" not in names
+
+
+def test_status_breakdown(recording: _prometheus.Recording) -> None:
+    status = run_gateway_metrics.evaluate(recording)["apisix_http_status_total"]
+    # 126 requests over 30s.
+    assert status["rps"] == pytest.approx(4.2)
+    assert status["by_code"] == {"200": pytest.approx(4.0), "429": pytest.approx(0.2)}
+    assert set(status["by_route"]) == {"openai-chat", "openai-embeddings"}
+    assert status["by_backend_identifier"]["aoai-eastus"]["rps"] > 0
+    assert status["by_backend_identifier"]["aoai-swedencentral"]["rps"] > 0
+    assert status["backend_errors"] == {"aoai-eastus": {"429": pytest.approx(0.2)}}
+
+
+def test_tokens_and_cost(recording: _prometheus.Recording) -> None:
+    result = run_gateway_metrics.evaluate(recording)
+    prompt = result["apisix_llm_prompt_tokens_total"]["per_minute_by_llm_model"]
+    completion = result["apisix_llm_completion_tokens_total"]["per_minute_by_llm_model"]
+    assert prompt == {
+        "gpt-5-mini": pytest.approx(15_000),
+        "text-embedding-3-small": pytest.approx(4_800),
+    }
+    assert completion == {"gpt-5-mini": pytest.approx(44_000)}
+
+    cost = result["llm_cost_usd_total"]
+    # 7500 prompt + 22000 completion gpt-5-mini tokens, 2400 embedding tokens.
+    assert cost["by_cost_component"] == {
+        "completion": pytest.approx(0.0132),
+        "embedding_input": pytest.approx(0.000048),
+        "prompt": pytest.approx(0.00075),
+    }
+    assert cost["increase"] == pytest.approx(0.013998)
+
+
+def test_latency_and_timeline(recording: _prometheus.Recording) -> None:
+    result = run_gateway_metrics.evaluate(recording)
+    assert result["apisix_http_latency"]["overall_ms"]["p95"] > 0
+    assert result["apisix_llm_latency"]["by_backend_identifier_ms"]["aoai-eastus"]
+    assert result["timeline"][0]["rps"] == pytest.approx(4.2)